@@ -0,0 +1,236 @@
+"""
+数据库初始化
+创建数据库、检查旧 schema、建表和迁移，部署时在启动应用前执行一次：
+
+python -m app.bootstrap
+
+应用启动时不再执行这些步骤（需要时可设置 DB_BOOTSTRAP_ON_STARTUP=true）
+"""
+import logging
+
+from app.config import settings
+from app.database import Base, create_database_if_not_exists, get_engine
+
+# 导入所有模型（必须导入才能让 SQLAlchemy 创建表）
+from app.models import User, Category, Tag, Note, NoteTag, NoteRevision, SyncChange, UserSession
+from app.models import AttachmentBlob, NoteAttachment, AttachmentUpload
+
+logger = logging.getLogger(__name__)
+
+
+def check_and_rebuild_database():
+    """
+    检查数据库是否使用旧的 Integer ID schema
+    如果是，自动重建数据库（会丢失所有数据）
+    """
+    from sqlalchemy import text, inspect
+
+    engine = get_engine()
+    try:
+        inspector = inspect(engine)
+
+        if 'users' not in inspector.get_table_names():
+            logger.info("数据库不存在，将创建新表")
+            return
+
+        # 检查 users.id 的类型
+        users_columns = inspector.get_columns('users')
+        id_column = next((col for col in users_columns if col['name'] == 'id'), None)
+
+        if not id_column:
+            return
+
+        # 检查是否为 Integer 类型
+        is_integer_id = 'INT' in str(id_column['type']).upper()
+
+        if not is_integer_id:
+            logger.info("✅ 数据库已使用 UUID String 类型")
+            return
+
+        # ⚠️ 检测到旧的 Integer ID schema，需要重建
+        logger.warning("⚠️  检测到数据库使用旧的 Integer ID schema")
+        logger.warning("⚠️  需要重建数据库以支持 UUID ID（会删除所有数据）")
+
+        # 从环境变量读取是否允许自动重建
+        import os
+        auto_rebuild = os.getenv('AUTO_REBUILD_DATABASE', 'false').lower() == 'true'
+
+        if not auto_rebuild:
+            logger.error("❌ 自动重建已禁用")
+            logger.error("请设置环境变量 AUTO_REBUILD_DATABASE=true 以自动重建")
+            logger.error("或者手动执行以下 SQL:")
+            logger.error("  DROP TABLE IF EXISTS note_tags, notes, tags, categories, users;")
+            raise Exception("数据库 schema 不匹配：需要将 Integer ID 迁移到 UUID String")
+
+        logger.info("🔄 开始自动重建数据库...")
+
+        with engine.connect() as conn:
+            # 删除所有表（按依赖顺序）
+            logger.info("删除旧表...")
+            conn.execute(text("DROP TABLE IF EXISTS note_tags"))
+            conn.execute(text("DROP TABLE IF EXISTS notes"))
+            conn.execute(text("DROP TABLE IF EXISTS tags"))
+            conn.execute(text("DROP TABLE IF EXISTS categories"))
+            conn.execute(text("DROP TABLE IF EXISTS users"))
+            conn.commit()
+
+        logger.info("✅ 旧表已删除，将创建新表")
+
+    except Exception as e:
+        logger.error(f"数据库检查失败: {str(e)}")
+        import os
+        auto_rebuild = os.getenv('AUTO_REBUILD_DATABASE', 'false').lower() == 'true'
+        if not auto_rebuild:
+            raise
+        logger.warning("继续启动...")
+
+
+def migrate_database():
+    """
+    自动迁移数据库：添加缺失的字段
+    """
+    from sqlalchemy import text, inspect
+
+    engine = get_engine()
+    try:
+        inspector = inspect(engine)
+
+        # 检查并迁移 categories 表
+        if 'categories' in inspector.get_table_names():
+            columns = [col['name'] for col in inspector.get_columns('categories')]
+
+            with engine.connect() as conn:
+                # 添加 color 字段
+                if 'color' not in columns:
+                    logger.info("迁移: 为 categories 表添加 color 字段...")
+                    conn.execute(text(
+                        "ALTER TABLE categories "
+                        "ADD COLUMN color VARCHAR(20) NULL COMMENT '分类颜色' AFTER description"
+                    ))
+                    conn.commit()
+                    logger.info("✅ categories.color 字段添加成功")
+
+                # 添加 sort_order 字段
+                if 'sort_order' not in columns:
+                    logger.info("迁移: 为 categories 表添加 sort_order 字段...")
+                    conn.execute(text(
+                        "ALTER TABLE categories "
+                        "ADD COLUMN sort_order INT DEFAULT 0 COMMENT '排序顺序' AFTER color"
+                    ))
+                    conn.commit()
+                    logger.info("✅ categories.sort_order 字段添加成功")
+
+        # 检查并迁移 tags 表
+        if 'tags' in inspector.get_table_names():
+            columns = [col['name'] for col in inspector.get_columns('tags')]
+
+            with engine.connect() as conn:
+                # 添加 color 字段
+                if 'color' not in columns:
+                    logger.info("迁移: 为 tags 表添加 color 字段...")
+                    conn.execute(text(
+                        "ALTER TABLE tags "
+                        "ADD COLUMN color VARCHAR(20) NULL COMMENT '标签颜色' AFTER name"
+                    ))
+                    conn.commit()
+                    logger.info("✅ tags.color 字段添加成功")
+
+        # 检查并迁移 users 表
+        if 'users' in inspector.get_table_names():
+            columns = [col['name'] for col in inspector.get_columns('users')]
+
+            with engine.connect() as conn:
+                # 添加 data_version 字段
+                if 'data_version' not in columns:
+                    logger.info("迁移: 为 users 表添加 data_version 字段...")
+                    conn.execute(text(
+                        "ALTER TABLE users "
+                        "ADD COLUMN data_version INT NOT NULL DEFAULT 0 COMMENT '数据版本号' AFTER primary_color"
+                    ))
+                    conn.commit()
+                    logger.info("✅ users.data_version 字段添加成功")
+
+        # 检查并迁移 notes 表
+        if 'notes' in inspector.get_table_names():
+            columns = [col['name'] for col in inspector.get_columns('notes')]
+
+            with engine.connect() as conn:
+                # 添加 content_compressed 字段
+                if 'content_compressed' not in columns:
+                    logger.info("迁移: 为 notes 表添加 content_compressed 字段...")
+                    conn.execute(text(
+                        "ALTER TABLE notes "
+                        "ADD COLUMN content_compressed MEDIUMBLOB NULL COMMENT '压缩后的笔记内容' AFTER content"
+                    ))
+                    conn.commit()
+                    logger.info("✅ notes.content_compressed 字段添加成功")
+
+                # 删除早期版本为压缩笔记保存的明文检索列（搜索改为解压匹配，不再保存第二份内容）
+                if 'content_search' in columns:
+                    logger.info("迁移: 删除 notes 表的 content_search 字段...")
+                    conn.execute(text("ALTER TABLE notes DROP COLUMN content_search"))
+                    conn.commit()
+                    logger.info("✅ notes.content_search 字段已删除")
+
+                # 添加 version 字段
+                if 'version' not in columns:
+                    logger.info("迁移: 为 notes 表添加 version 字段...")
+                    conn.execute(text(
+                        "ALTER TABLE notes "
+                        "ADD COLUMN version INT NOT NULL DEFAULT 0 COMMENT '内容版本号' AFTER view_count"
+                    ))
+                    conn.commit()
+                    logger.info("✅ notes.version 字段添加成功")
+
+        # 检查并迁移 note_revisions 表
+        if 'note_revisions' in inspector.get_table_names():
+            columns = [col['name'] for col in inspector.get_columns('note_revisions')]
+
+            with engine.connect() as conn:
+                # 添加 payload_compressed 字段，并放宽 payload 字段以容纳超过 64KB 的快照
+                if 'payload_compressed' not in columns:
+                    logger.info("迁移: 为 note_revisions 表添加 payload_compressed 字段...")
+                    conn.execute(text(
+                        "ALTER TABLE note_revisions "
+                        "ADD COLUMN payload_compressed MEDIUMBLOB NULL COMMENT '压缩后的快照内容或差异数据' AFTER payload"
+                    ))
+                    if engine.dialect.name == 'mysql':
+                        conn.execute(text(
+                            "ALTER TABLE note_revisions "
+                            "MODIFY COLUMN payload MEDIUMTEXT NULL COMMENT '快照内容或差异数据'"
+                        ))
+                    conn.commit()
+                    logger.info("✅ note_revisions.payload_compressed 字段添加成功")
+
+    except Exception as e:
+        logger.warning(f"数据库迁移警告: {str(e)}")
+        # 不中断启动，继续执行
+
+
+def bootstrap():
+    """
+    初始化数据库：创建数据库（如不存在）、检查旧 schema、建表、迁移缺失字段
+
+    Raises:
+        Exception: 数据库不可用，或 schema 不匹配且未允许自动重建
+    """
+    logger.info(f"正在初始化数据库: {settings.MYSQL_HOST}:{settings.MYSQL_PORT}/{settings.MYSQL_DB}")
+
+    create_database_if_not_exists()
+
+    # 检查数据库 schema，自动重建如果不匹配
+    check_and_rebuild_database()
+
+    # 创建所有表（如果表已存在则跳过）
+    Base.metadata.create_all(bind=get_engine())
+    logger.info("✅ 数据库表创建成功")
+
+    # 自动迁移数据库（添加缺失的字段）
+    migrate_database()
+
+
+if __name__ == "__main__":
+    from app.logger import setup_logging
+
+    setup_logging()
+    bootstrap()
@@ -8,6 +8,18 @@ from functools import lru_cache
 import os
 
 
+def to_async_url(url: str) -> str:
+    """将同步驱动的连接 URL 转换为异步驱动（pymysql → aiomysql，sqlite → aiosqlite）"""
+    for sync_prefix, async_prefix in (
+        ("mysql+pymysql://", "mysql+aiomysql://"),
+        ("mysql://", "mysql+aiomysql://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
+
 class Settings(BaseSettings):
     """应用配置类"""
 
@@ -24,21 +36,63 @@ class Settings(BaseSettings):
     MYSQL_USER: Optional[str] = os.getenv("MYSQLUSER", "root")
     MYSQL_PASSWORD: Optional[str] = os.getenv("MYSQLPASSWORD", "root")
     MYSQL_DB: Optional[str] = os.getenv("MYSQLDATABASE", "personal_kb")
+    # 完整的数据库连接 URL（可选），设置后优先于 MYSQL* 配置，例如本地测试使用 sqlite:///./test.db
+    DATABASE_URL: Optional[str] = os.getenv("DATABASE_URL") or None
+    # 异步数据库模式：路由使用 AsyncSession（异步驱动 aiomysql / aiosqlite），等待数据库时不占用线程池
+    # 同步处理函数在事件循环中执行，其中的 CPU 工作（解压、渲染、序列化等）会阻塞其它请求
+    DB_ASYNC: bool = os.getenv("DB_ASYNC", "false").lower() == "true"
+    # 只读副本连接 URL（可选），设置后笔记、标签、分类的读接口查询副本
+    # 用户写入后 READ_YOUR_WRITES_SECONDS 秒内其读请求仍走主库，避免读到复制延迟前的旧数据
+    DATABASE_REPLICA_URL: Optional[str] = os.getenv("DATABASE_REPLICA_URL") or None
+    READ_YOUR_WRITES_SECONDS: float = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+    # 连接池配置（主库、副本的同步和异步引擎各自一个连接池）
+    # 同步模式下每个请求占用一个线程池线程（默认 40），连接池容量 DB_POOL_SIZE + DB_MAX_OVERFLOW
+    # 小于线程数时请求会在签出连接时排队，等待时间见 GET /health/pool
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # 启动时执行数据库初始化（建库、建表、迁移），默认关闭，部署时执行 python -m app.bootstrap
+    DB_BOOTSTRAP_ON_STARTUP: bool = os.getenv("DB_BOOTSTRAP_ON_STARTUP", "false").lower() == "true"
+    # 运维指标接口（/health/pool、/health/cache 等）的访问令牌，请求需携带 X-Metrics-Token 请求头
+    # 未设置时这些接口返回 404；GET /health 不受影响
+    HEALTH_METRICS_TOKEN: Optional[str] = os.getenv("HEALTH_METRICS_TOKEN") or None
 
     @property
     def database_url(self) -> str:
         """构建 MySQL 数据库连接 URL"""
+        if self.DATABASE_URL:
+            return self.DATABASE_URL
         return (
             f"mysql+pymysql://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}"
             f"@{self.MYSQL_HOST}:{self.MYSQL_PORT}/{self.MYSQL_DB}"
             f"?charset=utf8mb4"
         )
 
+    @property
+    def async_database_url(self) -> str:
+        """异步驱动的数据库连接 URL（pymysql → aiomysql，sqlite → aiosqlite）"""
+        return to_async_url(self.database_url)
+
     # JWT 配置
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "KP3yJzBAHeJt32CnjehY5zgM3CcH8d9uNTd15EJ68h4")
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # 已验证 Token 缓存容量，命中时跳过签名校验，条目在 Token 过期时失效
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+    # 进程内已吊销会话集合容量，条目保留 ACCESS_TOKEN_EXPIRE_MINUTES；应大于该时间段内的登出次数
+    REVOKED_SESSION_CACHE_SIZE: int = int(os.getenv("REVOKED_SESSION_CACHE_SIZE", "100000"))
+    # 未吊销会话的缓存秒数：期间不查询 user_sessions 表，多进程部署时其它进程登出的会话最多在该时间后失效
+    SESSION_CHECK_TTL: int = int(os.getenv("SESSION_CHECK_TTL", "10"))
+
+    # 密码哈希配置
+    # BCRYPT_ROUNDS 为成本因子，修改后旧哈希会在用户下次登录成功时自动升级
+    # 密码哈希在专用线程池中执行，运行和排队的任务超过 WORKERS + QUEUE_SIZE 时返回 503
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_QUEUE_SIZE: int = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "16"))
 
     # CORS 配置（需要在部署后添加 Zeabur 前端域名）
     CORS_ORIGINS: List[str] = [
@@ -50,9 +104,105 @@ class Settings(BaseSettings):
     ]
     CORS_ALLOW_CREDENTIALS: bool = True
 
+    # 限流配置
+    # 规则格式 "方法 路径前缀=容量/秒数[@并发上限]"，分号分隔，第一条匹配的规则生效，路径前缀中的 * 匹配一个路径段；
+    # 附件分块上传的每个分块是一个 PATCH 请求，使用单独的宽松规则，不占用通用写接口的额度；
+    # 已登录请求按用户ID限流，否则按客户端 IP；RATE_LIMIT_STORE 可配置为 "模块路径:类名" 使用共享存储
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_RULES: str = os.getenv(
+        "RATE_LIMIT_RULES",
+        "POST /api/auth/login=10/60;"
+        "POST /api/auth/register=5/60;"
+        "POST /api/auth/refresh=30/60;"
+        "GET /api/notes/search=30/60@8;"
+        "PATCH /api/notes/*/attachments/uploads/=1200/60;"
+        "POST,PUT,PATCH,DELETE /api/=120/60"
+    )
+    RATE_LIMIT_STORE: str = os.getenv("RATE_LIMIT_STORE", "memory")
+    RATE_LIMIT_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+    # 部署在反向代理之后时开启，按 X-Forwarded-For 的第一个地址识别客户端
+    RATE_LIMIT_TRUST_FORWARDED: bool = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+
+    # 批量获取笔记（GET/POST /api/notes/batch）一次最多的笔记数
+    NOTE_BATCH_MAX_IDS: int = int(os.getenv("NOTE_BATCH_MAX_IDS", "100"))
+
+    # 批量请求（POST /api/batch）一次最多的子请求数
+    BATCH_MAX_REQUESTS: int = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+
+    # 变更事件流（GET /api/events）：心跳间隔（秒），每个连接最多积压的变更数（超过后改为通知客户端增量同步）
+    EVENTS_HEARTBEAT_SECONDS: float = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+    EVENTS_QUEUE_SIZE: int = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+
+    # 服务端 Markdown 渲染（GET /api/notes/{id}?render=html，需要安装 markdown-it-py）
+    # 结果按内容哈希缓存在进程内 LRU（按字节数限制容量），设置 RENDER_CACHE_DIR 后同时持久化到磁盘
+    RENDER_CACHE_MAX_BYTES: int = int(os.getenv("RENDER_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    RENDER_CACHE_DIR: str = os.getenv("RENDER_CACHE_DIR", "")
+
+    # 快速 JSON 序列化（可选）
+    # 笔记列表、搜索和详情接口直接从 ORM 对象构建响应并用 orjson 编码（未安装时使用标准库 json），
+    # 跳过 Pydantic 校验；输出与响应模型一致
+    FAST_JSON: bool = os.getenv("FAST_JSON", "false").lower() == "true"
+
+    # 响应压缩配置
+    # 按 Accept-Encoding 选择算法（br 需要安装 brotli），小于 COMPRESSION_MINIMUM_SIZE 字节的响应不压缩，
+    # 只压缩 Content-Type 以白名单前缀开头的响应；流式响应逐块压缩
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_ALGORITHMS: str = os.getenv("COMPRESSION_ALGORITHMS", "br,gzip")
+    COMPRESSION_MINIMUM_SIZE: int = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+    COMPRESSION_CONTENT_TYPES: str = os.getenv(
+        "COMPRESSION_CONTENT_TYPES",
+        "application/json,text/,application/javascript,application/x-ndjson,image/svg+xml"
+    )
+
+    # 日志配置
+    # LOG_FORMAT 可选 json / text；LOG_DEBUG_SAMPLE_RATE 为高频调试事件的采样比例（0~1）
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")
+    LOG_DEBUG_SAMPLE_RATE: float = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))
+
+    # 认证用户缓存配置
+    # 缓存轻量的用户身份信息，只需要用户ID的接口无需查询 users 表
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", "1024"))
+    PRINCIPAL_CACHE_TTL: int = int(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+
+    # 响应缓存配置
+    # 缓存笔记列表、标签、分类列表的响应体，键包含用户数据版本号，写操作后旧条目自动失效
+    # 后端可选 none / memory / local-kv / redis://...（需要安装 redis）/ "模块路径:类名"
+    RESPONSE_CACHE_BACKEND: str = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+    RESPONSE_CACHE_MAX_BYTES: int = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    RESPONSE_CACHE_MAX_ENTRY_BYTES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRY_BYTES", str(1024 * 1024)))
+    RESPONSE_CACHE_TTL: int = int(os.getenv("RESPONSE_CACHE_TTL", "300"))
+
+    # 笔记历史版本配置
+    # 每隔多少个版本保存一次完整快照（即差异链的最大长度），还原任意版本最多应用 N-1 个差异
+    NOTE_REVISION_MAX_CHAIN: int = int(os.getenv("NOTE_REVISION_MAX_CHAIN", "20"))
+
+    # 笔记内容压缩配置
+    # 超过阈值（字节）的内容压缩后存储，算法可选 zlib / zstd（zstd 需要安装 zstandard）
+    NOTE_COMPRESSION_THRESHOLD: int = int(os.getenv("NOTE_COMPRESSION_THRESHOLD", "4096"))
+    NOTE_COMPRESSION_ALGORITHM: str = os.getenv("NOTE_COMPRESSION_ALGORITHM", "zlib")
+    NOTE_COMPRESSION_LEVEL: int = int(os.getenv("NOTE_COMPRESSION_LEVEL", "6"))
+    # 搜索时每次最多解压匹配的压缩笔记数（按更新时间从新到旧），超过时结果可能不完整（truncated）
+    NOTE_SEARCH_SCAN_LIMIT: int = int(os.getenv("NOTE_SEARCH_SCAN_LIMIT", "200"))
+
     # 文件上传配置
     UPLOAD_DIR: str = "./uploads"
     MAX_UPLOAD_SIZE: int = 10485760  # 10MB
+    # 头像流式接收，超过 AVATAR_MAX_SIZE 立即返回 413；文件以内容哈希命名，相同内容只保存一份
+    AVATAR_MAX_SIZE: int = int(os.getenv("AVATAR_MAX_SIZE", str(2 * 1024 * 1024)))
+    AVATAR_CONTENT_TYPES: str = os.getenv("AVATAR_CONTENT_TYPES", "image/jpeg,image/png,image/gif,image/webp")
+    # 头像缩略图尺寸（像素，逗号分隔），在 IMAGE_WORKERS 个线程的专用线程池中生成（需要安装 Pillow）
+    AVATAR_THUMBNAIL_SIZES: str = os.getenv("AVATAR_THUMBNAIL_SIZES", "64,256")
+    IMAGE_WORKERS: int = int(os.getenv("IMAGE_WORKERS", "2"))
+    # /uploads 下以内容哈希命名的文件的缓存时间（秒），内容不变，标记为 immutable
+    UPLOAD_CACHE_MAX_AGE: int = int(os.getenv("UPLOAD_CACHE_MAX_AGE", "31536000"))
+
+    # 笔记附件：按内容 SHA-256 保存在 ATTACHMENT_DIR（不经 /uploads 公开访问），单个附件不超过 MAX_UPLOAD_SIZE
+    # 分块上传会话在 ATTACHMENT_UPLOAD_EXPIRE_HOURS 小时内未完成则被清理
+    ATTACHMENT_DIR: str = os.getenv("ATTACHMENT_DIR", "./attachments")
+    ATTACHMENT_UPLOAD_EXPIRE_HOURS: int = int(os.getenv("ATTACHMENT_UPLOAD_EXPIRE_HOURS", "24"))
 
     class Config:
         """Pydantic 配置"""
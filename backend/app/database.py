@@ -4,9 +4,18 @@
 """
 from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from app.config import settings
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from starlette.concurrency import run_in_threadpool
+from app.config import settings, to_async_url
+from app.pool_metrics import PoolMetrics, metered_pool_class, instrument_engine
+import functools
+import inspect
 import logging
+import threading
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -14,7 +23,11 @@ logger = logging.getLogger(__name__)
 def create_database_if_not_exists():
     """
     如果数据库不存在则创建数据库
+    设置了 DATABASE_URL 时由使用者自行准备数据库，跳过此步骤
     """
+    if settings.DATABASE_URL:
+        return
+
     # 构建不包含数据库名的连接 URL
     base_url = (
         f"mysql+pymysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}"
@@ -44,33 +57,250 @@ def create_database_if_not_exists():
         raise
 
 
-# 在创建引擎前先确保数据库存在
-create_database_if_not_exists()
+def pool_options(url: str, pool_class, metrics: PoolMetrics) -> dict:
+    """
+    连接池参数（见 Settings.DB_POOL_*）
+
+    SQLite 内存库使用单连接池，不支持这些参数
+
+    Args:
+        url: 数据库连接 URL
+        pool_class: QueuePool 或 AsyncAdaptedQueuePool
+        metrics: 连接池指标
+
+    Returns:
+        dict: create_engine 的连接池参数
+    """
+    if url.startswith("sqlite") and ":memory:" in url:
+        return {}
+    return {
+        "poolclass": metered_pool_class(pool_class, metrics),
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,  # 检查连接有效性
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,  # MySQL 连接回收时间
+    }
+
+
+# 引擎和会话工厂在第一次使用时创建，导入本模块不会加载数据库驱动或连接数据库
+# 数据库和表结构的创建、迁移由 python -m app.bootstrap 显式执行
+_instances = {}
+_instances_lock = threading.RLock()  # 会话工厂的 getter 会在持锁时获取引擎
+_lazy_attributes = {}
+
+
+def _lazy(name: str):
+    """将工厂函数包装为只执行一次的getter，并登记为模块的延迟属性"""
+    def decorator(factory):
+        @functools.wraps(factory)
+        def getter():
+            try:
+                return _instances[name]
+            except KeyError:
+                pass
+            with _instances_lock:
+                if name not in _instances:
+                    _instances[name] = factory()
+            return _instances[name]
+
+        _lazy_attributes[name] = getter
+        return getter
+    return decorator
+
+
+@_lazy("engine")
+def get_engine():
+    """主库引擎"""
+    metrics = PoolMetrics("sync", settings.DB_MAX_OVERFLOW)
+    engine = create_engine(
+        settings.database_url,
+        echo=settings.DEBUG,
+        **pool_options(settings.database_url, QueuePool, metrics)
+    )
+    instrument_engine(engine, metrics)
+    return engine
+
+
+@_lazy("SessionLocal")
+def get_session_factory():
+    """主库会话工厂"""
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
+
+@_lazy("replica_engine")
+def get_replica_engine():
+    """只读副本引擎，未配置 DATABASE_REPLICA_URL 时返回 None"""
+    if not settings.DATABASE_REPLICA_URL:
+        return None
+    metrics = PoolMetrics("replica", settings.DB_MAX_OVERFLOW)
+    engine = create_engine(
+        settings.DATABASE_REPLICA_URL,
+        echo=settings.DEBUG,
+        **pool_options(settings.DATABASE_REPLICA_URL, QueuePool, metrics)
+    )
+    instrument_engine(engine, metrics)
+    return engine
+
+
+@_lazy("ReplicaSessionLocal")
+def get_replica_session_factory():
+    """只读副本会话工厂，未配置副本时返回 None"""
+    engine = get_replica_engine()
+    if engine is None:
+        return None
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _create_async_engine(url: str, name: str):
+    """创建异步引擎（需要安装 aiomysql 或 aiosqlite）"""
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    metrics = PoolMetrics(name, settings.DB_MAX_OVERFLOW)
+    engine = create_async_engine(
+        url,
+        echo=settings.DEBUG,
+        **pool_options(url, AsyncAdaptedQueuePool, metrics)
+    )
+    instrument_engine(engine, metrics)
+    return engine
+
+
+def _async_session_factory(engine):
+    """创建异步会话工厂"""
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    return async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=True)
+
+
+@_lazy("async_engine")
+def get_async_engine():
+    """主库异步引擎，未启用 DB_ASYNC 时返回 None"""
+    if not settings.DB_ASYNC:
+        return None
+    return _create_async_engine(settings.async_database_url, "async")
+
+
+@_lazy("AsyncSessionLocal")
+def get_async_session_factory():
+    """主库异步会话工厂，未启用 DB_ASYNC 时返回 None"""
+    engine = get_async_engine()
+    return _async_session_factory(engine) if engine is not None else None
+
 
-# 创建数据库引擎
-engine = create_engine(
-    settings.database_url,
-    echo=settings.DEBUG,
-    pool_pre_ping=True,  # 检查连接有效性
-    pool_size=5,
-    max_overflow=10,
-    pool_recycle=3600,  # MySQL 连接回收时间
-)
+@_lazy("async_replica_engine")
+def get_async_replica_engine():
+    """只读副本异步引擎，未启用 DB_ASYNC 或未配置副本时返回 None"""
+    if not settings.DB_ASYNC or not settings.DATABASE_REPLICA_URL:
+        return None
+    return _create_async_engine(to_async_url(settings.DATABASE_REPLICA_URL), "async_replica")
+
+
+@_lazy("AsyncReplicaSessionLocal")
+def get_async_replica_session_factory():
+    """只读副本异步会话工厂，未启用 DB_ASYNC 或未配置副本时返回 None"""
+    engine = get_async_replica_engine()
+    return _async_session_factory(engine) if engine is not None else None
+
+
+def __getattr__(name: str):
+    """兼容 from app.database import engine, SessionLocal 等写法，首次访问时创建"""
+    getter = _lazy_attributes.get(name)
+    if getter is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getter()
+
+
+async def dispose_engines():
+    """释放已创建引擎的连接（应用关闭时调用）"""
+    for name in ("engine", "replica_engine", "async_engine", "async_replica_engine"):
+        engine = _instances.get(name)
+        if engine is None:
+            continue
+        result = engine.dispose()
+        if inspect.isawaitable(result):
+            await result
 
-# 创建会话工厂
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # 创建基类
 Base = declarative_base()
 
 
+@dataclass
+class SharedSessions:
+    """
+    批量请求（POST /api/batch）的各子请求共享的数据库会话和用户身份，由批量请求负责关闭会话
+
+    db 为主库会话（异步数据库模式下为 AsyncSession），read_db 为第一次需要时创建的副本会话
+    """
+    db: Any
+    principal: Any = None
+    read_db: Any = None
+
+
+# 当前请求所属批量请求的共享会话，不在批量请求中时为 None
+shared_sessions: ContextVar[Optional[SharedSessions]] = ContextVar("shared_sessions", default=None)
+
+
 def get_db():
     """
     数据库会话依赖
-    用于 FastAPI 依赖注入
+    用于 FastAPI 依赖注入；批量请求的子请求使用批量请求的会话
     """
-    db = SessionLocal()
+    shared = shared_sessions.get()
+    if shared is not None:
+        yield shared.db
+        return
+
+    db = get_session_factory()()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    """
+    异步数据库会话依赖
+    DB_ASYNC=true 时替代 get_db；批量请求的子请求使用批量请求的会话
+    """
+    shared = shared_sessions.get()
+    if shared is not None:
+        yield shared.db
+        return
+
+    session_factory = get_async_session_factory()
+    if session_factory is None:
+        raise RuntimeError("未启用异步数据库模式（DB_ASYNC=true）")
+    async with session_factory() as db:
+        yield db
+
+
+async def run_in_session(db, fn, *args):
+    """
+    在数据库会话上执行一段同步的数据库操作，同时兼容同步和异步模式
+
+    同步 Session 放到线程池执行；AsyncSession 通过 run_sync 在事件循环中执行，
+    等待数据库时不占用线程
+
+    Args:
+        db: Session 或 AsyncSession
+        fn: 同步函数，第一个参数为同步 Session
+        *args: 其它参数
+
+    Returns:
+        fn 的返回值
+    """
+    if isinstance(db, Session):
+        return await run_in_threadpool(fn, db, *args)
+    return await db.run_sync(fn, *args)
+
+
+def release_connection(session: Session) -> None:
+    """
+    结束会话当前的事务，把连接归还连接池（通过 run_in_session 调用）
+
+    用于等待密码哈希、接收上传数据等耗时操作之前；之后的查询会重新签出连接，
+    事务中加载的对象随之过期，需要的字段应提前取出
+    """
+    session.rollback()
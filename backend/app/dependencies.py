@@ -2,17 +2,55 @@
 依赖注入函数
 用于在路由中获取当前用户
 """
-from fastapi import Depends, HTTPException, status
+import hmac
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from jose import JWTError
 
-from app.database import get_db
+from app.config import settings
+from app import database
+from app.database import get_db, get_async_db
 from app.models import User
-from app.utils import decode_access_token
+from app.utils import decode_access_token, is_session_revoked, is_session_revoked_async, wrote_recently, TTLCache
+from app.logger import debug_sampled
+import logging
+
+logger = logging.getLogger(__name__)
 
 # HTTP Bearer 安全方案
 security = HTTPBearer()
+# 可选的 HTTP Bearer（未携带 Token 时不报错，用于登出等接口）
+optional_security = HTTPBearer(auto_error=False)
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    轻量的已认证用户身份
+    只包含路由常用的字段，可以跨请求缓存
+    """
+    id: str
+    username: str
+
+
+# 已认证用户身份缓存（按用户ID），多进程部署时各进程独立，由 TTL 限制数据陈旧时间
+principal_cache = TTLCache(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL)
+
+
+def invalidate_principal(user_id: str) -> None:
+    """
+    使用户身份缓存失效
+    修改用户信息、密码、头像后调用
+
+    Args:
+        user_id: 用户ID
+    """
+    principal_cache.delete(user_id)
 
 
 def get_current_user(
@@ -39,37 +77,313 @@ def get_current_user(
     )
 
     try:
-        # 验证 Token
-        token = credentials.credentials
-        print(f"[DEBUG] Token received: {token[:50] if len(token) > 50 else token}...", flush=True)
-
-        payload = decode_access_token(token)
+        # 验证 Token（不记录 Token 和 payload 内容）
+        payload = decode_access_token(credentials.credentials)
         if payload is None:
-            print(f"[DEBUG] Token decode failed", flush=True)
             raise credentials_exception
 
-        print(f"[DEBUG] Payload: {payload}", flush=True)
-
-        user_id_str = payload.get("sub")
-        if user_id_str is None:
-            print(f"[DEBUG] No sub in payload", flush=True)
+        # 所属会话已登出
+        if is_session_revoked(db, payload.get("sid")):
+            logger.debug("会话已吊销: sid=%s", payload.get("sid"))
             raise credentials_exception
 
-        print(f"[DEBUG] user_id from payload: {user_id_str} (type: {type(user_id_str).__name__})", flush=True)
-
         # user_id 现在就是 string 类型，直接使用
-        user_id = user_id_str
-        print(f"[DEBUG] user_id: {user_id}", flush=True)
+        user_id = payload.get("sub")
+        if user_id is None:
+            logger.debug("JWT payload 缺少 sub")
+            raise credentials_exception
 
         # 查询用户
         user = db.query(User).filter(User.id == user_id).first()
         if user is None:
-            print(f"[DEBUG] User not found in database for id={user_id}", flush=True)
+            logger.debug("用户不存在: id=%s", user_id)
             raise credentials_exception
 
-        print(f"[DEBUG] User found: {user.username}", flush=True)
         return user
 
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"[DEBUG] Exception in get_current_user: {type(e).__name__}: {e}", flush=True)
+        logger.warning("get_current_user 异常: %s", type(e).__name__)
+        raise credentials_exception
+
+
+def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """
+    获取当前登录用户的轻量身份
+
+    缓存命中时不查询数据库，适用于只需要用户ID的路由；
+    需要完整用户对象（如修改个人信息）时使用 get_current_user
+
+    Args:
+        credentials: HTTP Bearer Token
+        db: 数据库会话
+
+    Returns:
+        Principal: 当前用户身份
+
+    Raises:
+        HTTPException: 认证失败时抛出 401 错误
+    """
+    # 批量请求的子请求沿用批量请求已认证的身份
+    shared = database.shared_sessions.get()
+    if shared is not None and shared.principal is not None:
+        return shared.principal
+
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="无法验证凭据",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    payload = decode_access_token(credentials.credentials)
+    if payload is None or is_session_revoked(db, payload.get("sid")):
+        raise credentials_exception
+
+    user_id = payload.get("sub")
+    if user_id is None:
+        raise credentials_exception
+
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        debug_sampled(logger, "身份缓存命中: user_id=%s", user_id)
+        return principal
+
+    row = db.query(User.id, User.username).filter(User.id == user_id).first()
+    if row is None:
+        raise credentials_exception
+
+    principal = Principal(id=row.id, username=row.username)
+    principal_cache.set(user_id, principal)
+    return principal
+
+
+def get_optional_token_payload(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db: Session = Depends(get_db)
+) -> Optional[dict]:
+    """
+    获取访问令牌的 payload（可选）
+
+    未携带 Token、Token 无效或所属会话已吊销时返回 None，不抛出异常
+
+    Args:
+        credentials: HTTP Bearer Token
+        db: 数据库会话
+
+    Returns:
+        Optional[dict]: Token payload
+    """
+    if credentials is None:
+        return None
+    payload = decode_access_token(credentials.credentials)
+    if payload is None or is_session_revoked(db, payload.get("sid")):
+        return None
+    return payload
+
+
+async def get_optional_token_payload_async(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db=Depends(get_async_db)
+) -> Optional[dict]:
+    """
+    获取访问令牌的 payload（可选，异步数据库模式）
+
+    Args:
+        credentials: HTTP Bearer Token
+        db: 异步数据库会话
+
+    Returns:
+        Optional[dict]: Token payload
+    """
+    if credentials is None:
+        return None
+    payload = decode_access_token(credentials.credentials)
+    if payload is None or await is_session_revoked_async(db, payload.get("sid")):
+        return None
+    return payload
+
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db=Depends(get_async_db)
+) -> User:
+    """
+    获取当前登录用户（异步数据库模式）
+
+    Args:
+        credentials: HTTP Bearer Token
+        db: 异步数据库会话
+
+    Returns:
+        User: 当前用户对象（绑定在本次请求的会话上）
+
+    Raises:
+        HTTPException: 认证失败时抛出 401 错误
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="无法验证凭据",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    payload = decode_access_token(credentials.credentials)
+    if payload is None or await is_session_revoked_async(db, payload.get("sid")):
+        raise credentials_exception
+
+    user_id = payload.get("sub")
+    if user_id is None:
+        raise credentials_exception
+
+    user = await db.get(User, user_id)
+    if user is None:
+        logger.debug("用户不存在: id=%s", user_id)
+        raise credentials_exception
+    return user
+
+
+async def get_current_principal_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db=Depends(get_async_db)
+) -> Principal:
+    """
+    获取当前登录用户的轻量身份（异步数据库模式）
+
+    Args:
+        credentials: HTTP Bearer Token
+        db: 异步数据库会话
+
+    Returns:
+        Principal: 当前用户身份
+
+    Raises:
+        HTTPException: 认证失败时抛出 401 错误
+    """
+    shared = database.shared_sessions.get()
+    if shared is not None and shared.principal is not None:
+        return shared.principal
+
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="无法验证凭据",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    payload = decode_access_token(credentials.credentials)
+    if payload is None or await is_session_revoked_async(db, payload.get("sid")):
+        raise credentials_exception
+
+    user_id = payload.get("sub")
+    if user_id is None:
+        raise credentials_exception
+
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        debug_sampled(logger, "身份缓存命中: user_id=%s", user_id)
+        return principal
+
+    result = await db.execute(select(User.id, User.username).where(User.id == user_id))
+    row = result.first()
+    if row is None:
         raise credentials_exception
+
+    principal = Principal(id=row.id, username=row.username)
+    principal_cache.set(user_id, principal)
+    return principal
+
+
+def _reads_from_primary(credentials: Optional[HTTPAuthorizationCredentials]) -> bool:
+    """用户处于读己之写窗口内时从主库读取"""
+    if credentials is None:
+        return False
+    payload = decode_access_token(credentials.credentials)
+    user_id = payload.get("sub") if payload else None
+    return user_id is not None and wrote_recently(user_id)
+
+
+def get_read_db(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db: Session = Depends(get_db)
+):
+    """
+    只读数据库会话依赖
+
+    配置了 DATABASE_REPLICA_URL 时返回副本会话；未配置副本，
+    或当前用户在 READ_YOUR_WRITES_SECONDS 内写入过数据时，返回主库会话（与 get_db 为同一会话）
+
+    Args:
+        credentials: HTTP Bearer Token（用于识别用户）
+        db: 主库会话
+
+    Yields:
+        Session: 数据库会话
+    """
+    session_factory = database.get_replica_session_factory()
+    if session_factory is None or _reads_from_primary(credentials):
+        yield db
+        return
+
+    # 批量请求的子请求共用一个副本会话，由批量请求关闭
+    shared = database.shared_sessions.get()
+    if shared is not None:
+        if shared.read_db is None:
+            shared.read_db = session_factory()
+        yield shared.read_db
+        return
+
+    replica = session_factory()
+    try:
+        yield replica
+    finally:
+        replica.close()
+
+
+async def get_async_read_db(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db=Depends(get_async_db)
+):
+    """
+    只读数据库会话依赖（异步数据库模式），规则同 get_read_db
+
+    Args:
+        credentials: HTTP Bearer Token（用于识别用户）
+        db: 主库异步会话
+
+    Yields:
+        AsyncSession: 异步数据库会话
+    """
+    session_factory = database.get_async_replica_session_factory()
+    if session_factory is None or _reads_from_primary(credentials):
+        yield db
+        return
+
+    shared = database.shared_sessions.get()
+    if shared is not None:
+        if shared.read_db is None:
+            shared.read_db = session_factory()
+        yield shared.read_db
+        return
+
+    async with session_factory() as replica:
+        yield replica
+
+
+def verify_metrics_token(x_metrics_token: Optional[str] = Header(None)) -> None:
+    """
+    校验运维指标接口的访问令牌（见 Settings.HEALTH_METRICS_TOKEN）
+
+    Args:
+        x_metrics_token: X-Metrics-Token 请求头
+
+    Raises:
+        HTTPException: 未配置令牌时返回 404，令牌缺失或不匹配时返回 401
+    """
+    if not settings.HEALTH_METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if x_metrics_token is None or not hmac.compare_digest(
+        x_metrics_token.encode("utf-8"), settings.HEALTH_METRICS_TOKEN.encode("utf-8")
+    ):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="无效的指标访问令牌")
@@ -0,0 +1,11 @@
+"""
+中间件导入
+"""
+from app.middleware.request_id import RequestIdMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware, RateLimitRule, RateLimitStore, MemoryRateLimitStore
+from app.middleware.compression import CompressionMiddleware
+
+__all__ = [
+    "RequestIdMiddleware", "RateLimitMiddleware", "RateLimitRule", "RateLimitStore", "MemoryRateLimitStore",
+    "CompressionMiddleware",
+]
@@ -0,0 +1,214 @@
+"""
+响应压缩中间件
+按客户端的 Accept-Encoding 使用 brotli（已安装时）或 gzip 压缩响应体；
+小于阈值的响应和不在白名单中的内容类型不压缩，流式响应逐块压缩并立即刷新
+"""
+import zlib
+from typing import List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，未安装时只使用 gzip
+    brotli = None
+
+
+class GzipCompressor:
+    """gzip 流式压缩器"""
+
+    encoding = "gzip"
+
+    def __init__(self, level: int):
+        # wbits=31 生成带 gzip 头的数据
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        """压缩一块数据，并刷新已压缩的内容，保证客户端能立即解压"""
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        """压缩最后一块数据并结束压缩流"""
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor:
+    """brotli 流式压缩器"""
+
+    encoding = "br"
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+def available_encodings() -> List[str]:
+    """按配置的优先顺序返回可用的压缩算法"""
+    encodings = [e.strip() for e in settings.COMPRESSION_ALGORITHMS.split(",") if e.strip()]
+    return [e for e in encodings if e == "gzip" or (e == "br" and brotli is not None)]
+
+
+def make_compressor(encoding: str):
+    """
+    创建压缩器
+
+    Args:
+        encoding: gzip 或 br
+
+    Returns:
+        GzipCompressor 或 BrotliCompressor
+    """
+    if encoding == "br":
+        return BrotliCompressor(settings.COMPRESSION_BROTLI_QUALITY)
+    return GzipCompressor(settings.COMPRESSION_GZIP_LEVEL)
+
+
+def select_encoding(accept_encoding: str, encodings: List[str]) -> Optional[str]:
+    """
+    根据 Accept-Encoding 选择压缩算法
+
+    q 值最高的算法优先，q 值相同时按服务端的优先顺序；q=0 表示不接受
+
+    Args:
+        accept_encoding: Accept-Encoding 请求头
+        encodings: 服务端支持的算法（按优先顺序）
+
+    Returns:
+        Optional[str]: 选中的算法，客户端不接受任何算法时返回 None
+    """
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip()] = q
+
+    best: Optional[Tuple[float, int, str]] = None
+    for index, encoding in enumerate(encodings):
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > 0 and (best is None or (q, -index) > best[:2]):
+            best = (q, -index, encoding)
+    return best[2] if best else None
+
+
+class CompressionMiddleware:
+    """
+    响应压缩中间件
+    使用纯 ASGI 实现，普通响应整体压缩，流式响应逐块压缩
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: Optional[int] = None,
+        content_types: Optional[List[str]] = None
+    ):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MINIMUM_SIZE if minimum_size is None else minimum_size
+        if content_types is None:
+            content_types = settings.COMPRESSION_CONTENT_TYPES.split(",")
+        self.content_types = tuple(t.strip().lower() for t in content_types if t.strip())
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = select_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressingResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    def compressible(self, headers: Headers) -> bool:
+        """判断响应是否可以压缩：内容类型在白名单中，且未被压缩或禁止转换"""
+        if "content-encoding" in headers:
+            return False
+        if "no-transform" in headers.get("cache-control", "").lower():
+            return False
+        content_type = headers.get("content-type", "").lower()
+        return content_type.startswith(self.content_types)
+
+
+class _CompressingResponder:
+    """单个响应的压缩状态"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start_message: Optional[Message] = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def send(self, message: Message):
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            # 等到第一块响应体才能判断大小和是否为流式响应
+            self.start_message = message
+            # 206 的响应体是原始表示的一部分，不能单独压缩
+            if message["status"] < 200 or message["status"] in (204, 206, 304) or \
+                    not self.middleware.compressible(Headers(raw=message["headers"])):
+                self.passthrough = True
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body and len(body) < self.middleware.minimum_size:
+                # 小响应压缩收益低于 CPU 开销，原样返回
+                self.passthrough = True
+                await self._send(self.start_message)
+                await self._send(message)
+                return
+
+            self.compressor = make_compressor(self.encoding)
+            headers["Content-Encoding"] = self.encoding
+            # 压缩后的表示与原始表示不是逐字节相同，强 ETag 改为弱 ETag
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = "W/" + etag
+            if more_body:
+                # 流式响应：长度未知，逐块压缩
+                del headers["Content-Length"]
+            else:
+                body = self.compressor.finish(body)
+                headers["Content-Length"] = str(len(body))
+                await self._send(self.start_message)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            await self._send(self.start_message)
+
+        if more_body:
+            chunk = self.compressor.compress(body)
+            if chunk:
+                await self._send({"type": "http.response.body", "body": chunk, "more_body": True})
+        else:
+            await self._send({"type": "http.response.body", "body": self.compressor.finish(body)})
@@ -0,0 +1,277 @@
+"""
+限流与准入控制中间件
+按路由规则对每个用户（未登录时按客户端 IP）做令牌桶限流，超出时返回 429；
+规则可选限制进程内并发数，超出时返回 503
+"""
+import copy
+import functools
+import importlib
+import logging
+import math
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+from app.utils.jwt import decode_access_token
+
+logger = logging.getLogger(__name__)
+
+# scope 中处理当前请求的限流中间件，批量请求用它对在进程内分发的子请求逐个限流
+RATE_LIMITER_SCOPE_KEY = "app.rate_limiter"
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """
+    限流规则
+
+    Attributes:
+        methods: 匹配的 HTTP 方法，空元组表示全部方法
+        path_prefix: 匹配的路径前缀，* 匹配一个路径段（如 /api/notes/*/attachments/）
+        capacity: 令牌桶容量（允许的突发请求数）
+        period: 令牌桶从空到满所需的秒数，即每 period 秒最多 capacity 个请求
+        concurrency: 进程内同时处理的请求上限，None 表示不限制
+    """
+    methods: Tuple[str, ...]
+    path_prefix: str
+    capacity: int
+    period: float
+    concurrency: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        """规则名称，用于区分不同规则的令牌桶"""
+        return f"{','.join(self.methods) or '*'} {self.path_prefix}"
+
+    def matches(self, method: str, path: str) -> bool:
+        """判断请求是否匹配该规则"""
+        if self.methods and method not in self.methods:
+            return False
+        if "*" in self.path_prefix:
+            return _prefix_pattern(self.path_prefix).match(path) is not None
+        return path.startswith(self.path_prefix)
+
+
+@functools.lru_cache(maxsize=None)
+def _prefix_pattern(path_prefix: str) -> "re.Pattern":
+    """将带 * 的路径前缀编译为正则，* 匹配一个非空路径段"""
+    return re.compile("[^/]+".join(re.escape(part) for part in path_prefix.split("*")))
+
+
+def parse_rules(spec: str) -> List[RateLimitRule]:
+    """
+    解析限流规则配置
+
+    格式：规则之间用分号分隔，每条规则为 "方法 路径前缀=容量/秒数[@并发上限]"，
+    方法可以用逗号分隔多个，* 表示全部方法；路径前缀中的 * 匹配一个路径段。例如：
+    "POST /api/auth/login=10/60;GET /api/notes/search=30/60@8"
+
+    Args:
+        spec: 规则配置字符串
+
+    Returns:
+        List[RateLimitRule]: 规则列表，按配置顺序匹配，第一条匹配的规则生效
+
+    Raises:
+        ValueError: 配置格式错误
+    """
+    rules = []
+    for item in spec.split(";"):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            target, budget = item.rsplit("=", 1)
+            methods, path_prefix = target.split()
+            concurrency = None
+            if "@" in budget:
+                budget, concurrency = budget.split("@", 1)
+                concurrency = int(concurrency)
+            capacity, period = budget.split("/", 1)
+            rules.append(RateLimitRule(
+                methods=() if methods == "*" else tuple(m.strip().upper() for m in methods.split(",")),
+                path_prefix=path_prefix,
+                capacity=int(capacity),
+                period=float(period),
+                concurrency=concurrency,
+            ))
+        except ValueError:
+            raise ValueError(f"限流规则格式错误: {item!r}")
+    return rules
+
+
+class RateLimitStore(ABC):
+    """
+    令牌桶存储接口
+
+    多进程部署时可以实现基于共享存储（如 Redis）的版本，
+    通过 Settings.RATE_LIMIT_STORE 配置 "模块路径:类名" 加载
+    """
+
+    @abstractmethod
+    async def consume(self, key: str, capacity: int, period: float, cost: int = 1) -> float:
+        """
+        从令牌桶中取出令牌
+
+        Args:
+            key: 令牌桶键（规则 + 用户ID或IP）
+            capacity: 令牌桶容量
+            period: 令牌桶从空到满所需的秒数
+            cost: 本次消耗的令牌数
+
+        Returns:
+            float: 0 表示允许；否则为需要等待的秒数
+        """
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """
+    进程内令牌桶存储（默认）
+    键数量超过上限时淘汰最久未使用的令牌桶（相当于重置为满桶）
+    """
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def consume(self, key: str, capacity: int, period: float, cost: int = 1) -> float:
+        return self.consume_sync(key, capacity, period, cost)
+
+    def consume_sync(self, key: str, capacity: int, period: float, cost: int = 1) -> float:
+        """同步版本的 consume"""
+        rate = capacity / period
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (float(capacity), now))
+            tokens = min(float(capacity), tokens + (now - updated) * rate)
+            if tokens >= cost:
+                tokens -= cost
+                wait = 0.0
+            else:
+                wait = (cost - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+def load_store(path: str) -> RateLimitStore:
+    """
+    根据配置创建令牌桶存储
+
+    Args:
+        path: "memory" 或 "模块路径:类名"（无参构造）
+
+    Returns:
+        RateLimitStore: 令牌桶存储
+    """
+    if path == "memory":
+        return MemoryRateLimitStore(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+    module_name, _, class_name = path.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def _client_key(scope: Scope) -> str:
+    """返回限流键：已登录用户按用户ID，否则按客户端 IP"""
+    headers = dict(scope["headers"])
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    if authorization[:7].lower() == "bearer ":
+        # 与认证依赖共用已验证 Token 缓存，通常不会重复校验签名
+        payload = decode_access_token(authorization[7:])
+        if payload and payload.get("sub"):
+            return f"user:{payload['sub']}"
+
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = headers.get(b"x-forwarded-for")
+        if forwarded:
+            return "ip:" + forwarded.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimitMiddleware:
+    """
+    限流与准入控制中间件
+    使用纯 ASGI 实现，未匹配任何规则的请求直接放行
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        rules: Optional[List[RateLimitRule]] = None,
+        store: Optional[RateLimitStore] = None
+    ):
+        self.app = app
+        self.rules = parse_rules(settings.RATE_LIMIT_RULES) if rules is None else rules
+        self.store = store or load_store(settings.RATE_LIMIT_STORE)
+        self._in_flight: Dict[str, int] = {}
+
+    def wrap(self, app: ASGIApp) -> "RateLimitMiddleware":
+        """
+        返回包装 app 的限流中间件，与本实例共用规则、令牌桶存储和并发计数
+
+        Args:
+            app: 被包装的 ASGI 应用（如批量请求分发子请求用的路由）
+
+        Returns:
+            RateLimitMiddleware: 限流中间件
+        """
+        limiter = copy.copy(self)
+        limiter.app = app
+        return limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        scope[RATE_LIMITER_SCOPE_KEY] = self
+        method = scope["method"]
+        path = scope["path"]
+        rule = next((r for r in self.rules if r.matches(method, path)), None)
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = _client_key(scope)
+        wait = await self.store.consume(f"{rule.name}|{key}", rule.capacity, rule.period)
+        if wait > 0:
+            logger.info("请求被限流: rule=%s key=%s", rule.name, key)
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "请求过于频繁，请稍后重试"},
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+            await response(scope, receive, send)
+            return
+
+        if rule.concurrency is None:
+            await self.app(scope, receive, send)
+            return
+
+        # 准入控制：事件循环单线程内计数，无需加锁
+        in_flight = self._in_flight.get(rule.name, 0)
+        if in_flight >= rule.concurrency:
+            logger.info("并发已满，拒绝请求: rule=%s", rule.name)
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "服务繁忙，请稍后重试"},
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+
+        self._in_flight[rule.name] = in_flight + 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._in_flight[rule.name] -= 1
@@ -6,5 +6,10 @@ from app.models.user import User
 from app.models.category import Category
 from app.models.tag import Tag
 from app.models.note import Note, NoteTag
+from app.models.note_revision import NoteRevision
+from app.models.sync_change import SyncChange
+from app.models.user_session import UserSession
+from app.models.attachment import AttachmentBlob, NoteAttachment, AttachmentUpload
 
-__all__ = ["User", "Category", "Tag", "Note", "NoteTag"]
+__all__ = ["User", "Category", "Tag", "Note", "NoteTag", "NoteRevision", "SyncChange", "UserSession",
+           "AttachmentBlob", "NoteAttachment", "AttachmentUpload"]
@@ -0,0 +1,80 @@
+"""
+笔记附件模型
+"""
+from sqlalchemy import Column, String, ForeignKey, DateTime, Integer, BigInteger, Index
+from sqlalchemy.sql import func
+from app.database import Base
+import uuid
+
+
+class AttachmentBlob(Base):
+    """
+    附件内容表
+    按内容的 SHA-256 寻址，相同内容的附件（跨笔记、跨用户）只保存一份文件；
+    ref_count 为引用该内容的附件数，降为 0 后由垃圾回收删除记录和文件
+    """
+    __tablename__ = "attachment_blobs"
+    __table_args__ = (
+        Index("ix_attachment_blobs_ref_count", "ref_count"),
+    )
+
+    sha256 = Column(String(64), primary_key=True, comment="内容的 SHA-256（十六进制）")
+    size = Column(BigInteger, nullable=False, comment="文件大小（字节）")
+    ref_count = Column(Integer, nullable=False, default=0, comment="引用该内容的附件数")
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
+
+    def __repr__(self):
+        return f"<AttachmentBlob(sha256={self.sha256}, size={self.size}, ref_count={self.ref_count})>"
+
+
+class NoteAttachment(Base):
+    """
+    笔记附件表
+    记录附件的文件名和类型，内容保存在 attachment_blobs 中
+    """
+    __tablename__ = "note_attachments"
+    __table_args__ = (
+        Index("ix_note_attachments_note_id", "note_id"),
+    )
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), comment="附件ID")
+    note_id = Column(String(36), ForeignKey("notes.id", ondelete="CASCADE"), nullable=False, comment="笔记ID")
+    user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, comment="用户ID")
+    sha256 = Column(String(64), ForeignKey("attachment_blobs.sha256"), nullable=False, comment="内容的 SHA-256")
+    filename = Column(String(255), nullable=False, comment="文件名")
+    content_type = Column(String(100), nullable=False, comment="内容类型")
+    size = Column(BigInteger, nullable=False, comment="文件大小（字节）")
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
+
+    def __repr__(self):
+        return f"<NoteAttachment(id={self.id}, note_id={self.note_id}, filename='{self.filename}')>"
+
+
+class AttachmentUpload(Base):
+    """
+    附件上传会话表
+    大文件分多次请求上传，已接收的数据追加到临时文件，received 为已接收的字节数，
+    连接中断后客户端查询 received 从断点继续上传；过期未完成的会话由垃圾回收删除
+    """
+    __tablename__ = "attachment_uploads"
+    __table_args__ = (
+        Index("ix_attachment_uploads_expires_at", "expires_at"),
+    )
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), comment="上传会话ID")
+    note_id = Column(String(36), ForeignKey("notes.id", ondelete="CASCADE"), nullable=False, comment="笔记ID")
+    user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, comment="用户ID")
+    filename = Column(String(255), nullable=False, comment="文件名")
+    content_type = Column(String(100), nullable=False, comment="内容类型")
+    size = Column(BigInteger, nullable=False, comment="文件总大小（字节）")
+    sha256 = Column(String(64), nullable=True, comment="客户端声明的 SHA-256，完成时校验")
+    received = Column(BigInteger, nullable=False, default=0, comment="已接收的字节数")
+    expires_at = Column(DateTime, nullable=False, comment="过期时间（UTC）")
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), comment="更新时间")
+
+    def __repr__(self):
+        return f"<AttachmentUpload(id={self.id}, received={self.received}/{self.size})>"
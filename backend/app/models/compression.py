@@ -0,0 +1,66 @@
+"""
+笔记内容压缩编解码
+超过阈值的笔记内容以压缩后的二进制形式存储，首字节标识压缩算法
+"""
+import zlib
+from typing import Optional
+
+from app.config import settings
+
+try:
+    import zstandard
+except ImportError:  # zstd 为可选依赖，未安装时回退到 zlib
+    zstandard = None
+
+# 压缩数据的首字节标识
+ZLIB_MARKER = b"z"
+ZSTD_MARKER = b"s"
+
+
+def compress_text(text: Optional[str]) -> Optional[bytes]:
+    """
+    按配置压缩文本
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        Optional[bytes]: 压缩后的数据；未超过阈值或压缩无收益时返回 None
+    """
+    if text is None:
+        return None
+
+    raw = text.encode("utf-8")
+    if len(raw) < settings.NOTE_COMPRESSION_THRESHOLD:
+        return None
+
+    if settings.NOTE_COMPRESSION_ALGORITHM == "zstd" and zstandard is not None:
+        level = settings.NOTE_COMPRESSION_LEVEL
+        blob = ZSTD_MARKER + zstandard.ZstdCompressor(level=level).compress(raw)
+    else:
+        blob = ZLIB_MARKER + zlib.compress(raw, settings.NOTE_COMPRESSION_LEVEL)
+
+    return blob if len(blob) < len(raw) else None
+
+
+def decompress_text(blob: bytes) -> str:
+    """
+    解压 compress_text 生成的数据
+
+    Args:
+        blob: 压缩后的数据
+
+    Returns:
+        str: 原始文本
+
+    Raises:
+        ValueError: 未知的压缩格式
+    """
+    marker, payload = blob[:1], blob[1:]
+    if marker == ZLIB_MARKER:
+        return zlib.decompress(payload).decode("utf-8")
+    if marker == ZSTD_MARKER:
+        if zstandard is None:
+            raise ValueError("内容使用 zstd 压缩，但未安装 zstandard")
+        return zstandard.ZstdDecompressor().decompress(payload).decode("utf-8")
+    raise ValueError(f"未知的压缩格式: {marker!r}")
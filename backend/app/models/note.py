@@ -1,10 +1,13 @@
 """
 笔记模型
 """
-from sqlalchemy import Column, String, Text, ForeignKey, Boolean, DateTime, Integer
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Text, ForeignKey, Boolean, DateTime, Integer, LargeBinary
+from sqlalchemy.dialects.mysql import MEDIUMBLOB
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from app.database import Base
+from app.models.compression import compress_text, decompress_text
 import uuid
 
 
@@ -36,10 +39,20 @@ class Note(Base):
     user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, comment="用户ID")
     category_id = Column(String(36), ForeignKey("categories.id", ondelete="SET NULL"), nullable=True, comment="分类ID")
     title = Column(String(200), nullable=False, comment="笔记标题")
-    content = Column(Text, nullable=True, comment="笔记内容（支持Markdown）")
+
+    # 内容存储：小内容直接存 content 列，超过阈值的内容压缩后存 content_compressed 列
+    # 通过 content 属性透明读写，压缩内容在首次访问时才解压
+    # 压缩列延迟加载：只有需要返回内容的查询才通过 undefer 读取（见 note_load_options）
+    content_text = Column("content", Text, nullable=True, comment="笔记内容（支持Markdown）")
+    content_compressed = deferred(Column(
+        LargeBinary().with_variant(MEDIUMBLOB(), "mysql"),
+        nullable=True,
+        comment="压缩后的笔记内容"
+    ))
 
     is_favorite = Column(Boolean, default=False, comment="是否收藏")
     view_count = Column(Integer, default=0, comment="浏览次数")
+    version = Column(Integer, nullable=False, default=0, comment="内容版本号（等于最新的历史版本号）")
 
     created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), comment="更新时间")
@@ -48,6 +61,38 @@ class Note(Base):
     user = relationship("User", back_populates="notes")
     category = relationship("Category", back_populates="notes")
     tags = relationship("Tag", secondary="note_tags", back_populates="notes", viewonly=False)
+    # 附件和上传会话随笔记删除；由 ORM 逐条删除附件，以便递减内容的引用计数
+    attachments = relationship("NoteAttachment", cascade="all, delete-orphan")
+    attachment_uploads = relationship("AttachmentUpload", cascade="all, delete-orphan")
+
+    @hybrid_property
+    def content(self):
+        """笔记内容，压缩存储时在首次访问时解压并缓存"""
+        if self.content_compressed is None:
+            return self.content_text
+
+        cached = self.__dict__.get("_content_cache")
+        if cached is not None and cached[0] is self.content_compressed:
+            return cached[1]
+
+        text = decompress_text(self.content_compressed)
+        self.__dict__["_content_cache"] = (self.content_compressed, text)
+        return text
+
+    @content.setter
+    def content(self, value):
+        blob = compress_text(value)
+        if blob is None:
+            self.content_text = value
+            self.content_compressed = None
+        else:
+            self.content_text = None
+            self.content_compressed = blob
+
+    @content.expression
+    def content(cls):
+        # SQL 表达式中只能匹配未压缩的内容，压缩内容需要解压后匹配
+        return cls.content_text
 
     def __repr__(self):
         return f"<Note(id={self.id}, title='{self.title}', user_id={self.user_id})>"
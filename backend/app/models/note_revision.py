@@ -0,0 +1,72 @@
+"""
+笔记历史版本模型
+"""
+from sqlalchemy import Column, String, Text, ForeignKey, Boolean, DateTime, Integer, Index, LargeBinary
+from sqlalchemy.dialects.mysql import MEDIUMBLOB, MEDIUMTEXT
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import deferred
+from sqlalchemy.sql import func
+from app.database import Base
+from app.models.compression import compress_text, decompress_text
+import uuid
+
+
+class NoteRevision(Base):
+    """
+    笔记历史版本表
+    周期性保存完整快照，快照之间只保存相对上一版本的差异
+    """
+    __tablename__ = "note_revisions"
+    __table_args__ = (
+        Index("ix_note_revisions_note_revision", "note_id", "revision", unique=True),
+    )
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), comment="版本记录ID")
+    note_id = Column(String(36), ForeignKey("notes.id", ondelete="CASCADE"), nullable=False, comment="笔记ID")
+    user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, comment="用户ID")
+    revision = Column(Integer, nullable=False, comment="版本号（每篇笔记从1开始递增）")
+    base_revision = Column(Integer, nullable=False, comment="所属快照的版本号（快照为自身）")
+    is_snapshot = Column(Boolean, nullable=False, default=False, comment="是否为完整快照")
+    title = Column(String(200), nullable=False, comment="该版本的标题")
+    content_length = Column(Integer, nullable=False, default=0, comment="该版本内容长度（字符数）")
+
+    # 快照为完整内容，差异为 JSON 编码的操作列表；列出历史时不加载
+    # 与笔记内容相同：超过阈值的数据压缩后存 payload_compressed 列，通过 payload 属性透明读写
+    # MySQL 上使用 MEDIUMTEXT/MEDIUMBLOB，超过 64KB 的笔记也能保存快照
+    payload_text = deferred(Column(
+        "payload",
+        Text().with_variant(MEDIUMTEXT(), "mysql"),
+        nullable=True,
+        comment="快照内容或差异数据"
+    ))
+    payload_compressed = deferred(Column(
+        LargeBinary().with_variant(MEDIUMBLOB(), "mysql"),
+        nullable=True,
+        comment="压缩后的快照内容或差异数据"
+    ))
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
+
+    @hybrid_property
+    def payload(self):
+        """快照内容或差异数据，压缩存储时读取时解压"""
+        if self.payload_compressed is None:
+            return self.payload_text
+        return decompress_text(self.payload_compressed)
+
+    @payload.setter
+    def payload(self, value):
+        blob = compress_text(value)
+        if blob is None:
+            self.payload_text = value
+            self.payload_compressed = None
+        else:
+            self.payload_text = None
+            self.payload_compressed = blob
+
+    @payload.expression
+    def payload(cls):
+        return cls.payload_text
+
+    def __repr__(self):
+        return f"<NoteRevision(note_id={self.note_id}, revision={self.revision}, is_snapshot={self.is_snapshot})>"
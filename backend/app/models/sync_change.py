@@ -0,0 +1,32 @@
+"""
+同步变更记录模型
+"""
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Index
+from sqlalchemy.sql import func
+from app.database import Base
+import uuid
+
+
+class SyncChange(Base):
+    """
+    同步变更表
+    每个笔记、标签、分类只保留最近一次变更，删除操作保留为墓碑记录
+    seq 取自用户的数据版本号，按用户单调递增
+    """
+    __tablename__ = "sync_changes"
+    __table_args__ = (
+        Index("ix_sync_changes_entity", "entity_type", "entity_id", unique=True),
+        Index("ix_sync_changes_user_seq", "user_id", "seq"),
+    )
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), comment="记录ID")
+    user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, comment="用户ID")
+    seq = Column(Integer, nullable=False, comment="变更序号")
+    entity_type = Column(String(20), nullable=False, comment="实体类型：note/tag/category")
+    entity_id = Column(String(36), nullable=False, comment="实体ID")
+    operation = Column(String(10), nullable=False, comment="操作：upsert/delete")
+
+    changed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), comment="变更时间")
+
+    def __repr__(self):
+        return f"<SyncChange(seq={self.seq}, {self.entity_type}:{self.entity_id}, operation='{self.operation}')>"
@@ -1,7 +1,7 @@
 """
 用户模型
 """
-from sqlalchemy import Column, String, Text, DateTime, Boolean
+from sqlalchemy import Column, String, Text, DateTime, Boolean, Integer
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -25,6 +25,9 @@ class User(Base):
     theme_preference = Column(String(20), default="light", comment="主题偏好：light/dark")
     primary_color = Column(String(20), default="#1890ff", comment="主色调")
 
+    # 数据版本号：笔记、标签、分类变更时递增，用于 ETag 和缓存失效
+    data_version = Column(Integer, nullable=False, default=0, comment="数据版本号")
+
     created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), comment="更新时间")
 
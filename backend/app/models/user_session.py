@@ -0,0 +1,32 @@
+"""
+登录会话模型
+"""
+from sqlalchemy import Column, String, ForeignKey, DateTime, Index
+from sqlalchemy.sql import func
+from app.database import Base
+import uuid
+
+
+class UserSession(Base):
+    """
+    登录会话表
+    每次登录创建一个会话，保存当前刷新令牌的 SHA-256 摘要（不保存明文）；
+    刷新时轮换令牌，登出或修改密码时吊销会话
+    """
+    __tablename__ = "user_sessions"
+    __table_args__ = (
+        Index("ix_user_sessions_token_hash", "refresh_token_hash", unique=True),
+        Index("ix_user_sessions_user_id", "user_id"),
+    )
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()), comment="会话ID")
+    user_id = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, comment="用户ID")
+    refresh_token_hash = Column(String(64), nullable=False, comment="刷新令牌摘要")
+    expires_at = Column(DateTime, nullable=False, comment="刷新令牌过期时间（UTC）")
+    revoked_at = Column(DateTime, nullable=True, comment="吊销时间（UTC）")
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), comment="最近刷新时间")
+
+    def __repr__(self):
+        return f"<UserSession(id={self.id}, user_id={self.user_id}, revoked={self.revoked_at is not None})>"
@@ -0,0 +1,185 @@
+"""
+数据库连接池指标
+统计连接签出次数、等待时间分布和超时次数，用于根据数据调整连接池大小
+"""
+import threading
+import time
+from typing import Dict, List
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# 等待时间直方图的桶上限（毫秒），最后一个桶为 +Inf
+WAIT_BUCKETS_MS: List[float] = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+
+
+class PoolMetrics:
+    """
+    单个连接池的指标
+    计数在签出连接的线程中更新，使用锁保证一致
+    """
+
+    def __init__(self, name: str, max_overflow: int = 0):
+        self.name = name
+        self.max_overflow = max_overflow  # 创建连接池时的配置，连接池没有读取该值的公开接口
+        self.engine = None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """清空统计"""
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.connects = 0
+            self.invalidations = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+            self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def observe_wait(self, seconds: float, timed_out: bool = False) -> None:
+        """
+        记录一次签出等待
+
+        Args:
+            seconds: 等待时间（秒）
+            timed_out: 是否等待超时
+        """
+        ms = seconds * 1000
+        index = next((i for i, bound in enumerate(WAIT_BUCKETS_MS) if ms <= bound), len(WAIT_BUCKETS_MS))
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self.wait_buckets[index] += 1
+
+    def snapshot(self) -> Dict:
+        """
+        返回当前指标
+
+        Returns:
+            Dict: 连接池状态（大小、签出、溢出）和累计统计
+        """
+        pool = self.engine.pool if self.engine is not None else None
+        with self._lock:
+            observed = sum(self.wait_buckets)
+            data = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "wait_ms": {
+                    "mean": round(self.wait_total / observed * 1000, 3) if observed else 0.0,
+                    "max": round(self.wait_max * 1000, 3),
+                    # 累计直方图：le 为桶上限（毫秒）
+                    "histogram": [
+                        {"le": bound, "count": count}
+                        for bound, count in zip(
+                            [*WAIT_BUCKETS_MS, "+Inf"],
+                            _cumulative(self.wait_buckets)
+                        )
+                    ],
+                },
+            }
+        if isinstance(pool, QueuePool):
+            data.update({
+                "size": pool.size(),
+                "max_overflow": self.max_overflow,
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "timeout": pool.timeout(),
+            })
+        return data
+
+
+def _cumulative(counts: List[int]) -> List[int]:
+    """将各桶计数转换为累计计数"""
+    total = 0
+    result = []
+    for count in counts:
+        total += count
+        result.append(total)
+    return result
+
+
+# 按名称登记的连接池指标（sync / async）
+registry: Dict[str, PoolMetrics] = {}
+
+
+def metered_pool_class(pool_class, metrics: PoolMetrics):
+    """
+    生成在签出连接时统计等待时间和超时的连接池类
+
+    SQLAlchemy 的连接池事件只在签出成功后触发，无法得到等待时间，因此包装 _do_get；
+    指标挂在类上，engine.dispose() 重建连接池后仍然有效
+
+    Args:
+        pool_class: QueuePool 或 AsyncAdaptedQueuePool
+        metrics: 连接池指标
+
+    Returns:
+        连接池类
+    """
+
+    class MeteredPool(pool_class):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except PoolTimeoutError:
+                metrics.observe_wait(time.perf_counter() - start, timed_out=True)
+                raise
+            metrics.observe_wait(time.perf_counter() - start)
+            return connection
+
+    MeteredPool.__name__ = f"Metered{pool_class.__name__}"
+    return MeteredPool
+
+
+def instrument_engine(engine, metrics: PoolMetrics) -> PoolMetrics:
+    """
+    为引擎的连接池注册事件并登记指标
+
+    签出、新建、失效次数通过连接池事件统计；等待时间和超时由 metered_pool_class 统计
+
+    Args:
+        engine: Engine 或 AsyncEngine
+        metrics: 连接池指标
+
+    Returns:
+        PoolMetrics: 连接池指标
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+    metrics.engine = sync_engine
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        with metrics._lock:
+            metrics.checkouts += 1
+
+    def on_connect(dbapi_connection, connection_record):
+        with metrics._lock:
+            metrics.connects += 1
+
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        with metrics._lock:
+            metrics.invalidations += 1
+
+    event.listen(sync_engine.pool, "checkout", on_checkout)
+    event.listen(sync_engine.pool, "connect", on_connect)
+    event.listen(sync_engine.pool, "invalidate", on_invalidate)
+
+    registry[metrics.name] = metrics
+    return metrics
+
+
+def pool_status() -> Dict[str, Dict]:
+    """
+    返回所有已登记连接池的指标
+
+    Returns:
+        Dict[str, Dict]: 名称 → 指标
+    """
+    return {name: metrics.snapshot() for name, metrics in registry.items()}
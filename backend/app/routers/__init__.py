@@ -1,6 +1,6 @@
 """
 路由模块导入
 """
-from app.routers import auth, categories, tags, notes
+from app.routers import auth, categories, tags, notes, sync, attachments, events, batch
 
-__all__ = ["auth", "categories", "tags", "notes"]
+__all__ = ["auth", "categories", "tags", "notes", "sync", "attachments", "events", "batch"]
@@ -0,0 +1,162 @@
+"""
+异步数据库模式的路由
+由同步路由生成对应的异步路由（DB_ASYNC=true 时使用）
+
+同步处理函数通过 AsyncSession.run_sync 执行：函数体中的数据库操作由异步驱动完成，
+等待数据库时只挂起当前协程，不再占用 Starlette 线程池；业务逻辑只维护一份
+
+限制：run_sync 在事件循环线程中执行整个同步函数，数据库操作之外的 CPU 工作
+（解压笔记内容、计算差异、Markdown 渲染、响应序列化）同样在事件循环中运行，
+期间其它请求都要等待。处理大笔记或高并发渲染时，这部分耗时与同步模式的线程池不同，
+不能被其它请求分摊；以 CPU 工作为主的部署应使用同步模式（DB_ASYNC=false）
+"""
+import functools
+import inspect
+
+from fastapi import APIRouter, Depends, Response
+from fastapi.params import Depends as DependsParam
+from fastapi.routing import APIRoute
+
+from app.database import get_db, get_async_db
+from app.dependencies import (
+    get_current_user, get_current_principal, get_read_db, get_optional_token_payload,
+    get_current_user_async, get_current_principal_async, get_async_read_db, get_optional_token_payload_async,
+)
+from app.utils import json_response
+
+# 同步依赖 → 异步依赖
+ASYNC_DEPENDENCIES = {
+    get_db: get_async_db,
+    get_read_db: get_async_read_db,
+    get_current_user: get_current_user_async,
+    get_current_principal: get_current_principal_async,
+    get_optional_token_payload: get_optional_token_payload_async,
+}
+
+# 注入异步会话的依赖
+SESSION_DEPENDENCIES = (get_async_db, get_async_read_db)
+
+# 处理函数没有声明 db 参数时追加的会话参数名
+_SESSION_PARAM = "_async_db"
+
+
+def _async_signature(endpoint) -> inspect.Signature:
+    """替换签名中的同步依赖，返回新签名"""
+    signature = inspect.signature(endpoint)
+    parameters = []
+    for parameter in signature.parameters.values():
+        default = parameter.default
+        if isinstance(default, DependsParam) and default.dependency in ASYNC_DEPENDENCIES:
+            parameter = parameter.replace(default=Depends(ASYNC_DEPENDENCIES[default.dependency]))
+        parameters.append(parameter)
+    return signature.replace(parameters=parameters)
+
+
+def _session_params(signature: inspect.Signature) -> list:
+    """返回注入异步会话的参数名"""
+    return [
+        name for name, parameter in signature.parameters.items()
+        if isinstance(parameter.default, DependsParam) and parameter.default.dependency in SESSION_DEPENDENCIES
+    ]
+
+
+def to_async_endpoint(endpoint, response_model=None, status_code=None):
+    """
+    将处理函数转换为异步数据库模式的处理函数
+
+    - 同步函数：在 AsyncSession.run_sync 中以同步 Session 调用，并在同一上下文中
+      按响应模型序列化为 JSON 响应（避免在协程中触发延迟加载）；FastAPI 收到 Response
+      后不再按 response_model 校验，响应模型只转换一次
+    - 异步函数（数据库操作已通过 run_in_session 执行）：只替换依赖
+
+    Args:
+        endpoint: 原处理函数
+        response_model: 路由声明的响应模型
+        status_code: 路由声明的状态码
+
+    Returns:
+        异步处理函数
+    """
+    signature = _async_signature(endpoint)
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_endpoint(**kwargs):
+            return await endpoint(**kwargs)
+
+        async_endpoint.__signature__ = signature
+        return async_endpoint
+
+    session_params = _session_params(signature)
+    passes_session = bool(session_params)
+    if not passes_session:
+        session_params = [_SESSION_PARAM]
+        signature = signature.replace(parameters=[
+            *signature.parameters.values(),
+            inspect.Parameter(_SESSION_PARAM, inspect.Parameter.KEYWORD_ONLY, default=Depends(get_async_db)),
+        ])
+
+    @functools.wraps(endpoint)
+    async def sync_endpoint(**kwargs):
+        sessions = {name: kwargs.pop(name) for name in session_params}
+
+        def call(_):
+            # 在 run_sync 的上下文中，任意 AsyncSession 的同步会话都可以执行数据库操作
+            if passes_session:
+                kwargs.update({name: db.sync_session for name, db in sessions.items()})
+            result = endpoint(**kwargs)
+            if response_model is None or isinstance(result, Response):
+                return result
+
+            response = json_response(result, response_model)
+            # 与 FastAPI 相同，合并处理函数通过 response 参数设置的状态码和响应头（如 ETag）
+            sub_response = next((value for value in kwargs.values() if isinstance(value, Response)), None)
+            if sub_response is not None and sub_response.status_code:
+                response.status_code = sub_response.status_code
+            elif status_code is not None:
+                response.status_code = status_code
+            if sub_response is not None:
+                response.headers.raw.extend(sub_response.headers.raw)
+            return response
+
+        return await next(iter(sessions.values())).run_sync(call)
+
+    sync_endpoint.__signature__ = signature
+    return sync_endpoint
+
+
+def to_async_router(router: APIRouter) -> APIRouter:
+    """
+    由同步路由生成异步数据库模式的路由
+
+    Args:
+        router: 同步路由
+
+    Returns:
+        APIRouter: 路径、响应模型、状态码等与原路由一致的新路由
+    """
+    async_router = APIRouter()
+    for route in router.routes:
+        if not isinstance(route, APIRoute):
+            async_router.routes.append(route)
+            continue
+
+        async_router.add_api_route(
+            route.path,
+            to_async_endpoint(route.endpoint, route.response_model, route.status_code),
+            methods=list(route.methods),
+            response_model=route.response_model,
+            status_code=route.status_code,
+            tags=route.tags,
+            dependencies=route.dependencies,
+            summary=route.summary,
+            description=route.description,
+            response_description=route.response_description,
+            responses=route.responses,
+            deprecated=route.deprecated,
+            operation_id=route.operation_id,
+            include_in_schema=route.include_in_schema,
+            response_class=route.response_class,
+            name=route.name,
+        )
+    return async_router
@@ -0,0 +1,421 @@
+"""
+笔记附件路由
+分块断点续传、附件列表、下载（支持 Range 请求）和删除
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Request
+from fastapi.responses import FileResponse
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database import get_db, run_in_session, release_connection
+from app.models import Note, NoteAttachment, AttachmentUpload
+from app.schemas.attachment import (
+    AttachmentResponse, AttachmentListResponse, AttachmentUploadCreate, AttachmentUploadResponse,
+)
+from app.dependencies import Principal, get_current_principal
+from app.utils import etag_matches, not_modified, UploadRejected
+from app.utils import receive_chunk, lock_partial, hash_file, store_attachment, collect_garbage, blob_path
+from app.utils.attachments import partial_path
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["附件"])
+
+# 内容不变的附件下载的缓存控制头（附件ID对应的内容永远不变）
+ATTACHMENT_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+def _upload_expires_at() -> datetime:
+    return datetime.utcnow() + timedelta(hours=settings.ATTACHMENT_UPLOAD_EXPIRE_HOURS)
+
+
+def _upload_response(upload: AttachmentUpload) -> AttachmentUploadResponse:
+    """构建上传会话响应"""
+    return AttachmentUploadResponse(
+        id=upload.id,
+        note_id=upload.note_id,
+        filename=upload.filename,
+        size=upload.size,
+        offset=upload.received,
+        expires_at=upload.expires_at,
+    )
+
+
+def _check_note(db: Session, note_id: str, user_id: str) -> None:
+    """确认笔记存在且属于当前用户"""
+    exists = db.query(Note.id).filter(Note.id == note_id, Note.user_id == user_id).first()
+    if not exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="笔记不存在"
+        )
+
+
+def _get_upload(db: Session, note_id: str, upload_id: str, user_id: str) -> AttachmentUpload:
+    """查询未过期的上传会话"""
+    upload = db.query(AttachmentUpload).filter(
+        AttachmentUpload.id == upload_id,
+        AttachmentUpload.note_id == note_id,
+        AttachmentUpload.user_id == user_id,
+        AttachmentUpload.expires_at > datetime.utcnow()
+    ).first()
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="上传会话不存在或已过期"
+        )
+    return upload
+
+
+def _get_attachment(db: Session, note_id: str, attachment_id: str, user_id: str) -> NoteAttachment:
+    """查询附件"""
+    attachment = db.query(NoteAttachment).filter(
+        NoteAttachment.id == attachment_id,
+        NoteAttachment.note_id == note_id,
+        NoteAttachment.user_id == user_id
+    ).first()
+    if not attachment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="附件不存在"
+        )
+    return attachment
+
+
+@router.get("/{note_id}/attachments", response_model=AttachmentListResponse)
+def get_attachments(
+    note_id: str,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    获取笔记的附件列表
+
+    Args:
+        note_id: 笔记ID
+        current_user: 当前登录用户
+        db: 数据库会话
+
+    Returns:
+        AttachmentListResponse: 附件列表，按上传时间排序
+
+    Raises:
+        HTTPException: 笔记不存在或无权访问
+    """
+    _check_note(db, note_id, current_user.id)
+    attachments = db.query(NoteAttachment).filter(
+        NoteAttachment.note_id == note_id,
+        NoteAttachment.user_id == current_user.id
+    ).order_by(NoteAttachment.created_at).all()
+    return AttachmentListResponse(items=attachments, total=len(attachments))
+
+
+@router.post(
+    "/{note_id}/attachments/uploads",
+    response_model=AttachmentUploadResponse,
+    status_code=status.HTTP_201_CREATED
+)
+def create_attachment_upload(
+    note_id: str,
+    upload_data: AttachmentUploadCreate,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    创建附件上传会话
+
+    之后用 PATCH 分块上传数据，每块携带 Upload-Offset 请求头（已上传的字节数）；
+    中断后用 GET 查询已接收的字节数，从断点继续上传
+
+    Args:
+        note_id: 笔记ID
+        upload_data: 文件名、类型、大小和可选的 SHA-256
+        current_user: 当前登录用户
+        db: 数据库会话
+
+    Returns:
+        AttachmentUploadResponse: 上传会话
+
+    Raises:
+        HTTPException: 笔记不存在（404）或文件超过 MAX_UPLOAD_SIZE（413）
+    """
+    _check_note(db, note_id, current_user.id)
+    if upload_data.size > settings.MAX_UPLOAD_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"附件大小不能超过{settings.MAX_UPLOAD_SIZE // (1024 * 1024)}MB"
+        )
+
+    upload = AttachmentUpload(
+        note_id=note_id,
+        user_id=current_user.id,
+        filename=upload_data.filename,
+        content_type=upload_data.content_type,
+        size=upload_data.size,
+        sha256=upload_data.sha256.lower() if upload_data.sha256 else None,
+        received=0,
+        expires_at=_upload_expires_at(),
+    )
+    db.add(upload)
+    db.commit()
+    db.refresh(upload)
+    response = _upload_response(upload)
+
+    # 顺带清理过期的上传会话
+    collect_garbage(db)
+    return response
+
+
+@router.get("/{note_id}/attachments/uploads/{upload_id}", response_model=AttachmentUploadResponse)
+def get_attachment_upload(
+    note_id: str,
+    upload_id: str,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    查询上传进度（断点续传时获取 offset）
+
+    Args:
+        note_id: 笔记ID
+        upload_id: 上传会话ID
+        current_user: 当前登录用户
+        db: 数据库会话
+
+    Returns:
+        AttachmentUploadResponse: 上传会话
+
+    Raises:
+        HTTPException: 上传会话不存在或已过期
+    """
+    return _upload_response(_get_upload(db, note_id, upload_id, current_user.id))
+
+
+@router.patch(
+    "/{note_id}/attachments/uploads/{upload_id}",
+    response_model=AttachmentUploadResponse,
+    # 请求体由处理函数流式读取，在此声明供接口文档使用
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/octet-stream": {"schema": {"type": "string", "format": "binary"}}},
+        },
+    },
+)
+async def upload_attachment_chunk(
+    note_id: str,
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., ge=0, description="本块数据的起始位置，须等于已接收的字节数"),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    上传一块数据
+
+    请求体直接流式写入临时文件；客户端中途断开时保留已写入的数据。
+    写入前对临时文件加排他锁（多进程之间也互斥），同一上传会话的并发写入返回 409；
+    接收数据期间不占用数据库连接。
+    收到最后一块后校验哈希，移入内容存储（相同内容只保存一份）并创建附件
+
+    Args:
+        note_id: 笔记ID
+        upload_id: 上传会话ID
+        request: 请求（请求体为原始字节）
+        upload_offset: Upload-Offset 请求头
+        current_user: 当前登录用户
+        db: 数据库会话
+
+    Returns:
+        AttachmentUploadResponse: 上传会话，完成时包含创建的附件
+
+    Raises:
+        HTTPException: 上传会话不存在（404）、位置不一致或正在上传（409）、
+            数据超过文件大小（413）、哈希校验失败（422）
+    """
+    upload = await run_in_session(db, _get_upload, note_id, upload_id, current_user.id)
+    offset, size = upload.received, upload.size
+    if upload_offset != offset:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload-Offset 与已接收的字节数 {offset} 不一致",
+            headers={"Upload-Offset": str(offset)}
+        )
+    # 结束查询事务，流式接收请求体期间不占用数据库连接
+    await run_in_session(db, release_connection)
+
+    def received_bytes(session: Session) -> Optional[int]:
+        received = session.query(AttachmentUpload.received).filter(AttachmentUpload.id == upload_id).scalar()
+        release_connection(session)
+        return received
+
+    def save_progress(session: Session, written: int) -> int:
+        result = session.execute(
+            update(AttachmentUpload).where(
+                AttachmentUpload.id == upload_id,
+                AttachmentUpload.received == offset
+            ).values(received=offset + written, expires_at=_upload_expires_at())
+        )
+        session.commit()
+        return result.rowcount
+
+    try:
+        async with lock_partial(upload_id) as file:
+            # 取得锁后重新读取进度：其它请求可能在加锁前刚写入并保存了进度
+            received = await run_in_session(db, received_bytes)
+            if received is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="上传会话不存在或已过期"
+                )
+            if received != offset:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"Upload-Offset 与已接收的字节数 {received} 不一致",
+                    headers={"Upload-Offset": str(received)}
+                )
+
+            written, disconnected = await receive_chunk(request, file, offset, size - offset)
+
+            # 保存进度后才释放文件锁
+            if written and not await run_in_session(db, save_progress, written):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="上传会话已被修改，请查询进度后重试"
+                )
+            if disconnected:
+                logger.info(f"附件上传中断: upload={upload_id}, received={offset + written}/{size}")
+
+            upload = await run_in_session(db, _get_upload, note_id, upload_id, current_user.id)
+            if upload.received < upload.size or disconnected:
+                return _upload_response(upload)
+
+            # 已接收全部数据：计算哈希并移入内容存储（完成后上传会话被删除，先构建响应）
+            response = _upload_response(upload)
+            expected_sha256 = upload.sha256
+            await run_in_session(db, release_connection)
+            sha256 = await run_in_threadpool(hash_file, partial_path(upload_id))
+            if expected_sha256 and expected_sha256 != sha256:
+                def discard(session: Session):
+                    session.delete(upload)
+                    session.commit()
+
+                await run_in_session(db, discard)
+                logger.warning(f"附件哈希校验失败: upload={upload_id}, expected={expected_sha256}, actual={sha256}")
+                raise HTTPException(
+                    status_code=422,
+                    detail="文件校验失败，请重新上传"
+                )
+
+            attachment = await run_in_session(db, store_attachment, upload, sha256)
+            response.completed = True
+            response.attachment = AttachmentResponse.model_validate(attachment)
+            logger.info(f"附件上传完成: attachment={attachment.id}, size={response.size}, sha256={sha256}")
+            return response
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+
+@router.delete("/{note_id}/attachments/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+def cancel_attachment_upload(
+    note_id: str,
+    upload_id: str,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    取消上传，删除已接收的数据
+
+    Args:
+        note_id: 笔记ID
+        upload_id: 上传会话ID
+        current_user: 当前登录用户
+        db: 数据库会话
+
+    Raises:
+        HTTPException: 上传会话不存在或已过期
+    """
+    upload = _get_upload(db, note_id, upload_id, current_user.id)
+    db.delete(upload)
+    db.commit()
+    return None
+
+
+@router.get("/{note_id}/attachments/{attachment_id}")
+def download_attachment(
+    note_id: str,
+    attachment_id: str,
+    if_none_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    下载附件
+
+    文件按块流式发送，支持 Range 请求（断点续传、视频拖动）；ETag 为内容的 SHA-256
+
+    Args:
+        note_id: 笔记ID
+        attachment_id: 附件ID
+        if_none_match: If-None-Match 请求头
+        current_user: 当前登录用户
+        db: 数据库会话
+
+    Returns:
+        FileResponse: 附件内容（Range 请求返回 206）
+
+    Raises:
+        HTTPException: 附件不存在或无权访问
+    """
+    attachment = _get_attachment(db, note_id, attachment_id, current_user.id)
+    etag = f'"{attachment.sha256}"'
+    if etag_matches(if_none_match, etag):
+        response = not_modified(etag)
+        response.headers["Cache-Control"] = ATTACHMENT_CACHE_CONTROL
+        return response
+
+    path = blob_path(attachment.sha256)
+    if not path.exists():
+        logger.error(f"附件内容文件丢失: attachment={attachment.id}, sha256={attachment.sha256}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="附件内容不存在"
+        )
+
+    return FileResponse(
+        path,
+        media_type=attachment.content_type,
+        filename=attachment.filename,
+        headers={"ETag": etag, "Cache-Control": ATTACHMENT_CACHE_CONTROL},
+    )
+
+
+@router.delete("/{note_id}/attachments/{attachment_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_attachment(
+    note_id: str,
+    attachment_id: str,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    删除附件，内容不再被引用时删除文件
+
+    Args:
+        note_id: 笔记ID
+        attachment_id: 附件ID
+        current_user: 当前登录用户
+        db: 数据库会话
+
+    Raises:
+        HTTPException: 附件不存在或无权访问
+    """
+    attachment = _get_attachment(db, note_id, attachment_id, current_user.id)
+    db.delete(attachment)
+    db.commit()
+    collect_garbage(db)
+    return None
@@ -3,26 +3,67 @@
 用户注册、登录、登出、个人信息管理
 """
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from pathlib import Path
 from sqlalchemy.orm import Session
 from typing import Optional
 
-from app.database import get_db
-from app.models import User
-from app.schemas.user import UserCreate, UserUpdate, UserResponse, UserLogin, Token
-from app.utils import get_password_hash, verify_password, create_access_token
-from app.dependencies import get_current_user
+from app.database import get_db, run_in_session, release_connection
+from app.models import User, UserSession
+from app.schemas.user import UserCreate, UserUpdate, UserResponse, UserLogin, Token, RefreshRequest, LogoutRequest
+from app.schemas.user import AvatarUploadResponse
+from app.utils import (
+    create_access_token, password_needs_rehash,
+    verify_password_async, get_password_hash_async,
+    create_session, rotate_session, revoke_sessions, revoke_user_sessions,
+    receive_upload, UploadRejected, make_thumbnails_async, InvalidImage,
+)
+from app.utils.sessions import hash_refresh_token
+from app.dependencies import get_current_user, get_optional_token_payload, invalidate_principal
 from app.config import settings
-import os
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["认证"])
 
 
+def issue_tokens(user_id: str, username: str, session_id: str, refresh_token: str) -> Token:
+    """
+    签发访问令牌，与刷新令牌一起返回
+
+    Args:
+        user_id: 用户ID
+        username: 用户名
+        session_id: 会话ID，写入访问令牌的 sid，登出后据此使访问令牌失效
+        refresh_token: 刷新令牌明文
+
+    Returns:
+        Token: 令牌响应
+    """
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": str(user_id), "username": username, "sid": session_id},  # 将user.id转换为字符串
+        expires_delta=access_token_expires
+    )
+
+    return Token(
+        access_token=access_token,
+        token_type="bearer",
+        expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        refresh_token=refresh_token,
+        refresh_expires_in=settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600
+    )
+
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: Session = Depends(get_db)):
     """
     用户注册
 
+    密码哈希在专用线程池中执行，数据库操作通过 run_in_session 执行（同步模式在共享线程池中）；
+    哈希前结束查询事务，哈希期间不占用数据库连接
+
     Args:
         user: 用户创建数据
         db: 数据库会话
@@ -32,81 +73,145 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
 
     Raises:
         HTTPException: 用户名或邮箱已存在
+        PasswordHasherBusy: 密码哈希线程池已满（返回 503）
     """
-    # 检查用户名是否已存在
-    db_user = db.query(User).filter(User.username == user.username).first()
-    if db_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="用户名已存在"
-        )
-
-    # 检查邮箱是否已存在
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user:
+    def find_conflict(session: Session):
+        # 检查用户名是否已存在
+        if session.query(User.id).filter(User.username == user.username).first():
+            return "用户名已存在"
+        # 检查邮箱是否已存在
+        if session.query(User.id).filter(User.email == user.email).first():
+            return "邮箱已被注册"
+        return None
+
+    conflict = await run_in_session(db, find_conflict)
+    await run_in_session(db, release_connection)
+    if conflict:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="邮箱已被注册"
+            detail=conflict
         )
 
     # 创建新用户
-    hashed_password = get_password_hash(user.password)
-    db_user = User(
-        username=user.username,
-        email=user.email,
-        password_hash=hashed_password
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    hashed_password = await get_password_hash_async(user.password)
 
-    return db_user
+    def create_user(session: Session):
+        db_user = User(
+            username=user.username,
+            email=user.email,
+            password_hash=hashed_password
+        )
+        session.add(db_user)
+        session.commit()
+        session.refresh(db_user)
+        return db_user
+
+    return await run_in_session(db, create_user)
 
 
 @router.post("/login", response_model=Token)
-def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     """
     用户登录
 
+    密码校验在专用线程池中执行；若存储的哈希成本因子与 BCRYPT_ROUNDS 不一致，
+    校验成功后自动用当前成本因子重新哈希。
+    查询用户后立即结束事务并归还连接，校验通过后才开启写事务，登录高峰时 bcrypt 不占用连接池
+
     Args:
         user_credentials: 登录凭据
         db: 数据库会话
 
     Returns:
-        Token: JWT Token
+        Token: JWT 访问令牌和刷新令牌
 
     Raises:
         HTTPException: 用户名或密码错误
+        PasswordHasherBusy: 密码哈希线程池已满（返回 503）
     """
-    # 查找用户
-    user = db.query(User).filter(User.username == user_credentials.username).first()
+    def find_user(session: Session):
+        row = session.query(User.id, User.username, User.password_hash).filter(
+            User.username == user_credentials.username
+        ).first()
+        release_connection(session)
+        return row
+
+    # 查找用户（只取出需要的字段，随后结束事务）
+    user = await run_in_session(db, find_user)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="用户名或密码错误",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    user_id, username, password_hash = user
 
     # 验证密码
-    if not verify_password(user_credentials.password, user.password_hash):
+    if not await verify_password_async(user_credentials.password, password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="用户名或密码错误",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # 创建访问令牌
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": str(user.id), "username": user.username},  # 将user.id转换为字符串
-        expires_delta=access_token_expires
-    )
+    # 成本因子已调整时升级旧哈希
+    new_hash = None
+    if password_needs_rehash(password_hash):
+        new_hash = await get_password_hash_async(user_credentials.password)
 
-    return Token(
-        access_token=access_token,
-        token_type="bearer",
-        expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
-    )
+    # 创建登录会话（与哈希升级一起提交）
+    def start_session(session: Session):
+        if new_hash is not None:
+            session.query(User).filter(User.id == user_id).update(
+                {User.password_hash: new_hash}, synchronize_session=False
+            )
+        user_session, refresh_token = create_session(session, user_id)
+        session.commit()
+        return user_session.id, refresh_token
+
+    session_id, refresh_token = await run_in_session(db, start_session)
+    return issue_tokens(user_id, username, session_id, refresh_token)
+
+
+@router.post("/refresh", response_model=Token)
+def refresh(data: RefreshRequest, db: Session = Depends(get_db)):
+    """
+    刷新访问令牌
+
+    按刷新令牌摘要查找会话（索引查询，不校验密码），
+    签发新的访问令牌并轮换刷新令牌，旧刷新令牌随即失效
+
+    Args:
+        data: 刷新令牌
+        db: 数据库会话
+
+    Returns:
+        Token: 新的访问令牌和刷新令牌
+
+    Raises:
+        HTTPException: 刷新令牌无效、过期或会话已吊销
+    """
+    rotated = rotate_session(db, data.refresh_token)
+    if rotated is None:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="刷新令牌无效或已过期",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    user_session, refresh_token = rotated
+    username = db.query(User.username).filter(User.id == user_session.user_id).scalar()
+    if username is None:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="刷新令牌无效或已过期",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    db.commit()
+    return issue_tokens(user_session.user_id, username, user_session.id, refresh_token)
 
 
 @router.get("/profile", response_model=UserResponse)
@@ -152,33 +257,77 @@ def update_profile(
 
     db.commit()
     db.refresh(current_user)
+    invalidate_principal(current_user.id)
 
     return current_user
 
 
 @router.post("/logout")
-def logout():
+def logout(
+    data: Optional[LogoutRequest] = None,
+    payload: Optional[dict] = Depends(get_optional_token_payload),
+    db: Session = Depends(get_db)
+):
     """
     用户登出
 
-    由于使用 JWT 无状态认证，登出主要由前端处理（删除 Token）
-    此接口主要用于记录登出日志等操作
+    吊销访问令牌（sid）或请求体中刷新令牌所属的会话，会话的访问令牌在本进程内立即失效；
+    all_sessions 为真时吊销该用户的全部会话。未携带任何令牌时直接返回成功
+
+    Args:
+        data: 可选的刷新令牌和是否吊销全部会话
+        payload: 当前访问令牌的 payload
+        db: 数据库会话
+
+    Returns:
+        dict: 成功消息
     """
+    data = data or LogoutRequest()
+    user_sessions = []
+
+    if payload and payload.get("sid"):
+        user_session = db.query(UserSession).filter(
+            UserSession.id == payload["sid"],
+            UserSession.user_id == payload.get("sub"),
+        ).first()
+        if user_session:
+            user_sessions.append(user_session)
+
+    if data.refresh_token:
+        user_session = db.query(UserSession).filter(
+            UserSession.refresh_token_hash == hash_refresh_token(data.refresh_token)
+        ).first()
+        if user_session and user_session not in user_sessions:
+            user_sessions.append(user_session)
+
+    revoked = revoke_sessions(user_sessions)
+
+    user_id = payload.get("sub") if payload else None
+    if data.all_sessions and user_id:
+        revoked += revoke_user_sessions(db, user_id)
+
+    db.commit()
+    logger.info("用户登出，吊销会话 %d 个", revoked)
     return {"message": "登出成功"}
 
 
 @router.post("/change-password")
-def change_password(
+async def change_password(
     data: dict,
     current_user: User = Depends(get_current_user),
+    payload: Optional[dict] = Depends(get_optional_token_payload),
     db: Session = Depends(get_db)
 ):
     """
     修改密码
 
+    修改成功后吊销该用户除当前会话外的全部会话；
+    校验和哈希前结束认证查询的事务，哈希期间不占用数据库连接
+
     Args:
         data: 包含 old_password 和 new_password 的字典
         current_user: 当前登录用户
+        payload: 当前访问令牌的 payload
         db: 数据库会话
 
     Returns:
@@ -186,6 +335,7 @@ def change_password(
 
     Raises:
         HTTPException: 原密码错误
+        PasswordHasherBusy: 密码哈希线程池已满（返回 503）
     """
     old_password = data.get("old_password")
     new_password = data.get("new_password")
@@ -196,8 +346,12 @@ def change_password(
             detail="请提供原密码和新密码"
         )
 
+    # 取出需要的字段后归还连接（事务结束后 current_user 过期，不再访问）
+    user_id, password_hash = current_user.id, current_user.password_hash
+    await run_in_session(db, release_connection)
+
     # 验证原密码
-    if not verify_password(old_password, current_user.password_hash):
+    if not await verify_password_async(old_password, password_hash):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="原密码错误"
@@ -210,75 +364,97 @@ def change_password(
             detail="新密码长度至少6个字符"
         )
 
-    current_user.password_hash = get_password_hash(new_password)
-    db.commit()
-    db.refresh(current_user)
+    new_hash = await get_password_hash_async(new_password)
+
+    def save(session: Session):
+        session.query(User).filter(User.id == user_id).update(
+            {User.password_hash: new_hash}, synchronize_session=False
+        )
+        revoke_user_sessions(session, user_id, keep_session_id=payload.get("sid") if payload else None)
+        session.commit()
+
+    await run_in_session(db, save)
+    invalidate_principal(user_id)
 
     return {"message": "密码修改成功"}
 
 
-@router.post("/upload-avatar")
+@router.post(
+    "/upload-avatar",
+    response_model=AvatarUploadResponse,
+    # 请求体由处理函数流式解析，在此声明表单结构供接口文档使用
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": ["file"],
+                        "properties": {
+                            "file": {"type": "string", "format": "binary", "description": "头像文件"},
+                        },
+                    },
+                },
+            },
+        },
+    },
+)
 async def upload_avatar(
-    file: UploadFile = File(..., description="头像文件"),
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     上传头像
 
+    请求体流式写入磁盘，不整体读入内存，超过 AVATAR_MAX_SIZE 立即返回 413；
+    文件以内容的 SHA-256 命名，相同图片只保存一份，URL 可长期缓存。
+    缩略图在专用线程池中生成
+
     Args:
-        file: 上传的文件
+        request: 请求（multipart/form-data，文件字段名为 file）
         current_user: 当前登录用户
         db: 数据库会话
 
     Returns:
-        dict: 包含头像URL的响应
+        AvatarUploadResponse: 用户信息及头像缩略图URL
 
     Raises:
-        HTTPException: 文件类型或大小错误
+        HTTPException: 文件类型错误、不是有效的图片（400）或文件过大（413）
     """
-    # 验证文件类型
-    if not file.content_type or not file.content_type.startswith("image/"):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="只支持图片文件"
+    avatars_dir = Path(settings.UPLOAD_DIR) / "avatars"
+    try:
+        upload = await receive_upload(
+            request, "file", avatars_dir,
+            max_size=settings.AVATAR_MAX_SIZE,
+            content_types=settings.AVATAR_CONTENT_TYPES.split(","),
         )
-
-    # 验证文件大小（2MB限制）
-    file_content = await file.read()
-    if len(file_content) > 2 * 1024 * 1024:
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    sizes = [int(size) for size in settings.AVATAR_THUMBNAIL_SIZES.split(",") if size.strip()]
+    try:
+        thumbnails = await make_thumbnails_async(upload.path, sizes)
+    except InvalidImage as e:
+        logger.warning(f"头像不是有效的图片: user={current_user.id}, error={e}")
+        if not upload.deduplicated:
+            upload.path.unlink(missing_ok=True)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="图片大小不能超过2MB"
+            detail="不是有效的图片文件"
         )
 
-    # TODO: 实际项目中应该将文件上传到对象存储服务（如阿里云OSS、AWS S3等）
-    # 这里简化处理，返回一个假URL
-    # 实际使用时需要：
-    # 1. 将文件保存到服务器本地或云存储
-    # 2. 返回可访问的URL
-
-    # 简化方案：保存到本地uploads目录
-    uploads_dir = "uploads/avatars"
-    os.makedirs(uploads_dir, exist_ok=True)
-
-    # 生成唯一文件名
-    file_extension = file.filename.split(".")[-1] if "." in file.filename else "jpg"
-    unique_filename = f"avatar_{current_user.id}_{int(current_user.updated_at.timestamp())}.{file_extension}"
-    file_path = os.path.join(uploads_dir, unique_filename)
-
-    # 保存文件
-    with open(file_path, "wb") as f:
-        f.write(file_content)
+    # 更新用户头像
+    current_user.avatar = f"/uploads/avatars/{upload.path.name}"
 
-    # 返回访问URL
-    avatar_url = f"/uploads/avatars/{unique_filename}"
+    def save(session: Session):
+        session.commit()
+        session.refresh(current_user)
 
-    # 更新用户头像
-    current_user.avatar = avatar_url
-    db.commit()
-    db.refresh(current_user)
+    await run_in_session(db, save)
+    invalidate_principal(current_user.id)
 
-    # 返回完整的用户信息，包含 avatar_url
-    from app.schemas.user import UserResponse
-    return UserResponse.model_validate(current_user)
+    response = AvatarUploadResponse.model_validate(current_user)
+    response.avatar_thumbnails = {size: f"/uploads/avatars/{path.name}" for size, path in thumbnails.items()}
+    return response
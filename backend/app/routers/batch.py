@@ -0,0 +1,194 @@
+"""
+批量请求路由
+一次请求按顺序执行多个接口调用（如启动时的个人信息、标签、分类、笔记首页），
+子请求在进程内直接交给路由处理，共用一次认证和一个数据库会话
+"""
+import inspect
+import json
+import logging
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.middleware.asyncexitstack import AsyncExitStackMiddleware
+from sqlalchemy.orm import Session
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+from app.config import settings
+from app.database import get_db, run_in_session, shared_sessions, SharedSessions
+from app.dependencies import Principal, get_current_principal
+from app.middleware.rate_limit import RATE_LIMITER_SCOPE_KEY
+from app.schemas.batch import BatchRequest, BatchResponse, BatchSubRequest
+from app.utils import dump_json
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["批量请求"])
+
+# 不能作为子请求的接口：批量请求本身（避免嵌套）、长连接的事件流、
+# 认证接口（登录、注册等按 IP 或用户严格限流，不允许在一次请求中批量尝试）
+EXCLUDED_PATHS = ("/api/batch", "/api/events", "/api/auth")
+# 认证接口中允许批量执行的只读请求（启动时获取个人信息）
+ALLOWED_REQUESTS = {("GET", "/api/auth/profile")}
+
+# 子请求沿用的连接级 scope 字段（路由匹配结果等请求级字段不复制）
+_SCOPE_KEYS = (
+    "type", "asgi", "http_version", "scheme", "server", "client", "root_path",
+    "app", "state", "extensions", "starlette.exception_handlers",
+)
+
+# 不接受子请求自行指定的请求头
+_IGNORED_HEADERS = {"authorization", "content-length", "content-type", "host"}
+
+
+def _excluded(method: str, path: str) -> bool:
+    if (method, path) in ALLOWED_REQUESTS:
+        return False
+    return any(path == prefix or path.startswith(prefix + "/") for prefix in EXCLUDED_PATHS)
+
+
+def _rollback(db: Session) -> None:
+    db.rollback()
+
+
+async def _dispatch(request: Request, sub_request: BatchSubRequest) -> Dict[str, Any]:
+    """
+    在进程内执行一个子请求
+
+    Args:
+        request: 批量请求
+        sub_request: 子请求
+
+    Returns:
+        Dict[str, Any]: 状态码、响应头和 JSON 响应体
+    """
+    path, _, query = sub_request.path.partition("?")
+    body = b"" if sub_request.body is None else dump_json(sub_request.body)
+
+    headers = [
+        (name.lower().encode("latin-1"), value.encode("latin-1"))
+        for name, value in sub_request.headers.items()
+        if name.lower() not in _IGNORED_HEADERS
+    ]
+    headers.append((b"authorization", request.headers["authorization"].encode("latin-1")))
+    if body:
+        headers.append((b"content-type", b"application/json"))
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+
+    scope = {key: request.scope[key] for key in _SCOPE_KEYS if key in request.scope}
+    scope.update({
+        "method": sub_request.method,
+        "path": path,
+        "raw_path": path.encode("utf-8"),
+        "query_string": query.encode("utf-8"),
+        "headers": headers,
+    })
+
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # 请求体已读完，之后只会收到批量请求的断开通知
+        return await request.receive()
+
+    response: Dict[str, Any] = {"status": 500, "headers": [], "body": []}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+
+    # 与应用的中间件栈相同，路由需要 AsyncExitStackMiddleware 提供的退出栈（关闭上传文件等）
+    app = AsyncExitStackMiddleware(request.app.router)
+    limiter = request.scope.get(RATE_LIMITER_SCOPE_KEY)
+    if limiter is not None:
+        # 子请求按各自的方法和路径计入限流（与直接调用共用令牌桶），超出时该子请求返回 429
+        app = limiter.wrap(app)
+
+    try:
+        await app(scope, receive, send)
+    except StarletteHTTPException as e:
+        # 路由未匹配等在处理函数之外抛出的异常
+        return {"status": e.status_code, "headers": dict(e.headers or {}), "body": {"detail": e.detail}}
+
+    result_headers = {}
+    for name, value in response["headers"]:
+        name = name.decode("latin-1").lower()
+        if name != "content-length":
+            result_headers[name] = value.decode("latin-1")
+
+    content = b"".join(response["body"])
+    if not content:
+        result_body = None
+    elif result_headers.get("content-type", "").startswith("application/json"):
+        result_body = json.loads(content)
+    else:
+        result_body = content.decode("utf-8", errors="replace")
+    return {"status": response["status"], "headers": result_headers, "body": result_body}
+
+
+@router.post("", response_model=BatchResponse)
+async def run_batch(
+    batch: BatchRequest,
+    request: Request,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    批量执行接口调用
+
+    子请求按顺序执行，共用本次请求的认证结果和数据库会话（不再逐个解析令牌、查询用户、创建会话）；
+    每个子请求的状态码、响应头和响应体按顺序返回，单个子请求失败不影响其它子请求。
+    子请求与直接调用一样按各自的方法和路径限流；认证接口（获取个人信息除外）不能批量执行。
+    子请求失败（4xx/5xx）时回滚其未提交的修改；写接口在各自的处理函数中提交，不是一个整体事务
+
+    Args:
+        batch: 子请求列表
+        request: 请求对象
+        current_user: 当前登录用户
+        db: 数据库会话（异步数据库模式下为 AsyncSession）
+
+    Returns:
+        BatchResponse: 与子请求一一对应的结果
+
+    Raises:
+        HTTPException: 子请求数超过 BATCH_MAX_REQUESTS，或包含不支持批量执行的接口
+    """
+    if len(batch.requests) > settings.BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"一次最多执行{settings.BATCH_MAX_REQUESTS}个请求"
+        )
+    for sub_request in batch.requests:
+        if _excluded(sub_request.method, sub_request.path.partition("?")[0]):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"不支持批量执行: {sub_request.path}"
+            )
+
+    shared = SharedSessions(db=db, principal=current_user)
+    token = shared_sessions.set(shared)
+    results: List[Dict[str, Any]] = []
+    try:
+        for sub_request in batch.requests:
+            try:
+                result = await _dispatch(request, sub_request)
+            except Exception:
+                logger.exception("批量请求的子请求执行失败: %s %s", sub_request.method, sub_request.path)
+                result = {"status": 500, "headers": {}, "body": {"detail": "服务器内部错误"}}
+            if result["status"] >= 400:
+                # 丢弃失败的子请求未提交的修改，避免被后续子请求一起提交
+                await run_in_session(db, _rollback)
+            results.append(result)
+    finally:
+        shared_sessions.reset(token)
+        if shared.read_db is not None:
+            closed = shared.read_db.close()
+            if inspect.isawaitable(closed):
+                await closed
+
+    return Response(content=dump_json({"results": results}), media_type="application/json")
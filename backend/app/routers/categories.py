@@ -2,14 +2,16 @@
 分类相关路由
 分类的增删改查操作
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.database import get_db
-from app.models import Category, User, Note
+from app.models import Category, Note
 from app.schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse
-from app.dependencies import get_current_user
+from app.dependencies import Principal, get_current_principal, get_read_db
+from app.utils import make_etag, etag_matches, set_etag, not_modified, get_data_version
+from app.utils import get_cached_response, cache_response, collect_garbage
 
 router = APIRouter(tags=["分类"])
 
@@ -18,8 +20,9 @@ router = APIRouter(tags=["分类"])
 def get_categories(
     skip: int = Query(0, ge=0, description="跳过记录数"),
     limit: int = Query(100, ge=1, le=100, description="返回记录数"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    if_none_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_read_db)
 ):
     """
     获取分类列表
@@ -27,22 +30,37 @@ def get_categories(
     Args:
         skip: 跳过的记录数
         limit: 返回的记录数
+        if_none_match: If-None-Match 请求头
         current_user: 当前登录用户
-        db: 数据库会话
+        db: 只读数据库会话（副本或主库）
 
     Returns:
-        List[CategoryResponse]: 分类列表
+        List[CategoryResponse]: 分类列表，数据未变化时返回 304
     """
+    # 条件请求：数据版本未变化时直接返回 304
+    etag = make_etag("categories", current_user.id, get_data_version(db, current_user.id), skip, limit)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    # 响应缓存：键与 ETag 相同，数据版本变化后自动失效
+    cached = get_cached_response(etag)
+    if cached is not None:
+        set_etag(cached, etag)
+        return cached
+
     categories = db.query(Category).filter(
         Category.user_id == current_user.id
     ).offset(skip).limit(limit).all()
-    return categories
+
+    response = cache_response(etag, categories, List[CategoryResponse])
+    set_etag(response, etag)
+    return response
 
 
 @router.post("", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
 def create_category(
     category: CategoryCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -78,23 +96,31 @@ def create_category(
 @router.get("/{category_id}", response_model=CategoryResponse)
 def get_category(
     category_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_read_db)
 ):
     """
     获取分类详情
 
     Args:
         category_id: 分类ID
+        response: 响应对象，用于设置 ETag
+        if_none_match: If-None-Match 请求头
         current_user: 当前登录用户
-        db: 数据库会话
+        db: 只读数据库会话（副本或主库）
 
     Returns:
-        CategoryResponse: 分类详情
+        CategoryResponse: 分类详情，数据未变化时返回 304
 
     Raises:
         HTTPException: 分类不存在或无权访问
     """
+    etag = make_etag("category", category_id, current_user.id, get_data_version(db, current_user.id))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
     category = db.query(Category).filter(
         Category.id == category_id,
         Category.user_id == current_user.id
@@ -106,6 +132,7 @@ def get_category(
             detail="分类不存在"
         )
 
+    set_etag(response, etag)
     return category
 
 
@@ -113,7 +140,7 @@ def get_category(
 def update_category(
     category_id: str,
     category_update: CategoryUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -156,7 +183,7 @@ def update_category(
 @router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_category(
     category_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -181,7 +208,9 @@ def delete_category(
             detail="分类不存在"
         )
 
+    # 子分类和笔记由 ORM 级联删除，笔记的附件随之递减内容引用，提交后回收不再被引用的内容
     db.delete(category)
     db.commit()
+    collect_garbage(db)
 
     return None
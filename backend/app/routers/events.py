@@ -0,0 +1,109 @@
+"""
+变更事件流路由
+通过 Server-Sent Events 向客户端推送笔记、标签、分类的变更，代替轮询列表接口
+"""
+import functools
+import time
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database import get_session_factory
+from app.dependencies import security, get_current_principal
+from app.utils import decode_access_token, is_session_revoked, get_data_version, dump_json
+from app.utils.change_events import change_broker, OVERFLOW
+
+router = APIRouter(tags=["变更通知"])
+
+
+def _run_in_new_session(fn, *args):
+    """
+    在独立的短会话中执行数据库操作并立即关闭
+    事件流连接会保持很久，不能在整个连接期间占用连接池中的连接
+    """
+    db = get_session_factory()()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+def _format_event(event: str, data: dict, event_id=None) -> bytes:
+    """按 text/event-stream 格式编码一条事件"""
+    lines = b"" if event_id is None else f"id: {event_id}\n".encode()
+    return lines + f"event: {event}\n".encode() + b"data: " + dump_json(data) + b"\n\n"
+
+
+async def _event_stream(user_id: str, expires_at: float, session_id):
+    """
+    事件流：先订阅再读取数据版本，ready 事件中的令牌之后的变更都会推送，不会遗漏
+
+    访问令牌过期或会话登出后结束，客户端使用新令牌重连
+    """
+    subscription = change_broker.subscribe(user_id)
+    try:
+        token = await run_in_threadpool(_run_in_new_session, get_data_version, user_id)
+        yield _format_event("ready", {"token": token})
+
+        while True:
+            change = await subscription.get(settings.EVENTS_HEARTBEAT_SECONDS)
+            if time.time() >= expires_at:
+                break
+            # 会话状态有进程内缓存，通常不会查询数据库
+            if await run_in_threadpool(_run_in_new_session, is_session_revoked, session_id):
+                break
+            if change is None:
+                # 心跳（注释行），保持连接不被代理超时断开
+                yield b": ping\n\n"
+            elif change is OVERFLOW:
+                yield _format_event("overflow", {})
+            else:
+                yield _format_event("change", change, event_id=change["seq"])
+    finally:
+        change_broker.unsubscribe(subscription)
+
+
+@router.get(
+    "",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}, "description": "变更事件流"}}
+)
+async def change_events(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """
+    订阅当前用户的变更事件（Server-Sent Events）
+
+    事件类型：
+    - ready：连接建立，data 为 {"token": 当前同步令牌}，客户端从自己保存的令牌增量同步一次补齐断开期间的变更
+    - change：变更提交，data 为 {"type": note/tag/category, "id", "op": upsert/delete, "seq": 同步序号}
+    - overflow：客户端消费过慢，积压的变更已丢弃，需要增量同步补齐
+
+    每隔 EVENTS_HEARTBEAT_SECONDS 秒没有变更时发送一次心跳注释；浏览次数变化不推送
+
+    Args:
+        credentials: HTTP Bearer Token
+
+    Returns:
+        StreamingResponse: text/event-stream 响应
+
+    Raises:
+        HTTPException: 认证失败时抛出 401 错误
+    """
+    # 认证使用独立的短会话，事件流期间不占用数据库连接
+    principal = await run_in_threadpool(
+        _run_in_new_session, functools.partial(get_current_principal, credentials)
+    )
+    payload = decode_access_token(credentials.credentials)
+
+    return StreamingResponse(
+        _event_stream(principal.id, payload["exp"], payload.get("sid")),
+        media_type="text/event-stream",
+        headers={
+            # no-transform：不压缩，事件立即送达
+            "Cache-Control": "no-cache, no-transform",
+            # 关闭 Nginx 等反向代理的响应缓冲
+            "X-Accel-Buffering": "no",
+        },
+    )
@@ -2,18 +2,49 @@
 笔记相关路由
 笔记的增删改查和搜索操作
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Response
+from sqlalchemy.orm import Session, undefer
+from sqlalchemy import func, or_, update
+from typing import List, Optional, Tuple
 
+from app.config import settings
 from app.database import get_db
-from app.models import Note, User, Tag, Category
-from app.schemas.note import NoteCreate, NoteUpdate, NoteResponse, NoteListResponse, NoteSearchResponse
-from app.dependencies import get_current_user
+from app.models import Note, User, Tag, Category, NoteRevision
+from app.models.compression import decompress_text
+from app.schemas.note import NoteCreate, NoteUpdate, NoteResponse, NoteListResponse, NoteSearchResponse, NoteHtmlResponse
+from app.schemas.note import NoteBatchRequest, NoteBatchResponse
+from app.schemas.note import NoteContentPatch, NoteContentPatchResponse
+from app.schemas.revision import NoteRevisionDetailResponse, NoteRevisionListResponse
+from app.dependencies import Principal, get_current_principal, get_read_db
+from app.utils import make_etag, etag_matches, set_etag, not_modified, get_data_version
+from app.utils import get_cached_response, cache_response, json_response
+from app.utils import record_revision, ensure_initial_revision, reconstruct_revision, apply_text_edits
+from app.utils import collect_garbage, render_markdown, renderer_available, RenderedNote
+from app.utils import parse_fields, note_load_options, InvalidFields, NOTE_CONTENT_COLUMNS
 
 router = APIRouter(tags=["笔记"])
 
+FIELDS_DESCRIPTION = "只返回这些字段，逗号分隔（如 id,title,updated_at,tags），不指定时返回全部字段"
+
+# 搜索压缩笔记时每批取出解压的笔记数
+SEARCH_SCAN_BATCH_SIZE = 50
+
+
+def _parse_fields(fields: Optional[str], response_model=NoteResponse):
+    """
+    解析 fields 参数
+
+    Raises:
+        HTTPException: 包含未知字段
+    """
+    try:
+        return parse_fields(fields, response_model)
+    except InvalidFields as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
 
 @router.get("", response_model=NoteListResponse)
 def get_notes(
@@ -22,29 +53,54 @@ def get_notes(
     category_id: Optional[str] = Query(None, description="分类ID筛选"),
     tag_id: Optional[str] = Query(None, description="标签ID筛选"),
     is_favorite: Optional[bool] = Query(None, description="是否收藏筛选"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    if_none_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_read_db)
 ):
     """
     获取笔记列表（支持分页和筛选）
 
+    指定 fields 时只查询需要的列（不请求 content 时不读取内容，不请求 tags/tag_ids 时不连接标签表），
+    响应中每条笔记只包含这些字段
+
     Args:
         page: 页码
         page_size: 每页记录数
         category_id: 分类ID
         tag_id: 标签ID
         is_favorite: 是否收藏
+        fields: 返回的字段，逗号分隔
+        if_none_match: If-None-Match 请求头
         current_user: 当前登录用户
-        db: 数据库会话
+        db: 只读数据库会话（副本或主库）
 
     Returns:
-        NoteListResponse: 笔记列表
+        NoteListResponse: 笔记列表，数据未变化时返回 304
+
+    Raises:
+        HTTPException: fields 包含未知字段
     """
+    fields = _parse_fields(fields)
+
+    # 条件请求：数据版本未变化时直接返回 304
+    # 浏览次数不改变数据版本，列表中的 view_count 可能落后，因此使用弱 ETag
+    etag = make_etag(
+        "notes", current_user.id, get_data_version(db, current_user.id),
+        page, page_size, category_id, tag_id, is_favorite, fields and ",".join(fields),
+        weak=True
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    # 响应缓存：键与 ETag 相同，数据版本变化后自动失效
+    cached = get_cached_response(etag)
+    if cached is not None:
+        set_etag(cached, etag)
+        return cached
+
     # 构建查询
-    query = db.query(Note).options(
-        joinedload(Note.category),
-        joinedload(Note.tags)
-    ).filter(Note.user_id == current_user.id)
+    query = db.query(Note).filter(Note.user_id == current_user.id)
 
     # 应用筛选条件
     if category_id is not None:
@@ -54,63 +110,246 @@ def get_notes(
     if is_favorite is not None:
         query = query.filter(Note.is_favorite == is_favorite)
 
-    # 计算总数
-    total = query.count()
+    # 计算总数（只统计ID，不在子查询中列出内容列）
+    total = query.with_entities(func.count(Note.id)).scalar()
 
-    # 分页查询
+    # 分页查询（只加载字段集需要的列和关联）
     skip = (page - 1) * page_size
-    notes = query.order_by(Note.updated_at.desc()).offset(skip).limit(page_size).all()
+    notes = query.options(*note_load_options(fields)).order_by(
+        Note.updated_at.desc()
+    ).offset(skip).limit(page_size).all()
+
+    # 直接传入 ORM 对象，由响应模型统一校验一次（FAST_JSON 时跳过校验）
+    response = cache_response(etag, {
+        "items": notes,
+        "total": total,
+        "page": page,
+        "page_size": page_size
+    }, NoteListResponse, fields)
+    set_etag(response, etag)
+    return response
+
+
+def _search_compressed(db: Session, user_id: str, keyword: str) -> Tuple[List[str], bool]:
+    """
+    在压缩存储的笔记中查找内容包含关键词的笔记（标题已匹配的不再解压）
 
-    return NoteListResponse(
-        items=notes,
-        total=total,
-        page=page,
-        page_size=page_size
-    )
+    压缩内容无法在 SQL 中匹配，按更新时间从新到旧取出至多 NOTE_SEARCH_SCAN_LIMIT 篇，
+    分批解压后匹配（大小写不敏感），不额外保存明文
+
+    Args:
+        db: 数据库会话
+        user_id: 用户ID
+        keyword: 搜索关键词
+
+    Returns:
+        Tuple[List[str], bool]: 匹配的笔记ID，以及是否有压缩笔记超出扫描上限未参与匹配
+    """
+    limit = settings.NOTE_SEARCH_SCAN_LIMIT
+    candidate_ids = [row.id for row in db.query(Note.id).filter(
+        Note.user_id == user_id,
+        Note.content_compressed.isnot(None),
+        ~Note.title.like(f"%{keyword}%")
+    ).order_by(Note.updated_at.desc()).limit(limit + 1)]
+    truncated = len(candidate_ids) > limit
+    candidate_ids = candidate_ids[:limit]
+
+    keyword_lower = keyword.lower()
+    matched = []
+    for start in range(0, len(candidate_ids), SEARCH_SCAN_BATCH_SIZE):
+        batch = candidate_ids[start:start + SEARCH_SCAN_BATCH_SIZE]
+        for note_id, blob in db.query(Note.id, Note.content_compressed).filter(Note.id.in_(batch)):
+            if keyword_lower in decompress_text(blob).lower():
+                matched.append(note_id)
+    return matched, truncated
 
 
 @router.get("/search", response_model=NoteSearchResponse)
 def search_notes(
+    response: Response,
     keyword: str = Query(..., min_length=1, description="搜索关键词"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    if_none_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_read_db)
 ):
     """
     搜索笔记
 
     Args:
+        response: 响应对象，用于设置 ETag
         keyword: 搜索关键词
+        fields: 返回的字段，逗号分隔
+        if_none_match: If-None-Match 请求头
         current_user: 当前登录用户
-        db: 数据库会话
+        db: 只读数据库会话（副本或主库）
 
     Returns:
-        NoteSearchResponse: 搜索结果
+        NoteSearchResponse: 搜索结果，数据未变化时返回 304
+
+    Raises:
+        HTTPException: fields 包含未知字段
     """
-    # 构建搜索查询（在标题和内容中搜索）
-    query = db.query(Note).options(
-        joinedload(Note.category),
-        joinedload(Note.tags)
-    ).filter(
+    fields = _parse_fields(fields)
+
+    # 与笔记列表相同，view_count 不参与计算，使用弱 ETag
+    etag = make_etag(
+        "search", current_user.id, get_data_version(db, current_user.id), keyword, fields and ",".join(fields),
+        weak=True
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    # 压缩存储的内容先解压匹配（有扫描上限），其余在 SQL 中匹配标题和内容
+    compressed_ids, truncated = _search_compressed(db, current_user.id, keyword)
+
+    # 构建搜索查询（只加载字段集需要的列）
+    query = db.query(Note).options(*note_load_options(fields)).filter(
         Note.user_id == current_user.id,
         or_(
             Note.title.like(f"%{keyword}%"),
-            Note.content.like(f"%{keyword}%")
+            Note.content.like(f"%{keyword}%"),
+            Note.id.in_(compressed_ids)
         )
     )
 
     notes = query.order_by(Note.updated_at.desc()).all()
-    total = query.count()
+    total = len(notes)
+
+    if fields is not None or settings.FAST_JSON:
+        response = json_response(
+            {"results": notes, "total": total, "truncated": truncated}, NoteSearchResponse, fields
+        )
+        set_etag(response, etag)
+        return response
 
     return NoteSearchResponse(
         results=notes,
-        total=total
+        total=total,
+        truncated=truncated
     )
 
 
+def _get_notes_batch(
+    ids: List[str],
+    if_none_match: Optional[str],
+    current_user: Principal,
+    db: Session
+):
+    """
+    按ID批量获取笔记：一次 IN 查询，同时加载分类和标签
+
+    Args:
+        ids: 笔记ID列表（可包含逗号分隔的多个ID）
+        if_none_match: If-None-Match 请求头
+        current_user: 当前登录用户
+        db: 只读数据库会话
+
+    Returns:
+        Response: NoteBatchResponse，数据未变化时返回 304
+
+    Raises:
+        HTTPException: ID 数量超过 NOTE_BATCH_MAX_IDS
+    """
+    # 去重并保持请求顺序
+    ids = list(dict.fromkeys(
+        note_id.strip() for value in ids for note_id in value.split(",") if note_id.strip()
+    ))
+    if not ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="缺少笔记ID"
+        )
+    if len(ids) > settings.NOTE_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"一次最多获取{settings.NOTE_BATCH_MAX_IDS}篇笔记"
+        )
+
+    # 与笔记列表相同，view_count 不参与计算，使用弱 ETag
+    etag = make_etag("notes-batch", current_user.id, get_data_version(db, current_user.id), *ids, weak=True)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    cached = get_cached_response(etag)
+    if cached is not None:
+        set_etag(cached, etag)
+        return cached
+
+    notes = db.query(Note).options(*note_load_options(None)).filter(
+        Note.user_id == current_user.id,
+        Note.id.in_(ids)
+    ).all()
+    by_id = {note.id: note for note in notes}
+
+    response = cache_response(etag, {
+        "items": [
+            {"id": note_id, "status": "ok" if note_id in by_id else "not_found", "note": by_id.get(note_id)}
+            for note_id in ids
+        ]
+    }, NoteBatchResponse)
+    set_etag(response, etag)
+    return response
+
+
+@router.get("/batch", response_model=NoteBatchResponse)
+def get_notes_batch(
+    ids: List[str] = Query(..., description="笔记ID，逗号分隔或重复传参"),
+    if_none_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_read_db)
+):
+    """
+    批量获取笔记（如恢复多个标签页），一次请求代替多次获取详情
+
+    不存在或不属于当前用户的ID在对应条目中标记为 not_found；
+    与获取详情不同，批量获取不计入浏览次数，不需要写主库
+
+    Args:
+        ids: 笔记ID列表
+        if_none_match: If-None-Match 请求头
+        current_user: 当前登录用户
+        db: 只读数据库会话（副本或主库）
+
+    Returns:
+        NoteBatchResponse: 按请求顺序的笔记，数据未变化时返回 304
+
+    Raises:
+        HTTPException: ID 数量超过 NOTE_BATCH_MAX_IDS
+    """
+    return _get_notes_batch(ids, if_none_match, current_user, db)
+
+
+@router.post("/batch", response_model=NoteBatchResponse)
+def post_notes_batch(
+    batch: NoteBatchRequest,
+    if_none_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_read_db)
+):
+    """
+    批量获取笔记（ID 较多、URL 过长时使用），行为与 GET /batch 相同
+
+    Args:
+        batch: 笔记ID列表
+        if_none_match: If-None-Match 请求头
+        current_user: 当前登录用户
+        db: 只读数据库会话（副本或主库）
+
+    Returns:
+        NoteBatchResponse: 按请求顺序的笔记，数据未变化时返回 304
+
+    Raises:
+        HTTPException: ID 数量超过 NOTE_BATCH_MAX_IDS
+    """
+    return _get_notes_batch(batch.ids, if_none_match, current_user, db)
+
+
 @router.post("", response_model=NoteResponse, status_code=status.HTTP_201_CREATED)
 def create_note(
     note: NoteCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -143,72 +382,143 @@ def create_note(
         ).all()
         db_note.tags = tags
 
+    record_revision(db, db_note)
     db.commit()
 
     # 重新查询以获取完整的关联数据
-    db_note = db.query(Note).options(
-        joinedload(Note.category),
-        joinedload(Note.tags)
-    ).filter(Note.id == db_note.id).first()
+    db_note = db.query(Note).options(*note_load_options(None)).filter(Note.id == db_note.id).first()
 
     return db_note
 
 
-@router.get("/{note_id}", response_model=NoteResponse)
+@router.get(
+    "/{note_id}",
+    response_model=NoteResponse,
+    responses={200: {"description": "render=html 时返回 NoteHtmlResponse（多一个 content_html 字段）"}}
+)
 def get_note(
     note_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    render: Optional[str] = Query(None, pattern="^html$", description="html：同时返回服务端渲染的 HTML"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    if_none_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db)
 ):
     """
     获取笔记详情
 
+    ETag 由笔记ID、更新时间、浏览次数和用户数据版本（覆盖标签、分类改名）计算
+    命中 If-None-Match 时返回 304，不计入浏览次数；ETag 比对只查询只读会话，
+    需要返回内容时才在主库递增浏览次数（不递增数据版本号）
+    响应体按更新时间和数据版本缓存（不含浏览次数），命中时只替换为最新的浏览次数，
+    不再查询笔记、标签、分类，也不再解压和序列化内容
+    render=html 时附带渲染后的 HTML，渲染结果按内容哈希缓存，内容未变化时不会重复渲染
+    指定 fields 时只加载并返回这些字段（render=html 时可选 content_html）
+
     Args:
         note_id: 笔记ID
+        render: 为 html 时返回 NoteHtmlResponse
+        fields: 返回的字段，逗号分隔
+        if_none_match: If-None-Match 请求头
         current_user: 当前登录用户
         db: 数据库会话
+        read_db: 只读数据库会话（副本或主库）
 
     Returns:
         NoteResponse: 笔记详情
 
     Raises:
-        HTTPException: 笔记不存在或无权访问
+        HTTPException: 笔记不存在或无权访问（404），服务端未安装 Markdown 渲染器（501），
+            fields 包含未知字段（400）
     """
-    note = db.query(Note).options(
-        joinedload(Note.category),
-        joinedload(Note.tags)
-    ).filter(
+    if render and not renderer_available():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="服务端未启用 Markdown 渲染"
+        )
+    fields = _parse_fields(fields, NoteHtmlResponse if render else NoteResponse)
+
+    # 单次轻量查询获取计算 ETag 所需的字段
+    version_row = read_db.query(
+        Note.updated_at, Note.view_count, User.data_version
+    ).join(User, User.id == Note.user_id).filter(
         Note.id == note_id,
         Note.user_id == current_user.id
     ).first()
 
-    if not note:
+    if not version_row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="笔记不存在"
         )
 
-    # 增加浏览次数
-    note.view_count += 1
+    # 带 HTML 的表示、不同字段集的表示与普通表示的 ETag 不同
+    etag = make_etag(
+        "note", note_id, version_row.updated_at, version_row.view_count, version_row.data_version, render,
+        fields and ",".join(fields)
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    # 增加浏览次数：直接执行 UPDATE，不经过 ORM 的变更跟踪，因此不递增数据版本号（列表、标签、
+    # 分类的 ETag 和响应缓存保持有效）、不写入同步变更、不推送变更通知，也不触发读己之写窗口
+    # 显式写回 updated_at，避免触发 onupdate 修改笔记的更新时间
+    notes = Note.__table__
+    result = db.execute(
+        update(notes).where(
+            notes.c.id == note_id,
+            notes.c.user_id == current_user.id
+        ).values(
+            view_count=notes.c.view_count + 1,
+            updated_at=notes.c.updated_at
+        )
+    )
+    if result.rowcount == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="笔记不存在"
+        )
     db.commit()
 
-    # 重新查询以获取完整的关联数据
-    note = db.query(Note).options(
-        joinedload(Note.category),
-        joinedload(Note.tags)
-    ).filter(
-        Note.id == note_id,
-        Note.user_id == current_user.id
-    ).first()
+    # 主库上递增后的版本，用于 ETag 和缓存键
+    current = db.query(
+        Note.updated_at, Note.view_count, User.data_version
+    ).join(User, User.id == Note.user_id).filter(Note.id == note_id).first()
+    etag = make_etag(
+        "note", note_id, current.updated_at, current.view_count, current.data_version, render,
+        fields and ",".join(fields)
+    )
 
-    return note
+    # 响应缓存：键不含浏览次数，笔记、标签、分类未变化时复用响应体，只替换浏览次数
+    cache_key = make_etag(
+        "note-body", note_id, current.updated_at, current.data_version, render, fields and ",".join(fields)
+    )
+    response = get_cached_response(cache_key, {"view_count": current.view_count})
+    if response is None:
+        # 重新查询以获取完整的关联数据（指定字段集时只加载需要的列）
+        note = db.query(Note).options(
+            *note_load_options(fields, NOTE_CONTENT_COLUMNS if render else ())
+        ).filter(
+            Note.id == note_id,
+            Note.user_id == current_user.id
+        ).first()
+        if render:
+            response = cache_response(
+                cache_key, RenderedNote(note, render_markdown(note.content)), NoteHtmlResponse, fields
+            )
+        else:
+            response = cache_response(cache_key, note, NoteResponse, fields)
+
+    set_etag(response, etag)
+    return response
 
 
 @router.put("/{note_id}", response_model=NoteResponse)
 def update_note(
     note_id: str,
     note_update: NoteUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -226,10 +536,11 @@ def update_note(
     Raises:
         HTTPException: 笔记不存在或无权访问
     """
-    note = db.query(Note).filter(
+    # 锁定笔记行（与增量编辑相同），并发更新依次基于最新内容生成历史版本
+    note = db.query(Note).options(undefer(Note.content_compressed)).filter(
         Note.id == note_id,
         Note.user_id == current_user.id
-    ).first()
+    ).with_for_update().first()
 
     if not note:
         raise HTTPException(
@@ -237,12 +548,21 @@ def update_note(
             detail="笔记不存在"
         )
 
+    # 记录更新前的状态，用于生成历史版本
+    ensure_initial_revision(db, note)
+    previous_title = note.title
+    previous_content = note.content
+
     # 更新字段
     update_data = note_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         if field != "tag_ids":  # 暂时跳过 tag_ids
             setattr(note, field, value)
 
+    # 标题或内容有变化时保存新版本
+    if note.title != previous_title or note.content != previous_content:
+        record_revision(db, note, previous_content)
+
     # 更新标签关联
     if note_update.tag_ids is not None:
         tags = db.query(Tag).filter(
@@ -254,18 +574,168 @@ def update_note(
     db.commit()
 
     # 重新查询以获取完整的关联数据
-    note = db.query(Note).options(
-        joinedload(Note.category),
-        joinedload(Note.tags)
-    ).filter(Note.id == note_id).first()
+    note = db.query(Note).options(*note_load_options(None)).filter(Note.id == note_id).first()
 
     return note
 
 
+@router.patch("/{note_id}/content", response_model=NoteContentPatchResponse)
+def patch_note_content(
+    note_id: str,
+    patch: NoteContentPatch,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    增量更新笔记内容
+
+    客户端只提交相对 base_version 的编辑，适合大笔记的自动保存；
+    base_version 与当前版本不一致时拒绝更新，客户端需要重新拉取后再编辑
+
+    Args:
+        note_id: 笔记ID
+        patch: 基础版本号和编辑列表
+        current_user: 当前登录用户
+        db: 数据库会话
+
+    Returns:
+        NoteContentPatchResponse: 新的版本号和内容长度
+
+    Raises:
+        HTTPException: 笔记不存在、版本冲突或编辑无效
+    """
+    # 锁定笔记行，避免并发编辑基于同一版本相互覆盖
+    note = db.query(Note).options(undefer(Note.content_compressed)).filter(
+        Note.id == note_id,
+        Note.user_id == current_user.id
+    ).with_for_update().first()
+
+    if not note:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="笔记不存在"
+        )
+
+    if note.version != patch.base_version:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"笔记已被修改，当前版本为 {note.version}"
+        )
+
+    previous_content = note.content
+    try:
+        content = apply_text_edits(previous_content or "", patch.edits)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    if content != (previous_content or ""):
+        ensure_initial_revision(db, note)
+        note.content = content
+        record_revision(db, note, previous_content)
+        db.commit()
+
+    return NoteContentPatchResponse(
+        id=note.id,
+        version=note.version,
+        content_length=len(content),
+        updated_at=note.updated_at
+    )
+
+
+@router.get("/{note_id}/revisions", response_model=NoteRevisionListResponse)
+def get_note_revisions(
+    note_id: str,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    获取笔记的历史版本列表（不加载版本内容）
+
+    Args:
+        note_id: 笔记ID
+        current_user: 当前登录用户
+        db: 数据库会话
+
+    Returns:
+        NoteRevisionListResponse: 历史版本列表，按版本号倒序
+
+    Raises:
+        HTTPException: 笔记不存在或无权访问
+    """
+    revisions = db.query(NoteRevision).filter(
+        NoteRevision.note_id == note_id,
+        NoteRevision.user_id == current_user.id
+    ).order_by(NoteRevision.revision.desc()).all()
+
+    if not revisions:
+        exists = db.query(Note.id).filter(
+            Note.id == note_id,
+            Note.user_id == current_user.id
+        ).first()
+        if not exists:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="笔记不存在"
+            )
+
+    return NoteRevisionListResponse(
+        items=revisions,
+        total=len(revisions)
+    )
+
+
+@router.get("/{note_id}/revisions/{revision}", response_model=NoteRevisionDetailResponse)
+def get_note_revision(
+    note_id: str,
+    revision: int,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    获取笔记指定历史版本的内容
+
+    Args:
+        note_id: 笔记ID
+        revision: 版本号
+        current_user: 当前登录用户
+        db: 数据库会话
+
+    Returns:
+        NoteRevisionDetailResponse: 版本信息及还原后的内容
+
+    Raises:
+        HTTPException: 版本不存在或无权访问
+    """
+    db_revision = db.query(NoteRevision).filter(
+        NoteRevision.note_id == note_id,
+        NoteRevision.user_id == current_user.id,
+        NoteRevision.revision == revision
+    ).first()
+
+    if not db_revision:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="版本不存在"
+        )
+
+    return NoteRevisionDetailResponse(
+        note_id=note_id,
+        revision=db_revision.revision,
+        title=db_revision.title,
+        is_snapshot=db_revision.is_snapshot,
+        content_length=db_revision.content_length,
+        created_at=db_revision.created_at,
+        content=reconstruct_revision(db, note_id, revision)
+    )
+
+
 @router.delete("/{note_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_note(
     note_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -290,7 +760,9 @@ def delete_note(
             detail="笔记不存在"
         )
 
+    # 附件由 ORM 级联删除并递减内容引用，提交后回收不再被引用的内容
     db.delete(note)
     db.commit()
+    collect_garbage(db)
 
     return None
@@ -0,0 +1,189 @@
+"""
+增量同步路由
+客户端只拉取自上次同步以来新增、修改和删除的数据
+"""
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.database import get_db
+from app.models import Note, Tag, Category, SyncChange
+from app.schemas.sync import SyncDeletedItem, SyncResponse
+from app.dependencies import Principal, get_current_principal
+from app.utils import get_data_version, note_load_options
+from app.utils.change_tracking import OPERATION_DELETE
+
+router = APIRouter(tags=["同步"])
+
+# 全量同步的实体顺序：先分类、标签，再引用它们的笔记；每类按ID分页
+FULL_SYNC_ENTITIES = (("category", Category), ("tag", Tag), ("note", Note))
+
+
+def _parse_cursor(cursor: str):
+    """
+    解析全量同步游标 "<同步令牌>:<实体类型>:<上一页最后的ID>"
+
+    Raises:
+        HTTPException: 游标格式无效
+    """
+    token, _, rest = cursor.partition(":")
+    entity_type, separator, after_id = rest.partition(":")
+    if not token.isdigit() or not separator or entity_type not in dict(FULL_SYNC_ENTITIES):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="全量同步游标无效"
+        )
+    return int(token), entity_type, after_id or None
+
+
+def _full_sync(db: Session, user_id: str, limit: int, cursor: Optional[str]) -> SyncResponse:
+    """
+    分页全量同步
+
+    首页读取当前数据版本作为同步令牌，之后每页都返回同一个令牌；
+    分页期间发生的修改和删除序号都大于该令牌，客户端拉完全部页后用它增量同步即可补齐
+
+    Args:
+        db: 数据库会话
+        user_id: 用户ID
+        limit: 每页最多返回的实体数
+        cursor: 上一页返回的游标，首页为 None
+
+    Returns:
+        SyncResponse: 本页的分类、标签、笔记
+    """
+    if cursor is None:
+        token, start_type, after_id = get_data_version(db, user_id), FULL_SYNC_ENTITIES[0][0], None
+    else:
+        token, start_type, after_id = _parse_cursor(cursor)
+
+    page = {}
+    remaining = limit
+    next_cursor = None
+    started = False
+    for entity_type, model in FULL_SYNC_ENTITIES:
+        if not started:
+            if entity_type != start_type:
+                continue
+            started = True
+        else:
+            after_id = None
+
+        query = db.query(model).filter(model.user_id == user_id)
+        if model is Note:
+            query = query.options(*note_load_options(None))
+        if after_id is not None:
+            query = query.filter(model.id > after_id)
+        rows = query.order_by(model.id).limit(remaining + 1).all()
+
+        if len(rows) > remaining:
+            rows = rows[:remaining]
+            page[entity_type] = rows
+            next_cursor = f"{token}:{entity_type}:{rows[-1].id if rows else after_id or ''}"
+            break
+        page[entity_type] = rows
+        remaining -= len(rows)
+
+    return SyncResponse(
+        notes=page.get("note", []),
+        tags=page.get("tag", []),
+        categories=page.get("category", []),
+        next_token=token,
+        has_more=next_cursor is not None,
+        cursor=next_cursor,
+        full=True
+    )
+
+
+@router.get("", response_model=SyncResponse)
+def sync_changes(
+    since: Optional[int] = Query(None, ge=0, description="上次同步返回的 next_token，不传则全量同步"),
+    limit: int = Query(500, ge=1, le=1000, description="每次最多返回的变更数（全量同步时为实体数）"),
+    cursor: Optional[str] = Query(None, description="全量同步上一页返回的 cursor"),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    增量同步
+
+    不传 since 时全量同步，按分类、标签、笔记的顺序分页返回全部数据，has_more 为真时
+    传回 cursor 继续拉取，全部拉完后用 next_token 增量同步；传入 since 时按变更序号分页，
+    只返回序号大于 since 的新增/修改实体和删除墓碑，耗时与变更数量成正比
+
+    Args:
+        since: 上次同步返回的令牌
+        limit: 每页最多返回的变更数（全量同步时为实体数）
+        cursor: 全量同步的分页游标
+        current_user: 当前登录用户
+        db: 数据库会话
+
+    Returns:
+        SyncResponse: 变更数据和下一次同步的令牌
+
+    Raises:
+        HTTPException: 令牌无效，需要重新全量同步；全量同步游标无效
+    """
+    if since is None:
+        return _full_sync(db, current_user.id, limit, cursor)
+
+    # 先读取版本号再读取数据，保证令牌不会超前于返回的数据
+    current_version = get_data_version(db, current_user.id)
+
+    if since > current_version:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="同步令牌无效，请重新全量同步"
+        )
+
+    changes = db.query(SyncChange).filter(
+        SyncChange.user_id == current_user.id,
+        SyncChange.seq > since
+    ).order_by(SyncChange.seq).limit(limit + 1).all()
+
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    deleted = []
+    upserted = {"note": [], "tag": [], "category": []}
+    for change in changes:
+        if change.operation == OPERATION_DELETE:
+            deleted.append(SyncDeletedItem(type=change.entity_type, id=change.entity_id))
+        else:
+            upserted[change.entity_type].append(change.entity_id)
+
+    notes = []
+    if upserted["note"]:
+        notes = db.query(Note).options(*note_load_options(None)).filter(
+            Note.id.in_(upserted["note"]),
+            Note.user_id == current_user.id
+        ).all()
+
+    tags = []
+    if upserted["tag"]:
+        tags = db.query(Tag).filter(
+            Tag.id.in_(upserted["tag"]),
+            Tag.user_id == current_user.id
+        ).all()
+
+    categories = []
+    if upserted["category"]:
+        categories = db.query(Category).filter(
+            Category.id.in_(upserted["category"]),
+            Category.user_id == current_user.id
+        ).all()
+
+    # 读取变更记录后被删除的实体，按墓碑返回
+    found = {("note", n.id) for n in notes} | {("tag", t.id) for t in tags} | {("category", c.id) for c in categories}
+    for entity_type, entity_ids in upserted.items():
+        for entity_id in entity_ids:
+            if (entity_type, entity_id) not in found:
+                deleted.append(SyncDeletedItem(type=entity_type, id=entity_id))
+
+    return SyncResponse(
+        notes=notes,
+        tags=tags,
+        categories=categories,
+        deleted=deleted,
+        next_token=changes[-1].seq if changes else since,
+        has_more=has_more
+    )
@@ -2,14 +2,16 @@
 标签相关路由
 标签的增删改查操作
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.database import get_db
-from app.models import Tag, User
+from app.models import Tag
 from app.schemas.tag import TagCreate, TagUpdate, TagResponse
-from app.dependencies import get_current_user
+from app.dependencies import Principal, get_current_principal, get_read_db
+from app.utils import make_etag, etag_matches, set_etag, not_modified, get_data_version
+from app.utils import get_cached_response, cache_response
 
 router = APIRouter(tags=["标签"])
 
@@ -18,8 +20,9 @@ router = APIRouter(tags=["标签"])
 def get_tags(
     skip: int = Query(0, ge=0, description="跳过记录数"),
     limit: int = Query(100, ge=1, le=100, description="返回记录数"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    if_none_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_read_db)
 ):
     """
     获取标签列表
@@ -27,22 +30,37 @@ def get_tags(
     Args:
         skip: 跳过的记录数
         limit: 返回的记录数
+        if_none_match: If-None-Match 请求头
         current_user: 当前登录用户
-        db: 数据库会话
+        db: 只读数据库会话（副本或主库）
 
     Returns:
-        List[TagResponse]: 标签列表
+        List[TagResponse]: 标签列表，数据未变化时返回 304
     """
+    # 条件请求：数据版本未变化时直接返回 304
+    etag = make_etag("tags", current_user.id, get_data_version(db, current_user.id), skip, limit)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    # 响应缓存：键与 ETag 相同，数据版本变化后自动失效
+    cached = get_cached_response(etag)
+    if cached is not None:
+        set_etag(cached, etag)
+        return cached
+
     tags = db.query(Tag).filter(
         Tag.user_id == current_user.id
     ).offset(skip).limit(limit).all()
-    return tags
+
+    response = cache_response(etag, tags, List[TagResponse])
+    set_etag(response, etag)
+    return response
 
 
 @router.post("", response_model=TagResponse, status_code=status.HTTP_201_CREATED)
 def create_tag(
     tag: TagCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -81,23 +99,31 @@ def create_tag(
 @router.get("/{tag_id}", response_model=TagResponse)
 def get_tag(
     tag_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_read_db)
 ):
     """
     获取标签详情
 
     Args:
         tag_id: 标签ID
+        response: 响应对象，用于设置 ETag
+        if_none_match: If-None-Match 请求头
         current_user: 当前登录用户
-        db: 数据库会话
+        db: 只读数据库会话（副本或主库）
 
     Returns:
-        TagResponse: 标签详情
+        TagResponse: 标签详情，数据未变化时返回 304
 
     Raises:
         HTTPException: 标签不存在或无权访问
     """
+    etag = make_etag("tag", tag_id, current_user.id, get_data_version(db, current_user.id))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
     tag = db.query(Tag).filter(
         Tag.id == tag_id,
         Tag.user_id == current_user.id
@@ -109,6 +135,7 @@ def get_tag(
             detail="标签不存在"
         )
 
+    set_etag(response, etag)
     return tag
 
 
@@ -116,7 +143,7 @@ def get_tag(
 def update_tag(
     tag_id: str,
     tag_update: TagUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -159,7 +186,7 @@ def update_tag(
 @router.delete("/{tag_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_tag(
     tag_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -1,14 +1,30 @@
 """
 Pydantic schemas 导入
 """
-from app.schemas.user import UserCreate, UserUpdate, UserResponse, UserLogin, Token
+from app.schemas.user import UserCreate, UserUpdate, UserResponse, UserLogin, Token, RefreshRequest, LogoutRequest
+from app.schemas.user import AvatarUploadResponse
 from app.schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse
 from app.schemas.tag import TagCreate, TagUpdate, TagResponse
 from app.schemas.note import NoteCreate, NoteUpdate, NoteResponse, NoteListResponse, NoteSearchResponse
+from app.schemas.note import NoteHtmlResponse, NoteBatchRequest, NoteBatchItem, NoteBatchResponse
+from app.schemas.note import NoteContentEdit, NoteContentPatch, NoteContentPatchResponse
+from app.schemas.revision import NoteRevisionResponse, NoteRevisionDetailResponse, NoteRevisionListResponse
+from app.schemas.sync import SyncDeletedItem, SyncResponse
+from app.schemas.batch import BatchSubRequest, BatchRequest, BatchResult, BatchResponse
+from app.schemas.attachment import (
+    AttachmentResponse, AttachmentListResponse, AttachmentUploadCreate, AttachmentUploadResponse,
+)
 
 __all__ = [
-    "UserCreate", "UserUpdate", "UserResponse", "UserLogin", "Token",
+    "UserCreate", "UserUpdate", "UserResponse", "UserLogin", "Token", "RefreshRequest", "LogoutRequest",
+    "AvatarUploadResponse",
     "CategoryCreate", "CategoryUpdate", "CategoryResponse",
     "TagCreate", "TagUpdate", "TagResponse",
     "NoteCreate", "NoteUpdate", "NoteResponse", "NoteListResponse", "NoteSearchResponse",
+    "NoteHtmlResponse", "NoteBatchRequest", "NoteBatchItem", "NoteBatchResponse",
+    "NoteContentEdit", "NoteContentPatch", "NoteContentPatchResponse",
+    "NoteRevisionResponse", "NoteRevisionDetailResponse", "NoteRevisionListResponse",
+    "SyncDeletedItem", "SyncResponse",
+    "AttachmentResponse", "AttachmentListResponse", "AttachmentUploadCreate", "AttachmentUploadResponse",
+    "BatchSubRequest", "BatchRequest", "BatchResult", "BatchResponse",
 ]
@@ -0,0 +1,49 @@
+"""
+笔记附件相关的 Pydantic 模型
+"""
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import List, Optional
+
+
+class AttachmentResponse(BaseModel):
+    """附件响应模型"""
+    id: str
+    note_id: str
+    filename: str
+    content_type: str
+    size: int
+    sha256: str
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class AttachmentListResponse(BaseModel):
+    """附件列表响应模型"""
+    items: List[AttachmentResponse]
+    total: int
+
+
+class AttachmentUploadCreate(BaseModel):
+    """创建上传会话的请求模型"""
+    filename: str = Field(..., min_length=1, max_length=255, description="文件名")
+    content_type: str = Field("application/octet-stream", max_length=100, description="内容类型")
+    size: int = Field(..., ge=0, description="文件总大小（字节）")
+    sha256: Optional[str] = Field(
+        None, pattern=r"^[0-9a-fA-F]{64}$", description="文件的 SHA-256，上传完成时校验"
+    )
+
+
+class AttachmentUploadResponse(BaseModel):
+    """上传会话响应模型"""
+    id: str
+    note_id: str
+    filename: str
+    size: int
+    # 已接收的字节数，即下一块数据的写入位置（Upload-Offset）
+    offset: int
+    expires_at: datetime
+    completed: bool = False
+    # 上传完成时返回创建的附件
+    attachment: Optional[AttachmentResponse] = None
@@ -0,0 +1,30 @@
+"""
+批量请求相关的 Pydantic 模型
+"""
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Optional
+
+
+class BatchSubRequest(BaseModel):
+    """批量请求中的单个子请求"""
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"] = Field("GET", description="请求方法")
+    path: str = Field(..., pattern=r"^/api/", description="接口路径，可包含查询字符串（如 /api/notes?page=1）")
+    headers: Dict[str, str] = Field(default_factory=dict, description="附加请求头（如 If-None-Match），认证头沿用批量请求的")
+    body: Optional[Any] = Field(None, description="JSON 请求体")
+
+
+class BatchRequest(BaseModel):
+    """批量请求模型"""
+    requests: List[BatchSubRequest] = Field(..., min_length=1, description="按顺序执行的子请求")
+
+
+class BatchResult(BaseModel):
+    """单个子请求的结果"""
+    status: int
+    headers: Dict[str, str] = Field(default_factory=dict)
+    body: Optional[Any] = None
+
+
+class BatchResponse(BaseModel):
+    """批量请求响应模型（与子请求一一对应）"""
+    results: List[BatchResult]
@@ -3,7 +3,7 @@
 """
 from pydantic import BaseModel, Field, ConfigDict, computed_field
 from datetime import datetime
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Literal
 
 
 class NoteBase(BaseModel):
@@ -50,6 +50,7 @@ class NoteResponse(NoteBase):
     id: str
     user_id: str
     view_count: int
+    version: int = 0
     created_at: datetime
     updated_at: datetime
 
@@ -67,6 +68,37 @@ class NoteResponse(NoteBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class NoteHtmlResponse(NoteResponse):
+    """笔记响应模型（附带服务端渲染的 HTML，render=html 时返回）"""
+    content_html: str = Field("", description="渲染并清理后的 HTML")
+
+
+class NoteContentEdit(BaseModel):
+    """
+    单个文本编辑
+
+    offset 为相对基础版本内容的位置（按 Unicode 码点计数），
+    先删除 offset 处的 delete 个字符，再在该位置插入 insert
+    """
+    offset: int = Field(..., ge=0, description="编辑位置")
+    delete: int = Field(0, ge=0, description="删除的字符数")
+    insert: str = Field("", description="插入的文本")
+
+
+class NoteContentPatch(BaseModel):
+    """笔记内容增量更新模型"""
+    base_version: int = Field(..., ge=0, description="编辑所基于的内容版本号")
+    edits: List[NoteContentEdit] = Field(..., min_length=1, description="按 offset 升序排列且互不重叠的编辑列表")
+
+
+class NoteContentPatchResponse(BaseModel):
+    """笔记内容增量更新响应模型（不返回全文）"""
+    id: str
+    version: int
+    content_length: int
+    updated_at: datetime
+
+
 class NoteListResponse(BaseModel):
     """笔记列表响应模型"""
     items: List[NoteResponse]
@@ -75,7 +107,26 @@ class NoteListResponse(BaseModel):
     page_size: int
 
 
+class NoteBatchRequest(BaseModel):
+    """批量获取笔记请求模型"""
+    ids: List[str] = Field(..., min_length=1, description="笔记ID列表")
+
+
+class NoteBatchItem(BaseModel):
+    """批量获取笔记的单条结果"""
+    id: str
+    # ok：找到笔记；not_found：笔记不存在或不属于当前用户
+    status: Literal["ok", "not_found"]
+    note: Optional[NoteResponse] = None
+
+
+class NoteBatchResponse(BaseModel):
+    """批量获取笔记响应模型（按请求的顺序，重复的ID只返回一次）"""
+    items: List[NoteBatchItem]
+
+
 class NoteSearchResponse(BaseModel):
-    """笔记搜索响应模型"""
+    """笔记搜索响应模型（truncated 为真时，较早的压缩笔记超出扫描上限未参与匹配）"""
     results: List[NoteResponse]
     total: int
+    truncated: bool = False
@@ -0,0 +1,29 @@
+"""
+笔记历史版本相关的 Pydantic 模型
+"""
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List
+
+
+class NoteRevisionResponse(BaseModel):
+    """历史版本摘要模型（不含内容）"""
+    revision: int
+    title: str
+    is_snapshot: bool
+    content_length: int
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class NoteRevisionDetailResponse(NoteRevisionResponse):
+    """历史版本详情模型（包含还原后的内容）"""
+    note_id: str
+    content: str
+
+
+class NoteRevisionListResponse(BaseModel):
+    """历史版本列表响应模型"""
+    items: List[NoteRevisionResponse]
+    total: int
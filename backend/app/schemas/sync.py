@@ -0,0 +1,27 @@
+"""
+增量同步相关的 Pydantic 模型
+"""
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from app.schemas.note import NoteResponse
+from app.schemas.tag import TagResponse
+from app.schemas.category import CategoryResponse
+
+
+class SyncDeletedItem(BaseModel):
+    """墓碑记录：已删除的实体"""
+    type: str = Field(..., description="实体类型：note/tag/category")
+    id: str
+
+
+class SyncResponse(BaseModel):
+    """增量同步响应模型"""
+    notes: List[NoteResponse] = Field(default_factory=list)
+    tags: List[TagResponse] = Field(default_factory=list)
+    categories: List[CategoryResponse] = Field(default_factory=list)
+    deleted: List[SyncDeletedItem] = Field(default_factory=list)
+    next_token: int = Field(..., description="下次同步时作为 since 传入")
+    has_more: bool = Field(False, description="是否还有未返回的变更")
+    cursor: Optional[str] = Field(None, description="全量同步未完成时的游标，下次请求作为 cursor 传入")
+    full: bool = Field(False, description="是否为全量同步结果")
@@ -4,7 +4,7 @@
 """
 from pydantic import BaseModel, EmailStr, Field, computed_field
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 import os
 
 
@@ -52,6 +52,12 @@ class UserResponse(UserBase):
     model_config = {"from_attributes": True}
 
 
+class AvatarUploadResponse(UserResponse):
+    """上传头像响应模型"""
+    # 缩略图尺寸 → URL，未安装 Pillow 时为空
+    avatar_thumbnails: Dict[int, str] = {}
+
+
 class UserLogin(BaseModel):
     """用户登录模型"""
     username: str = Field(..., description="用户名")
@@ -63,3 +69,16 @@ class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
     expires_in: int
+    refresh_token: Optional[str] = Field(None, description="刷新令牌，每次刷新后轮换")
+    refresh_expires_in: Optional[int] = Field(None, description="刷新令牌有效期（秒）")
+
+
+class RefreshRequest(BaseModel):
+    """刷新令牌请求模型"""
+    refresh_token: str = Field(..., min_length=1, description="刷新令牌")
+
+
+class LogoutRequest(BaseModel):
+    """登出请求模型"""
+    refresh_token: Optional[str] = Field(None, description="要吊销的刷新令牌（可选）")
+    all_sessions: bool = Field(False, description="是否吊销该用户的全部会话")
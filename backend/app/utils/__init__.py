@@ -1,7 +1,44 @@
 """
 工具函数导入
 """
-from app.utils.security import verify_password, get_password_hash
+from app.utils.security import verify_password, get_password_hash, password_needs_rehash
+from app.utils.security import verify_password_async, get_password_hash_async, PasswordHasherBusy
 from app.utils.jwt import create_access_token, decode_access_token
+from app.utils.cache import TTLCache
+from app.utils.etag import make_etag, etag_matches, set_etag, not_modified
+from app.utils.data_version import get_data_version, bump_data_version
+from app.utils.revisions import record_revision, ensure_initial_revision, reconstruct_revision, apply_text_edits
+from app.utils.sessions import (
+    create_session, rotate_session, revoke_sessions, revoke_user_sessions,
+    is_session_revoked, is_session_revoked_async, load_revoked_sessions,
+)
+from app.utils.read_routing import wrote_recently
+from app.utils.serialization import serialize, json_response, dump_json
+from app.utils.response_cache import get_cached_response, cache_response, response_cache_stats
+from app.utils.uploads import receive_upload, UploadRejected, StoredUpload, CachedStaticFiles
+from app.utils.images import make_thumbnails, make_thumbnails_async, InvalidImage
+from app.utils.attachments import receive_chunk, lock_partial, hash_file, store_attachment, collect_garbage, blob_path
+from app.utils.rendering import render_markdown, render_cache_stats, renderer_available, RenderedNote, RendererUnavailable
+from app.utils.fieldsets import parse_fields, note_load_options, InvalidFields, NOTE_CONTENT_COLUMNS
+from app.utils.change_events import change_event_stats
+from app.utils import change_tracking  # noqa: F401  注册 flush 事件，跟踪数据变更
 
-__all__ = ["verify_password", "get_password_hash", "create_access_token", "decode_access_token"]
+__all__ = [
+    "verify_password", "get_password_hash", "create_access_token", "decode_access_token",
+    "password_needs_rehash", "verify_password_async", "get_password_hash_async", "PasswordHasherBusy",
+    "TTLCache",
+    "make_etag", "etag_matches", "set_etag", "not_modified",
+    "get_data_version", "bump_data_version",
+    "record_revision", "ensure_initial_revision", "reconstruct_revision", "apply_text_edits",
+    "create_session", "rotate_session", "revoke_sessions", "revoke_user_sessions",
+    "is_session_revoked", "is_session_revoked_async", "load_revoked_sessions",
+    "wrote_recently",
+    "serialize", "json_response", "dump_json",
+    "get_cached_response", "cache_response", "response_cache_stats",
+    "receive_upload", "UploadRejected", "StoredUpload", "CachedStaticFiles",
+    "make_thumbnails", "make_thumbnails_async", "InvalidImage",
+    "receive_chunk", "lock_partial", "hash_file", "store_attachment", "collect_garbage", "blob_path",
+    "render_markdown", "render_cache_stats", "renderer_available", "RenderedNote", "RendererUnavailable",
+    "parse_fields", "note_load_options", "InvalidFields", "NOTE_CONTENT_COLUMNS",
+    "change_event_stats",
+]
@@ -0,0 +1,273 @@
+"""
+笔记附件存储
+附件内容按 SHA-256 保存在 ATTACHMENT_DIR/blobs 下，相同内容只保存一份；
+分块上传的数据先追加到 ATTACHMENT_DIR/partial 下的临时文件，全部接收后计算哈希并移入内容存储。
+数据始终按块流式读写，不会整体读入内存；写入临时文件前对其加排他文件锁，多进程部署时同一上传会话同时只有一个请求写入
+
+引用计数在每次 flush 后按新增、删除的附件更新（与 change_tracking 相同的 after_flush 事件）；
+计数降为 0 的内容由 collect_garbage 删除记录和文件
+"""
+import os
+import hashlib
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Dict
+
+from sqlalchemy import delete, event, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect, Request
+
+from app.config import settings
+from app.models import AttachmentBlob, NoteAttachment, AttachmentUpload
+from app.utils.uploads import UploadRejected
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，退化为进程内互斥
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 计算哈希时每次读取的字节数
+_READ_SIZE = 1024 * 1024
+
+# session.info 中记录待删除临时文件的键（提交后删除）
+_PARTIALS_KEY = "attachment_partials_to_remove"
+
+# 没有 fcntl 时正在写入的上传会话（只能在进程内互斥）
+_locked_uploads = set()
+
+
+def blob_path(sha256: str) -> Path:
+    """返回内容文件的路径（按哈希前缀分两级目录，避免单个目录文件过多）"""
+    return Path(settings.ATTACHMENT_DIR) / "blobs" / sha256[:2] / sha256[2:4] / sha256
+
+
+def partial_path(upload_id: str) -> Path:
+    """返回上传会话临时文件的路径"""
+    return Path(settings.ATTACHMENT_DIR) / "partial" / upload_id
+
+
+def _lock_partial(upload_id: str) -> BinaryIO:
+    """打开（必要时创建）临时文件并加排他锁，不截断已有数据；已被其它请求锁定时拒绝"""
+    path = partial_path(upload_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if fcntl is None:
+        if upload_id in _locked_uploads:
+            raise UploadRejected(409, "该上传会话正在接收数据")
+        _locked_uploads.add(upload_id)
+
+    file = os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), "r+b")
+    if fcntl is not None:
+        try:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            file.close()
+            raise UploadRejected(409, "该上传会话正在接收数据")
+    return file
+
+
+def _unlock_partial(upload_id: str, file: BinaryIO) -> None:
+    """关闭临时文件（同时释放文件锁）"""
+    file.close()
+    _locked_uploads.discard(upload_id)
+
+
+@asynccontextmanager
+async def lock_partial(upload_id: str):
+    """
+    锁定上传会话的临时文件，期间其它请求（包括其它进程）写入同一会话时返回 409
+
+    锁在退出时释放，调用方应在保存进度之后再退出，避免其它请求按旧进度截断已写入的数据
+
+    Args:
+        upload_id: 上传会话ID
+
+    Yields:
+        BinaryIO: 已加锁的临时文件
+
+    Raises:
+        UploadRejected: 临时文件已被其它请求锁定（409）
+    """
+    file = await run_in_threadpool(_lock_partial, upload_id)
+    try:
+        yield file
+    finally:
+        await run_in_threadpool(_unlock_partial, upload_id, file)
+
+
+def _seek_to(file: BinaryIO, offset: int) -> None:
+    """定位到 offset，丢弃 offset 之后未确认的数据"""
+    if os.fstat(file.fileno()).st_size < offset:
+        raise UploadRejected(409, "已上传的数据丢失，请重新上传")
+    file.truncate(offset)
+    file.seek(offset)
+
+
+async def receive_chunk(request: Request, file: BinaryIO, offset: int, limit: int) -> tuple:
+    """
+    将请求体流式追加到上传会话的临时文件
+
+    客户端中途断开时保留已写入的数据，客户端查询进度后从断点继续上传
+
+    Args:
+        request: 请求（请求体为原始字节）
+        file: 由 lock_partial 锁定的临时文件
+        offset: 写入位置（已确认接收的字节数）
+        limit: 本次最多接收的字节数（文件剩余大小）
+
+    Returns:
+        tuple: (本次写入的字节数, 客户端是否中途断开)
+
+    Raises:
+        UploadRejected: 数据超过文件大小（413）或已上传的数据丢失（409）
+    """
+    await run_in_threadpool(_seek_to, file, offset)
+    written = 0
+    disconnected = False
+    try:
+        async for chunk in request.stream():
+            if not chunk:
+                continue
+            if written + len(chunk) > limit:
+                raise UploadRejected(413, "上传的数据超过声明的文件大小")
+            await run_in_threadpool(file.write, chunk)
+            written += len(chunk)
+    except ClientDisconnect:
+        disconnected = True
+    await run_in_threadpool(file.flush)
+    return written, disconnected
+
+
+def hash_file(path: Path) -> str:
+    """按块读取文件计算 SHA-256（在线程池中调用）"""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_READ_SIZE), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def store_attachment(db: Session, upload: AttachmentUpload, sha256: str) -> NoteAttachment:
+    """
+    将已完整接收的上传移入内容存储并创建附件，删除上传会话
+
+    相同内容已存在时丢弃临时文件，只增加引用；内容记录加行锁，与 collect_garbage 互斥
+
+    Args:
+        db: 数据库会话
+        upload: 已接收全部数据的上传会话
+        sha256: 服务端计算的内容哈希
+
+    Returns:
+        NoteAttachment: 新建的附件
+    """
+    partial = partial_path(upload.id)
+    target = blob_path(sha256)
+
+    blob = db.query(AttachmentBlob).filter(AttachmentBlob.sha256 == sha256).with_for_update().first()
+    if blob is None:
+        db.add(AttachmentBlob(sha256=sha256, size=upload.size, ref_count=0))
+        db.flush()
+    if blob is None or not target.exists():
+        # 新内容，或内容文件已丢失（用本次上传的数据恢复）
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(partial, target)
+    else:
+        partial.unlink(missing_ok=True)
+
+    attachment = NoteAttachment(
+        note_id=upload.note_id,
+        user_id=upload.user_id,
+        sha256=sha256,
+        filename=upload.filename,
+        content_type=upload.content_type,
+        size=upload.size,
+    )
+    db.add(attachment)
+    db.delete(upload)
+    db.commit()
+    db.refresh(attachment)
+    return attachment
+
+
+def collect_garbage(db: Session, limit: int = 100) -> Dict[str, int]:
+    """
+    回收过期的上传会话和不再被引用的内容
+
+    内容记录先在事务中删除（持有行锁），删除文件后再提交；并发上传相同内容时
+    store_attachment 会等待行锁，提交后重新创建记录和文件，不会指向已删除的文件
+
+    Args:
+        db: 数据库会话（调用前应已提交）
+        limit: 每类最多处理的条数
+
+    Returns:
+        Dict[str, int]: 删除的上传会话数和内容数
+    """
+    expired = db.query(AttachmentUpload).filter(
+        AttachmentUpload.expires_at <= datetime.utcnow()
+    ).limit(limit).all()
+    for upload in expired:
+        db.delete(upload)
+    db.commit()
+
+    shas = [row.sha256 for row in db.query(AttachmentBlob.sha256).filter(
+        AttachmentBlob.ref_count <= 0
+    ).limit(limit).all()]
+    removed = 0
+    for sha256 in shas:
+        result = db.execute(delete(AttachmentBlob).where(
+            AttachmentBlob.sha256 == sha256,
+            AttachmentBlob.ref_count <= 0
+        ))
+        if result.rowcount:
+            blob_path(sha256).unlink(missing_ok=True)
+            removed += 1
+        db.commit()
+
+    if expired or removed:
+        logger.info(f"附件回收: 上传会话 {len(expired)} 个, 内容 {removed} 个")
+    return {"uploads": len(expired), "blobs": removed}
+
+
+@event.listens_for(Session, "after_flush")
+def track_blob_references(session: Session, flush_context):
+    """
+    flush 后按新增、删除的附件更新内容的引用计数，并记录被删除的上传会话
+
+    笔记删除时附件由 ORM 级联逐条删除，同样出现在 deleted 中
+    """
+    deltas = defaultdict(int)
+    for obj in session.new:
+        if isinstance(obj, NoteAttachment):
+            deltas[obj.sha256] += 1
+    for obj in session.deleted:
+        if isinstance(obj, NoteAttachment):
+            deltas[obj.sha256] -= 1
+        elif isinstance(obj, AttachmentUpload):
+            session.info.setdefault(_PARTIALS_KEY, set()).add(obj.id)
+
+    blobs = AttachmentBlob.__table__
+    for sha256, delta in deltas.items():
+        if delta:
+            session.connection().execute(
+                update(blobs).where(blobs.c.sha256 == sha256).values(ref_count=blobs.c.ref_count + delta)
+            )
+
+
+@event.listens_for(Session, "after_commit")
+def remove_partials(session: Session):
+    """提交后删除已删除的上传会话的临时文件"""
+    for upload_id in session.info.pop(_PARTIALS_KEY, ()):
+        partial_path(upload_id).unlink(missing_ok=True)
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_partials(session: Session):
+    """回滚后上传会话未被删除，保留临时文件"""
+    session.info.pop(_PARTIALS_KEY, None)
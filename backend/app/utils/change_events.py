@@ -0,0 +1,172 @@
+"""
+变更通知
+事务提交后将笔记、标签、分类的变更（实体类型、ID、操作、同步序号）推送给该用户的事件流连接，
+客户端收到通知后按需刷新，不再轮询列表接口
+
+每个连接有一个有界队列：客户端消费过慢、队列已满时丢弃积压的事件，改为发送一条 overflow 事件，
+客户端收到后调用增量同步（GET /api/sync?since=...）补齐。事件只在本进程内分发，
+多进程部署时各进程独立，客户端重连后同样通过增量同步补齐断开期间的变更
+"""
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# session.info 中本事务待推送的变更，提交后按用户推送
+PENDING_EVENTS_KEY = "pending_change_events"
+
+# 队列溢出时代替积压事件放入队列的标记
+OVERFLOW = object()
+
+
+class ChangeSubscription:
+    """
+    单个事件流连接的订阅
+    队列只在所属事件循环中读写，其它线程通过 call_soon_threadsafe 投递
+    """
+
+    def __init__(self, user_id: str, queue_size: int):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def put(self, change: Dict[str, Any]) -> None:
+        """放入一条变更（在事件循环中调用），队列已满时丢弃积压的事件并放入溢出标记"""
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(change)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            change_broker.overflows += 1
+            logger.info("事件队列已满，丢弃积压的变更: user_id=%s", self.user_id)
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+
+    async def get(self, timeout: float):
+        """
+        等待下一条变更
+
+        Returns:
+            变更字典；OVERFLOW 表示有事件被丢弃；超时返回 None
+        """
+        try:
+            change = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if change is OVERFLOW:
+            # 客户端收到溢出通知后会增量同步，之后的变更照常推送
+            self.overflowed = False
+        return change
+
+
+class ChangeBroker:
+    """按用户分发变更的进程内代理"""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[ChangeSubscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self.published = 0
+        self.overflows = 0
+
+    def subscribe(self, user_id: str) -> ChangeSubscription:
+        """为用户新建订阅（在事件循环中调用）"""
+        subscription = ChangeSubscription(user_id, settings.EVENTS_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: ChangeSubscription) -> None:
+        """取消订阅"""
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id: str, changes: List[Dict[str, Any]]) -> None:
+        """
+        向用户的所有连接推送变更（可在任意线程中调用）
+
+        Args:
+            user_id: 用户ID
+            changes: 变更列表
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            for change in changes:
+                try:
+                    subscription.loop.call_soon_threadsafe(subscription.put, change)
+                except RuntimeError:
+                    # 事件循环已关闭（进程退出中）
+                    break
+        if subscribers:
+            self.published += len(changes)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        返回事件流指标
+
+        Returns:
+            Dict[str, Any]: 连接数、用户数、已推送的变更数和队列溢出次数
+        """
+        with self._lock:
+            connections = sum(len(subscribers) for subscribers in self._subscribers.values())
+            users = len(self._subscribers)
+        return {
+            "connections": connections,
+            "users": users,
+            "published": self.published,
+            "overflows": self.overflows,
+        }
+
+
+change_broker = ChangeBroker()
+
+
+def queue_change_events(session: Session, user_id: str, items: Iterable[Tuple[str, str, str, int]]) -> None:
+    """
+    记录本事务的变更，提交成功后推送
+    同一事务中多次 flush 同一实体时只保留最后一次变更
+
+    Args:
+        session: 数据库会话
+        user_id: 用户ID
+        items: (实体类型, 实体ID, 操作, 同步序号)
+    """
+    pending = session.info.setdefault(PENDING_EVENTS_KEY, defaultdict(dict))[user_id]
+    for entity_type, entity_id, operation, seq in items:
+        pending.pop((entity_type, entity_id), None)
+        pending[(entity_type, entity_id)] = {"type": entity_type, "id": entity_id, "op": operation, "seq": seq}
+
+
+def change_event_stats() -> Dict[str, Any]:
+    """返回事件流指标"""
+    return change_broker.stats()
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_changes(session: Session):
+    """提交成功后推送本事务的变更"""
+    pending: Optional[Dict[str, Dict[tuple, Dict[str, Any]]]] = session.info.pop(PENDING_EVENTS_KEY, None)
+    if pending:
+        for user_id, changes in pending.items():
+            change_broker.publish(user_id, list(changes.values()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session):
+    """回滚后丢弃本事务的变更"""
+    session.info.pop(PENDING_EVENTS_KEY, None)
@@ -0,0 +1,111 @@
+"""
+变更跟踪
+在每次 flush 后记录笔记、标签、分类的新增、修改和删除，
+递增用户数据版本号并写入同步变更表（删除记录作为墓碑保留），提交后推送变更通知
+"""
+from collections import defaultdict
+
+from sqlalchemy import Connection, event, inspect, insert, update
+from sqlalchemy.orm import Session
+
+from app.models import Note, Tag, Category, SyncChange
+from app.utils.data_version import bump_data_version
+from app.utils.read_routing import record_written_users
+from app.utils.change_events import queue_change_events
+
+# 需要跟踪的模型及其实体类型名称
+TRACKED_MODELS = {
+    Note: "note",
+    Tag: "tag",
+    Category: "category",
+}
+
+OPERATION_UPSERT = "upsert"
+OPERATION_DELETE = "delete"
+
+# 不属于笔记内容的统计字段，只有这些字段变化时不算作笔记的变更
+UNTRACKED_NOTE_ATTRIBUTES = {"view_count"}
+
+
+def _is_tracked_change(session: Session, obj) -> bool:
+    """
+    判断脏对象是否有需要同步的修改
+    笔记的标签集合变化属于笔记本身的变更；标签、分类只关心自身字段；
+    笔记只修改了浏览次数等统计字段时不记录，避免其它设备重新下载整篇笔记
+    """
+    if not isinstance(obj, Note):
+        return session.is_modified(obj, include_collections=False)
+    return any(
+        attr.history.has_changes()
+        for attr in inspect(obj).attrs
+        if attr.key not in UNTRACKED_NOTE_ATTRIBUTES
+    )
+
+
+def _record_change(connection: Connection, user_id: str, seq: int, entity_type: str, entity_id: str, operation: str):
+    """
+    写入或覆盖实体的最近一次变更记录
+    """
+    changes = SyncChange.__table__
+    result = connection.execute(
+        update(changes).where(
+            changes.c.entity_type == entity_type,
+            changes.c.entity_id == entity_id
+        ).values(seq=seq, operation=operation)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(changes).values(
+            user_id=user_id,
+            seq=seq,
+            entity_type=entity_type,
+            entity_id=entity_id,
+            operation=operation
+        ))
+
+
+@event.listens_for(Session, "after_flush")
+def track_changes(session: Session, flush_context):
+    """
+    flush 后收集被跟踪实体的变更
+
+    after_flush 阶段 new/dirty/deleted 仍保留 flush 前的状态，新建对象的主键已生成；
+    ORM 级联删除（如删除分类时级联删除的笔记）同样出现在 deleted 中
+    """
+    changes = {}
+
+    for obj in session.new:
+        entity_type = TRACKED_MODELS.get(type(obj))
+        if entity_type:
+            changes[(entity_type, obj.id)] = (obj.user_id, OPERATION_UPSERT)
+
+    for obj in session.dirty:
+        entity_type = TRACKED_MODELS.get(type(obj))
+        if entity_type and _is_tracked_change(session, obj):
+            changes[(entity_type, obj.id)] = (obj.user_id, OPERATION_UPSERT)
+
+    for obj in session.deleted:
+        entity_type = TRACKED_MODELS.get(type(obj))
+        if entity_type:
+            changes[(entity_type, obj.id)] = (obj.user_id, OPERATION_DELETE)
+
+    if not changes:
+        return
+
+    by_user = defaultdict(list)
+    for (entity_type, entity_id), (user_id, operation) in changes.items():
+        by_user[user_id].append((entity_type, entity_id, operation))
+
+    # 提交后这些用户进入读己之写窗口（配置了只读副本时生效）
+    record_written_users(session, by_user)
+
+    connection = session.connection()
+    for user_id, items in by_user.items():
+        # 一次性为本次 flush 的所有变更分配连续的序号
+        version = bump_data_version(connection, user_id, len(items))
+        seq = version - len(items)
+        events = []
+        for entity_type, entity_id, operation in items:
+            seq += 1
+            _record_change(connection, user_id, seq, entity_type, entity_id, operation)
+            events.append((entity_type, entity_id, operation, seq))
+        queue_change_events(session, user_id, events)
@@ -0,0 +1,51 @@
+"""
+用户数据版本号
+笔记、标签、分类发生任何变更时递增，用于 ETag 计算、缓存失效和增量同步
+"""
+from sqlalchemy import Connection, select, update
+from sqlalchemy.orm import Session
+
+from app.models import User
+
+
+def get_data_version(db: Session, user_id: str) -> int:
+    """
+    获取用户当前的数据版本号（按主键查询单个字段）
+
+    Args:
+        db: 数据库会话
+        user_id: 用户ID
+
+    Returns:
+        int: 数据版本号
+    """
+    version = db.query(User.data_version).filter(User.id == user_id).scalar()
+    return version or 0
+
+
+def bump_data_version(connection: Connection, user_id: str, amount: int = 1) -> int:
+    """
+    在当前事务中递增用户的数据版本号
+
+    UPDATE 会持有用户行锁直到事务提交，同一用户的并发写操作因此串行，
+    版本号的分配顺序与提交顺序一致
+    显式写回 updated_at，避免触发 onupdate 修改用户的更新时间
+
+    Args:
+        connection: 当前事务的数据库连接
+        user_id: 用户ID
+        amount: 递增的数量
+
+    Returns:
+        int: 递增后的数据版本号
+    """
+    users = User.__table__
+    connection.execute(
+        update(users).where(users.c.id == user_id).values(
+            data_version=users.c.data_version + amount,
+            updated_at=users.c.updated_at
+        )
+    )
+    return connection.execute(
+        select(users.c.data_version).where(users.c.id == user_id)
+    ).scalar() or 0
@@ -0,0 +1,78 @@
+"""
+ETag 工具函数
+用于条件请求（If-None-Match / 304 Not Modified）
+"""
+import hashlib
+from typing import Any, Optional
+from fastapi import Response, status
+
+
+def make_etag(*parts: Any, weak: bool = False) -> str:
+    """
+    根据若干组成部分生成 ETag
+
+    组成部分不能覆盖响应体的全部内容时（如列表中不随数据版本变化的浏览次数）应生成弱 ETag
+
+    Args:
+        parts: 参与计算的值（资源类型、ID、更新时间、数据版本等）
+        weak: 是否生成弱 ETag（W/ 前缀）
+
+    Returns:
+        str: 带双引号的 ETag 字符串
+    """
+    raw = "|".join("" if part is None else str(part) for part in parts)
+    digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    判断 If-None-Match 请求头是否命中当前 ETag
+
+    Args:
+        if_none_match: If-None-Match 请求头的值
+        etag: 当前资源的 ETag
+
+    Returns:
+        bool: 是否命中（命中时应返回 304）
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    # If-None-Match 使用弱比较，忽略 W/ 前缀
+    if etag.startswith("W/"):
+        etag = etag[2:]
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def set_etag(response: Response, etag: str) -> None:
+    """
+    为响应设置 ETag 和缓存控制头
+
+    private, no-cache 表示客户端可以缓存，但每次使用前都要携带 ETag 重新验证
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+
+
+def not_modified(etag: str) -> Response:
+    """
+    构建 304 Not Modified 响应
+
+    Args:
+        etag: 当前资源的 ETag
+
+    Returns:
+        Response: 不带响应体的 304 响应
+    """
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_etag(response, etag)
+    return response
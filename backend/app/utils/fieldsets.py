@@ -0,0 +1,92 @@
+"""
+稀疏字段集（fields= 参数）
+客户端只请求需要的字段时，查询只加载对应的列（不请求 content 时不读取内容列，
+不请求 tags 时不连接标签表），响应也只包含这些字段
+"""
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy.orm import joinedload, load_only, undefer
+
+from app.models import Note
+
+
+class InvalidFields(ValueError):
+    """fields 参数包含响应模型中不存在的字段"""
+
+
+def response_fields(response_model: Any) -> Tuple[str, ...]:
+    """返回响应模型输出的字段名（与序列化顺序一致，计算字段在最后）"""
+    return tuple(response_model.model_fields) + tuple(response_model.model_computed_fields)
+
+
+def parse_fields(value: Optional[str], response_model: Any) -> Optional[Tuple[str, ...]]:
+    """
+    解析逗号分隔的 fields 参数
+
+    Args:
+        value: fields 参数，为空时返回完整表示
+        response_model: 单条记录的响应模型（如 NoteResponse）
+
+    Returns:
+        Optional[Tuple[str, ...]]: 按响应模型顺序排列的字段（始终包含 id），未指定时返回 None
+
+    Raises:
+        InvalidFields: 包含未知字段
+    """
+    if not value:
+        return None
+    requested = {field.strip() for field in value.split(",") if field.strip()}
+    if not requested:
+        return None
+    allowed = response_fields(response_model)
+    unknown = sorted(requested.difference(allowed))
+    if unknown:
+        raise InvalidFields(f"未知字段: {', '.join(unknown)}，可选字段: {', '.join(allowed)}")
+    requested.add("id")
+    return tuple(field for field in allowed if field in requested)
+
+
+# 笔记内容的存储列（未压缩、压缩）
+NOTE_CONTENT_COLUMNS = (Note.content_text, Note.content_compressed)
+
+# 笔记字段 → 需要加载的列（未列出的字段不需要额外的列）
+_NOTE_COLUMNS = {
+    "title": (Note.title,),
+    "content": NOTE_CONTENT_COLUMNS,
+    "category_id": (Note.category_id,),
+    "category": (Note.category_id,),
+    "is_favorite": (Note.is_favorite,),
+    "user_id": (Note.user_id,),
+    "view_count": (Note.view_count,),
+    "version": (Note.version,),
+    "created_at": (Note.created_at,),
+    "updated_at": (Note.updated_at,),
+}
+
+
+def note_load_options(fields: Optional[Tuple[str, ...]], extra_columns: Tuple[Any, ...] = ()) -> List[Any]:
+    """
+    返回按字段集加载笔记的查询选项
+
+    Args:
+        fields: parse_fields 的结果，None 表示完整表示（加载全部列，包括延迟加载的压缩内容，以及分类和标签）
+        extra_columns: 处理请求本身需要的列（如渲染 HTML 需要内容），不影响响应字段
+
+    Returns:
+        List[Any]: 传给 Query.options 的加载选项
+    """
+    if fields is None:
+        return [undefer(Note.content_compressed), joinedload(Note.category), joinedload(Note.tags)]
+
+    columns = [Note.id, *extra_columns]
+    for field in fields:
+        columns.extend(_NOTE_COLUMNS.get(field, ()))
+    # 按属性名去重
+    columns = {column.key: column for column in columns}
+
+    options = [load_only(*columns.values())]
+    if "category" in fields:
+        options.append(joinedload(Note.category))
+    if "tags" in fields or "tag_ids" in fields:
+        options.append(joinedload(Note.tags))
+    return options
@@ -0,0 +1,109 @@
+"""
+图片处理
+缩略图在专用线程池中生成（Pillow 解码和缩放时释放 GIL），不占用处理请求的线程
+"""
+import os
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from app.config import settings
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow 为可选依赖，未安装时不生成缩略图
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidImage(Exception):
+    """文件无法解码为图片"""
+
+
+# 专用的图片处理线程池，与 Starlette 共享线程池隔离
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_warned_missing_pillow = False
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """延迟创建图片处理线程池"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.IMAGE_WORKERS,
+                    thread_name_prefix="image"
+                )
+    return _executor
+
+
+def thumbnail_path(path: Path, size: int) -> Path:
+    """返回图片某一尺寸缩略图的路径（原文件名加 _尺寸 后缀）"""
+    return path.with_name(f"{path.stem}_{size}{path.suffix}")
+
+
+def make_thumbnails(path: Path, sizes: Iterable[int]) -> Dict[int, Path]:
+    """
+    生成缩略图（保持宽高比，长边不超过 size，格式与原图相同）
+
+    已存在的缩略图直接复用；从大到小依次缩放，每次以上一张缩略图为输入
+
+    Args:
+        path: 原图路径
+        sizes: 缩略图尺寸列表（像素）
+
+    Returns:
+        Dict[int, Path]: 尺寸 → 缩略图路径，未安装 Pillow 时返回空字典
+
+    Raises:
+        InvalidImage: 文件无法解码为图片
+    """
+    if Image is None:
+        return {}
+
+    sizes = sorted(set(sizes), reverse=True)
+    thumbnails = {size: thumbnail_path(path, size) for size in sizes}
+    missing = [size for size in sizes if not thumbnails[size].exists()]
+    if not missing:
+        return thumbnails
+
+    try:
+        with Image.open(path) as source:
+            image_format = source.format
+            # JPEG 可以在解码时直接缩小，减少解码开销
+            source.draft("RGB", (missing[0], missing[0]))
+            image = ImageOps.exif_transpose(source)
+            if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            for size in missing:
+                image = image.copy()
+                image.thumbnail((size, size))
+                target = thumbnails[size]
+                temp = target.with_name(f".{target.name}.{threading.get_ident()}")
+                image.save(temp, format=image_format)
+                os.replace(temp, target)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        raise InvalidImage(str(e)) from e
+    return thumbnails
+
+
+async def make_thumbnails_async(path: Path, sizes: Iterable[int]) -> Dict[int, Path]:
+    """
+    在专用线程池中生成缩略图
+
+    Raises:
+        InvalidImage: 文件无法解码为图片
+    """
+    global _warned_missing_pillow
+    if Image is None:
+        if not _warned_missing_pillow:
+            _warned_missing_pillow = True
+            logger.warning("未安装 Pillow，跳过缩略图生成（pip install Pillow）")
+        return {}
+    return await asyncio.wrap_future(_get_executor().submit(make_thumbnails, path, list(sizes)))
@@ -6,6 +6,18 @@ from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from app.config import settings
+from app.utils.cache import TTLCache
+import hashlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# 已验证 Token 的 claims 缓存，键为 Token 的 SHA-256 摘要，条目的过期时间与 Token 的 exp 一致
+token_cache = TTLCache(
+    maxsize=settings.TOKEN_CACHE_SIZE,
+    ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -30,13 +42,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode.update({"exp": expire})
 
     # 编码 JWT
-    print(f"[JWT] Creating token with secret: {settings.JWT_SECRET_KEY[:10]}...", flush=True)
-    print(f"[JWT] Algorithm: {settings.JWT_ALGORITHM}", flush=True)
-    print(f"[JWT] Data to encode: {to_encode}", flush=True)
-
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
-
-    print(f"[JWT] Token created (first 50 chars): {encoded_jwt[:50]}...", flush=True)
+    logger.debug("JWT 创建成功: sub=%s", data.get("sub"))
     return encoded_jwt
 
 
@@ -44,18 +51,31 @@ def decode_access_token(token: str) -> Optional[dict]:
     """
     解码访问令牌
 
+    同一 Token 验证成功后缓存其 claims，直到 exp 为止不再重复校验签名；
+    命中缓存时仍会比对 exp，保证不会返回已过期的 Token
+
     Args:
         token: JWT Token
 
     Returns:
         Optional[dict]: 解码后的数据，失败返回 None
     """
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    cached = token_cache.get(key)
+    if cached is not None and cached["exp"] > time.time():
+        return dict(cached)
+
     try:
-        print(f"[JWT] Decoding token with secret: {settings.JWT_SECRET_KEY[:10]}...", flush=True)
-        print(f"[JWT] Algorithm: {settings.JWT_ALGORITHM}", flush=True)
         payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        print(f"[JWT] Decode successful: {payload}", flush=True)
-        return payload
     except JWTError as e:
-        print(f"[JWT] Decode failed: {type(e).__name__}: {e}", flush=True)
+        logger.debug("JWT 解码失败: %s", type(e).__name__)
         return None
+
+    # 没有 exp 的 Token 永不过期，不缓存
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        ttl = exp - time.time()
+        if ttl > 0:
+            token_cache.set(key, payload, ttl=ttl)
+
+    return dict(payload)
@@ -0,0 +1,56 @@
+"""
+读写分离的读己之写窗口
+记录最近写入过数据的用户，窗口期内其读请求走主库
+"""
+from typing import Iterable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.utils.cache import TTLCache
+
+# session.info 中本事务写入过数据的用户ID集合
+WRITTEN_USERS_KEY = "written_users"
+
+# 最近写入过数据的用户（进程内），条目在 READ_YOUR_WRITES_SECONDS 后过期
+recent_writers = TTLCache(maxsize=10000, ttl=settings.READ_YOUR_WRITES_SECONDS)
+
+
+def record_written_users(session: Session, user_ids: Iterable[str]) -> None:
+    """
+    记录本事务写入过数据的用户，提交成功后进入读己之写窗口
+
+    Args:
+        session: 数据库会话
+        user_ids: 用户ID
+    """
+    session.info.setdefault(WRITTEN_USERS_KEY, set()).update(user_ids)
+
+
+def wrote_recently(user_id: str) -> bool:
+    """
+    判断用户是否处于读己之写窗口内
+
+    Args:
+        user_id: 用户ID
+
+    Returns:
+        bool: 是否应从主库读取
+    """
+    return recent_writers.get(user_id) is not None
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_recent_writers(session: Session):
+    """提交成功后将本事务写入过数据的用户加入窗口"""
+    user_ids = session.info.pop(WRITTEN_USERS_KEY, None)
+    if user_ids:
+        for user_id in user_ids:
+            recent_writers.set(user_id, True)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_written_users(session: Session):
+    """回滚后丢弃本事务的写入记录"""
+    session.info.pop(WRITTEN_USERS_KEY, None)
@@ -0,0 +1,235 @@
+"""
+服务端 Markdown 渲染
+将笔记内容渲染为可直接插入页面的 HTML，按内容哈希缓存：进程内 LRU（按字节数限制容量），
+可选持久化到 RENDER_CACHE_DIR，内容未变化的笔记不会重复渲染
+
+安全：禁用 Markdown 中的原始 HTML（按文本转义），链接只允许安全协议（拒绝 javascript: 等），
+外部链接加 rel="noopener noreferrer nofollow"；安装 nh3 后再按白名单清理一次
+"""
+import os
+import hashlib
+import logging
+import threading
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from app.utils.response_cache import MemoryResponseCache
+
+try:
+    import markdown_it
+    from markdown_it import MarkdownIt
+except ImportError:  # markdown-it-py 为可选依赖，未安装时不支持服务端渲染
+    markdown_it = None
+    MarkdownIt = None
+
+try:
+    import nh3
+except ImportError:  # nh3 为可选依赖，安装后对渲染结果再做一次白名单清理
+    nh3 = None
+
+logger = logging.getLogger(__name__)
+
+# 渲染规则变化时递增，使已缓存的结果失效
+RENDER_VERSION = 1
+
+LINK_REL = "noopener noreferrer nofollow"
+
+
+class RendererUnavailable(Exception):
+    """未安装 Markdown 渲染器"""
+
+
+def _link_open(self, tokens, idx, options, env):
+    """渲染链接时加上 rel，避免新页面访问 window.opener 和传递来源"""
+    tokens[idx].attrSet("rel", LINK_REL)
+    return self.renderToken(tokens, idx, options, env)
+
+
+def renderer_available() -> bool:
+    """是否已安装 Markdown 渲染器"""
+    return MarkdownIt is not None
+
+
+def create_renderer():
+    """
+    创建 Markdown 渲染器：CommonMark + 表格、删除线，禁用原始 HTML
+
+    Raises:
+        RendererUnavailable: 未安装 markdown-it-py
+    """
+    if MarkdownIt is None:
+        raise RendererUnavailable()
+    md = MarkdownIt("commonmark", {"html": False}).enable(["table", "strikethrough"])
+    md.add_render_rule("link_open", _link_open)
+    return md
+
+
+def renderer_id() -> str:
+    """渲染器标识（版本和清理方式），作为缓存键的一部分"""
+    version = markdown_it.__version__ if markdown_it is not None else "none"
+    return f"v{RENDER_VERSION};markdown-it-py={version};nh3={'on' if nh3 is not None else 'off'}"
+
+
+def sanitize(html: str) -> str:
+    """按白名单清理 HTML（未安装 nh3 时原样返回，渲染器本身已禁用原始 HTML）"""
+    if nh3 is None:
+        return html
+    attributes = {tag: set(attrs) for tag, attrs in nh3.ALLOWED_ATTRIBUTES.items()}
+    # 保留代码块的语言标记和表格的对齐方式
+    attributes.setdefault("code", set()).add("class")
+    for tag in ("th", "td"):
+        attributes.setdefault(tag, set()).add("style")
+    return nh3.clean(
+        html,
+        attributes=attributes,
+        filter_style_properties={"text-align"},
+        link_rel=LINK_REL,
+    )
+
+
+class RenderCache:
+    """
+    Markdown 渲染缓存
+    键为渲染器标识和内容的 SHA-256；先查进程内 LRU，再查磁盘（配置了 RENDER_CACHE_DIR 时），都未命中才渲染
+    """
+
+    def __init__(self):
+        self._memory: Optional[MemoryResponseCache] = None
+        self._renderer = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.renders = 0
+        self.disk_errors = 0
+
+    def _setup(self):
+        """第一次使用时创建渲染器和内存缓存"""
+        if self._renderer is None:
+            with self._lock:
+                if self._renderer is None:
+                    self._memory = MemoryResponseCache(max_bytes=settings.RENDER_CACHE_MAX_BYTES)
+                    self._renderer = create_renderer()
+
+    @staticmethod
+    def key(content: str) -> str:
+        """返回内容的缓存键"""
+        return hashlib.sha256(f"{renderer_id()}\0{content}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _disk_path(key: str) -> Optional[Path]:
+        if not settings.RENDER_CACHE_DIR:
+            return None
+        return Path(settings.RENDER_CACHE_DIR) / key[:2] / f"{key}.html"
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        path = self._disk_path(key)
+        if path is None:
+            return None
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            self.disk_errors += 1
+            logger.warning(f"读取渲染缓存失败: {e}")
+            return None
+
+    def _write_disk(self, key: str, value: bytes) -> None:
+        path = self._disk_path(key)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp = tempfile.mkstemp(dir=path.parent, prefix=".render-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(value)
+            os.replace(temp, path)
+        except OSError as e:
+            self.disk_errors += 1
+            logger.warning(f"写入渲染缓存失败: {e}")
+
+    def render(self, content: Optional[str]) -> str:
+        """
+        将 Markdown 渲染为 HTML，优先使用缓存
+
+        Args:
+            content: Markdown 内容
+
+        Returns:
+            str: 清理后的 HTML
+
+        Raises:
+            RendererUnavailable: 未安装 markdown-it-py
+        """
+        self._setup()
+        if not content:
+            return ""
+
+        key = self.key(content)
+        value = self._memory.get(key)
+        if value is not None:
+            self.hits += 1
+            return value.decode("utf-8")
+
+        value = self._read_disk(key)
+        if value is not None:
+            self.disk_hits += 1
+        else:
+            value = sanitize(self._renderer.render(content)).encode("utf-8")
+            self.renders += 1
+            self._write_disk(key, value)
+
+        # 渲染结果只由内容决定，不会过期，只按容量淘汰
+        self._memory.set(key, value, float("inf"))
+        return value.decode("utf-8")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        返回渲染缓存指标
+
+        Returns:
+            Dict[str, Any]: 渲染器、内存命中/磁盘命中/渲染次数及内存占用
+        """
+        return {
+            "renderer": renderer_id(),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "renders": self.renders,
+            "disk_errors": self.disk_errors,
+            "persistent": bool(settings.RENDER_CACHE_DIR),
+            **(self._memory.stats() if self._memory is not None else {}),
+        }
+
+
+render_cache = RenderCache()
+
+
+def render_markdown(content: Optional[str]) -> str:
+    """
+    将笔记内容渲染为 HTML（使用渲染缓存）
+
+    Raises:
+        RendererUnavailable: 未安装 markdown-it-py
+    """
+    return render_cache.render(content)
+
+
+def render_cache_stats() -> Dict[str, Any]:
+    """返回渲染缓存指标"""
+    return render_cache.stats()
+
+
+class RenderedNote:
+    """
+    笔记及其渲染后的 HTML
+    其余属性来自笔记对象，供 NoteHtmlResponse 按属性校验和快速序列化
+    """
+
+    def __init__(self, note, content_html: str):
+        self.note = note
+        self.content_html = content_html
+
+    def __getattr__(self, name: str):
+        return getattr(self.note, name)
@@ -0,0 +1,315 @@
+"""
+响应缓存
+缓存列表类接口序列化后的响应体，键由路由、参数和用户数据版本号计算（与 ETag 相同），
+任何写操作递增数据版本号后旧条目自然失效，无需逐条删除
+
+后端可插拔（Settings.RESPONSE_CACHE_BACKEND）：
+- none：关闭
+- memory：进程内 LRU，按字节数限制容量（默认）
+- local-kv：进程内字典模拟的键值存储，与网络后端走同一套逻辑，用于测试
+- redis://...：Redis 等网络键值存储（需要安装 redis）
+- 模块路径:类名：自定义 ResponseCacheBackend（无参构造）
+"""
+import importlib
+import json
+import logging
+from abc import ABC, abstractmethod
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Response
+
+from app.config import settings
+from app.utils.serialization import serialize, dump_json
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCacheBackend(ABC):
+    """响应缓存后端接口，值为序列化后的响应体"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """读取缓存，未命中返回 None"""
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        """写入缓存，ttl 为过期时间（秒）"""
+
+    def stats(self) -> Dict[str, Any]:
+        """后端自身的指标（条目数、占用字节数等）"""
+        return {}
+
+
+class MemoryResponseCache(ResponseCacheBackend):
+    """
+    进程内 LRU 响应缓存
+    按响应体字节数限制容量，超过时淘汰最久未使用的条目
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (time.monotonic() + ttl, value)
+            self.bytes += len(value)
+            while self.bytes > self.max_bytes and self._data:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        """删除条目并更新占用字节数（调用方持有锁）"""
+        _, value = self._data.pop(key)
+        self.bytes -= len(value)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
+
+
+class LocalKeyValueClient:
+    """
+    进程内键值存储，接口与 redis.Redis 的 get / set(ex=) 一致
+    用于在测试和本地开发中代替网络键值存储
+    """
+
+    def __init__(self):
+        self._data: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(name)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[name]
+                return None
+            return value
+
+    def set(self, name: str, value: bytes, ex: Optional[int] = None) -> bool:
+        with self._lock:
+            self._data[name] = (time.monotonic() + ex if ex else None, value)
+        return True
+
+
+class KeyValueResponseCache(ResponseCacheBackend):
+    """
+    基于网络键值存储的响应缓存，多个进程共享
+    过期和容量淘汰由键值存储负责（如 Redis 的 maxmemory-policy allkeys-lru）
+    """
+
+    def __init__(self, client, prefix: str = "kb:response:"):
+        """
+        Args:
+            client: 提供 get(name) 和 set(name, value, ex=秒数) 的客户端
+            prefix: 键前缀
+        """
+        self.client = client
+        self.prefix = prefix
+        self.bytes_written = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.client.set(self.prefix + key, value, ex=max(1, int(ttl)))
+        self.bytes_written += len(value)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"bytes_written": self.bytes_written}
+
+
+def load_backend(spec: str) -> Optional[ResponseCacheBackend]:
+    """
+    根据配置创建响应缓存后端
+
+    Args:
+        spec: none / memory / local-kv / redis://... / 模块路径:类名
+
+    Returns:
+        Optional[ResponseCacheBackend]: 缓存后端，none 时返回 None
+    """
+    if not spec or spec == "none":
+        return None
+    if spec == "memory":
+        return MemoryResponseCache(max_bytes=settings.RESPONSE_CACHE_MAX_BYTES)
+    if spec == "local-kv":
+        return KeyValueResponseCache(LocalKeyValueClient())
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        import redis
+
+        return KeyValueResponseCache(redis.Redis.from_url(spec))
+    module_name, _, class_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+class ResponseCache:
+    """
+    响应缓存
+    后端在第一次使用时创建；统计命中率，网络后端出错时按未命中处理，不影响请求
+    """
+
+    def __init__(self):
+        self._backend: Optional[ResponseCacheBackend] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.skipped = 0
+        self.errors = 0
+
+    @property
+    def backend(self) -> Optional[ResponseCacheBackend]:
+        """缓存后端，未启用时为 None"""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._backend = load_backend(settings.RESPONSE_CACHE_BACKEND)
+                    self._loaded = True
+        return self._backend
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        读取缓存的响应体
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            Optional[bytes]: 响应体，未命中或未启用时返回 None
+        """
+        backend = self.backend
+        if backend is None:
+            return None
+        try:
+            value = backend.get(key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"读取响应缓存失败: {e}")
+            return None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        """
+        写入响应体，超过 RESPONSE_CACHE_MAX_ENTRY_BYTES 的响应不缓存
+
+        Args:
+            key: 缓存键
+            value: 响应体
+        """
+        backend = self.backend
+        if backend is None:
+            return
+        if len(value) > settings.RESPONSE_CACHE_MAX_ENTRY_BYTES:
+            self.skipped += 1
+            return
+        try:
+            backend.set(key, value, settings.RESPONSE_CACHE_TTL)
+            self.stores += 1
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"写入响应缓存失败: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        返回缓存指标
+
+        Returns:
+            Dict[str, Any]: 后端、命中/未命中次数、命中率、写入/跳过/出错次数及后端指标
+        """
+        backend = self.backend
+        lookups = self.hits + self.misses
+        return {
+            "backend": settings.RESPONSE_CACHE_BACKEND if backend is not None else "none",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            **(backend.stats() if backend is not None else {}),
+        }
+
+
+response_cache = ResponseCache()
+
+
+def get_cached_response(key: str, overrides: Optional[Dict[str, Any]] = None) -> Optional[Response]:
+    """
+    读取缓存的响应
+
+    Args:
+        key: 缓存键（使用由数据版本号计算的 ETag）
+        overrides: 替换响应体中的顶层字段（如每次读取都会变化的浏览次数），响应体中没有的字段忽略
+
+    Returns:
+        Optional[Response]: 命中时返回 JSON 响应，否则返回 None
+    """
+    body = response_cache.get(key)
+    if body is None:
+        return None
+    if overrides:
+        data = json.loads(body)
+        changed = {name: value for name, value in overrides.items() if name in data}
+        if changed:
+            data.update(changed)
+            body = dump_json(data)
+    return Response(content=body, media_type="application/json")
+
+
+def cache_response(key: str, content: Any, response_model: Any, fields: Optional[Tuple[str, ...]] = None) -> Response:
+    """
+    按响应模型序列化并缓存响应
+
+    序列化结果与 FastAPI 按 response_model 输出的 JSON 一致（见 app.utils.serialization）
+
+    Args:
+        key: 缓存键（使用由数据版本号计算的 ETag）
+        content: 处理函数的返回值（ORM 对象、字典或 Pydantic 模型）
+        response_model: 路由声明的响应模型
+        fields: 稀疏字段集，None 表示完整表示（缓存键中应包含字段集）
+
+    Returns:
+        Response: JSON 响应
+    """
+    body = serialize(content, response_model, fields)
+    response_cache.set(key, body)
+    return Response(content=body, media_type="application/json")
+
+
+def response_cache_stats() -> Dict[str, Any]:
+    """返回响应缓存指标"""
+    return response_cache.stats()
@@ -0,0 +1,215 @@
+"""
+笔记历史版本工具函数
+基于行级差异的版本存储：周期性完整快照 + 快照之间的增量差异
+"""
+import json
+from difflib import SequenceMatcher
+from typing import List, Optional, Sequence, Union
+
+from sqlalchemy.orm import Session, undefer
+
+from app.config import settings
+from app.models import Note, NoteRevision
+
+# 差异操作：正整数表示保留 N 行，负整数表示删除 N 行，字符串表示插入的文本
+DeltaOp = Union[int, str]
+
+
+def compute_delta(old: str, new: str) -> List[DeltaOp]:
+    """
+    计算两个文本之间的行级差异
+
+    Args:
+        old: 旧文本
+        new: 新文本
+
+    Returns:
+        List[DeltaOp]: 差异操作列表
+    """
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+
+    # 先跳过首尾相同的行，只对中间变化的区域做匹配，大笔记的局部修改不必重新比较全文
+    prefix = 0
+    max_prefix = min(len(old_lines), len(new_lines))
+    while prefix < max_prefix and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    max_suffix = max_prefix - prefix
+    while suffix < max_suffix and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+        suffix += 1
+
+    ops: List[DeltaOp] = [prefix] if prefix else []
+    old_middle = old_lines[prefix:len(old_lines) - suffix]
+    new_middle = new_lines[prefix:len(new_lines) - suffix]
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, old_middle, new_middle).get_opcodes():
+        if tag == "equal":
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(-(i2 - i1))
+        if j2 > j1:
+            ops.append("".join(new_middle[j1:j2]))
+    if suffix:
+        ops.append(suffix)
+    return ops
+
+
+def apply_delta(base: str, delta: List[DeltaOp]) -> str:
+    """
+    将差异应用到基础文本上
+
+    Args:
+        base: 基础文本
+        delta: compute_delta 生成的差异操作列表
+
+    Returns:
+        str: 应用差异后的文本
+    """
+    lines = base.splitlines(keepends=True)
+    result = []
+    position = 0
+    for op in delta:
+        if isinstance(op, str):
+            result.append(op)
+        elif op >= 0:
+            result.extend(lines[position:position + op])
+            position += op
+        else:
+            position -= op
+    return "".join(result)
+
+
+def apply_text_edits(text: str, edits: Sequence) -> str:
+    """
+    将一组基于同一基础文本的编辑应用到文本上
+
+    Args:
+        text: 基础文本
+        edits: 编辑列表，每项包含 offset、delete、insert，按 offset 升序且互不重叠
+
+    Returns:
+        str: 编辑后的文本
+
+    Raises:
+        ValueError: 编辑越界、未排序或相互重叠
+    """
+    result = []
+    position = 0
+    for edit in edits:
+        if edit.offset < position:
+            raise ValueError("编辑必须按 offset 升序排列且互不重叠")
+        end = edit.offset + edit.delete
+        if end > len(text):
+            raise ValueError("编辑超出内容范围")
+        result.append(text[position:edit.offset])
+        result.append(edit.insert)
+        position = end
+    result.append(text[position:])
+    return "".join(result)
+
+
+def record_revision(db: Session, note: Note, previous_content: Optional[str] = None) -> NoteRevision:
+    """
+    为笔记的当前状态记录一个新版本
+
+    差异链达到 NOTE_REVISION_MAX_CHAIN 或差异不比全文小时保存完整快照，
+    否则只保存相对上一版本的差异，并将笔记的 version 更新为新的版本号。
+    在写操作的同一事务中调用，由调用方负责 commit
+
+    Args:
+        db: 数据库会话
+        note: 已更新为新状态的笔记
+        previous_content: 上一版本的内容（即更新前的内容），新建笔记时为 None
+
+    Returns:
+        NoteRevision: 新增的版本记录
+    """
+    content = note.content or ""
+    latest = db.query(
+        NoteRevision.revision, NoteRevision.base_revision
+    ).filter(
+        NoteRevision.note_id == note.id
+    ).order_by(NoteRevision.revision.desc()).first()
+
+    revision = latest.revision + 1 if latest else 1
+    is_snapshot = True
+    payload = content
+
+    # 链长度未达上限时尝试保存差异
+    if latest and revision - latest.base_revision < settings.NOTE_REVISION_MAX_CHAIN:
+        delta = compute_delta(previous_content or "", content)
+        encoded = json.dumps(delta, ensure_ascii=False, separators=(",", ":"))
+        if len(encoded) < len(content):
+            is_snapshot = False
+            payload = encoded
+
+    db_revision = NoteRevision(
+        note_id=note.id,
+        user_id=note.user_id,
+        revision=revision,
+        base_revision=revision if is_snapshot else latest.base_revision,
+        is_snapshot=is_snapshot,
+        title=note.title,
+        content_length=len(content),
+        payload=payload
+    )
+    db.add(db_revision)
+    note.version = revision
+    return db_revision
+
+
+def ensure_initial_revision(db: Session, note: Note) -> None:
+    """
+    为启用历史版本之前创建的笔记补记当前状态作为第一个版本
+
+    在修改笔记字段之前调用，保证更新前的内容不会丢失
+
+    Args:
+        db: 数据库会话
+        note: 尚未修改的笔记
+    """
+    exists = db.query(NoteRevision.id).filter(NoteRevision.note_id == note.id).first()
+    if exists is None:
+        record_revision(db, note)
+        # 会话关闭了 autoflush，需要手动刷新以便后续版本能查询到它
+        db.flush()
+
+
+def reconstruct_revision(db: Session, note_id: str, revision: int) -> Optional[str]:
+    """
+    还原指定版本的笔记内容
+
+    只加载该版本所属快照到目标版本之间的记录，耗时受差异链最大长度约束
+
+    Args:
+        db: 数据库会话
+        note_id: 笔记ID
+        revision: 版本号
+
+    Returns:
+        Optional[str]: 该版本的内容，版本不存在返回 None
+    """
+    target = db.query(NoteRevision.base_revision).filter(
+        NoteRevision.note_id == note_id,
+        NoteRevision.revision == revision
+    ).first()
+    if target is None:
+        return None
+
+    chain = db.query(NoteRevision).options(
+        undefer(NoteRevision.payload_text),
+        undefer(NoteRevision.payload_compressed)
+    ).filter(
+        NoteRevision.note_id == note_id,
+        NoteRevision.revision >= target.base_revision,
+        NoteRevision.revision <= revision
+    ).order_by(NoteRevision.revision).all()
+
+    content = ""
+    for item in chain:
+        if item.is_snapshot:
+            content = item.payload
+        else:
+            content = apply_delta(content, json.loads(item.payload))
+    return content
@@ -2,8 +2,26 @@
 安全相关工具函数
 密码加密和验证
 """
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
 import bcrypt
 
+from app.config import settings
+
+
+class PasswordHasherBusy(Exception):
+    """密码哈希线程池及其等待队列已满"""
+
+
+# 专用的密码哈希线程池（bcrypt 计算时释放 GIL），与 Starlette 共享线程池隔离
+_executor: Optional[ThreadPoolExecutor] = None
+# 线程池中运行和排队的任务总数上限
+_slots: Optional[threading.BoundedSemaphore] = None
+_executor_lock = threading.Lock()
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -38,9 +56,84 @@ def get_password_hash(password: str) -> str:
     # bcrypt 有72字节的限制，始终截断到安全长度（50个字符）
     # 这样可以完全避免超过72字节的错误，同时保持足够的密码强度
     password = password[:50]
-    # 生成盐值并哈希密码
+    # 生成盐值并哈希密码（成本因子见 Settings.BCRYPT_ROUNDS）
     password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     # 返回字符串格式的哈希值
     return hashed.decode('utf-8')
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    判断已存储的哈希是否使用了与当前配置不同的成本因子
+
+    Args:
+        hashed_password: 哈希密码（格式如 $2b$12$...）
+
+    Returns:
+        bool: 是否需要用当前成本因子重新哈希
+    """
+    try:
+        rounds = int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return True
+    return rounds != settings.BCRYPT_ROUNDS
+
+
+def _get_executor():
+    """延迟创建密码哈希线程池"""
+    global _executor, _slots
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _slots = threading.BoundedSemaphore(
+                    settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE
+                )
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS,
+                    thread_name_prefix="password-hash"
+                )
+    return _executor, _slots
+
+
+async def _run_in_hash_pool(fn, *args):
+    """
+    在专用线程池中执行密码哈希任务
+
+    Raises:
+        PasswordHasherBusy: 运行和排队的任务已达上限
+    """
+    executor, slots = _get_executor()
+    if not slots.acquire(blocking=False):
+        raise PasswordHasherBusy()
+
+    try:
+        future = executor.submit(fn, *args)
+    except BaseException:
+        slots.release()
+        raise
+
+    # 任务结束时释放名额（即使等待方已取消）
+    future.add_done_callback(lambda _: slots.release())
+    return await asyncio.wrap_future(future)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    在专用线程池中验证密码，不占用处理其它请求的线程
+
+    Raises:
+        PasswordHasherBusy: 线程池已满
+    """
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    在专用线程池中计算密码哈希，不占用处理其它请求的线程
+
+    Raises:
+        PasswordHasherBusy: 线程池已满
+    """
+    return await _run_in_hash_pool(get_password_hash, password)
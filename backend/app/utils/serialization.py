@@ -0,0 +1,202 @@
+"""
+响应序列化
+默认按响应模型做一次 Pydantic 校验和序列化；开启 FAST_JSON 后，已注册快速序列化函数的模型
+直接从 ORM 对象构建字典并用 orjson 编码，跳过 Pydantic 校验，输出与响应模型逐字节一致
+指定稀疏字段集（fields=）时总是使用快速序列化函数，只读取请求的属性
+"""
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from app.config import settings
+from app.schemas.note import NoteResponse, NoteListResponse, NoteSearchResponse, NoteHtmlResponse, NoteBatchResponse
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库 json
+    orjson = None
+
+# 响应模型 → TypeAdapter（构建有开销，按模型复用）
+_adapters: Dict[Any, TypeAdapter] = {}
+
+# 响应模型 → 快速序列化函数（返回可直接编码为 JSON 的字典，支持字段集的函数还接受 fields 参数）
+_fast_serializers: Dict[Any, Callable[..., Any]] = {}
+
+
+def _default(obj: Any) -> str:
+    """标准库 json 的 datetime 编码，格式与 Pydantic 一致（UTC 输出为 Z）"""
+    if isinstance(obj, datetime):
+        if obj.utcoffset() is not None and obj.utcoffset().total_seconds() == 0:
+            return obj.replace(tzinfo=None).isoformat() + "Z"
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dump_json(data: Any) -> bytes:
+    """
+    将字典、列表等编码为 JSON
+
+    格式与 FastAPI 的 JSONResponse 相同：紧凑分隔符、不转义非 ASCII 字符
+
+    Args:
+        data: 待编码的数据
+
+    Returns:
+        bytes: UTF-8 编码的 JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_UTC_Z)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def fast_serializer(response_model: Any):
+    """注册响应模型的快速序列化函数"""
+    def decorator(fn: Callable[[Any], Any]):
+        _fast_serializers[response_model] = fn
+        return fn
+    return decorator
+
+
+def serialize(content: Any, response_model: Any, fields: Optional[Tuple[str, ...]] = None) -> bytes:
+    """
+    按响应模型序列化响应内容
+
+    Args:
+        content: 处理函数的返回值（ORM 对象、字典或 Pydantic 模型）
+        response_model: 路由声明的响应模型
+        fields: 稀疏字段集（每条笔记只输出这些字段），None 表示完整表示
+
+    Returns:
+        bytes: UTF-8 编码的 JSON
+    """
+    if fields is not None:
+        # Pydantic 校验会读取全部属性，触发未加载列的查询，字段集只能由快速序列化函数输出
+        return dump_json(_fast_serializers[response_model](content, fields))
+
+    if settings.FAST_JSON:
+        serializer = _fast_serializers.get(response_model)
+        if serializer is not None:
+            return dump_json(serializer(content))
+
+    adapter = _adapters.get(response_model)
+    if adapter is None:
+        adapter = _adapters[response_model] = TypeAdapter(response_model)
+    return adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+
+def json_response(content: Any, response_model: Any, fields: Optional[Tuple[str, ...]] = None) -> Response:
+    """
+    按响应模型序列化并构建 JSON 响应
+
+    Args:
+        content: 处理函数的返回值
+        response_model: 路由声明的响应模型
+        fields: 稀疏字段集，None 表示完整表示
+
+    Returns:
+        Response: JSON 响应
+    """
+    return Response(content=serialize(content, response_model, fields), media_type="application/json")
+
+
+def _category_to_dict(category) -> Optional[Dict[str, Any]]:
+    """将分类转换为 CategoryResponse 的字典"""
+    if category is None:
+        return None
+    return {"id": category.id, "name": category.name, "description": category.description}
+
+
+def _note_field(note, field: str) -> Any:
+    """读取笔记的单个响应字段（只访问该字段需要的属性）"""
+    if field == "category":
+        return _category_to_dict(note.category)
+    if field == "tags":
+        return [{"id": tag.id, "name": tag.name} for tag in note.tags]
+    if field == "tag_ids":
+        return [tag.id for tag in note.tags]
+    return getattr(note, field)
+
+
+@fast_serializer(NoteResponse)
+def note_to_dict(note, fields: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
+    """
+    将笔记 ORM 对象转换为 NoteResponse 的字典（字段顺序与响应模型一致）
+
+    Args:
+        note: 笔记（已加载 category 和 tags，指定 fields 时只需加载对应的列）
+        fields: 稀疏字段集，None 表示全部字段
+
+    Returns:
+        Dict[str, Any]: 笔记字典
+    """
+    if fields is not None:
+        return {field: _note_field(note, field) for field in fields}
+
+    tags = [{"id": tag.id, "name": tag.name} for tag in note.tags]
+    return {
+        "title": note.title,
+        "content": note.content,
+        "category_id": note.category_id,
+        "is_favorite": note.is_favorite,
+        "id": note.id,
+        "user_id": note.user_id,
+        "view_count": note.view_count,
+        "version": note.version,
+        "created_at": note.created_at,
+        "updated_at": note.updated_at,
+        "category": _category_to_dict(note.category),
+        "tags": tags,
+        "tag_ids": [tag["id"] for tag in tags],
+    }
+
+
+@fast_serializer(NoteListResponse)
+def note_list_to_dict(content: Dict[str, Any], fields: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
+    """将 {"items", "total", "page", "page_size"} 转换为 NoteListResponse 的字典"""
+    return {
+        "items": [note_to_dict(note, fields) for note in content["items"]],
+        "total": content["total"],
+        "page": content["page"],
+        "page_size": content["page_size"],
+    }
+
+
+@fast_serializer(NoteSearchResponse)
+def note_search_to_dict(content: Dict[str, Any], fields: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
+    """将 {"results", "total", "truncated"} 转换为 NoteSearchResponse 的字典"""
+    return {
+        "results": [note_to_dict(note, fields) for note in content["results"]],
+        "total": content["total"],
+        "truncated": content.get("truncated", False),
+    }
+
+
+@fast_serializer(NoteBatchResponse)
+def note_batch_to_dict(content: Dict[str, Any]) -> Dict[str, Any]:
+    """将 {"items": [{"id", "status", "note"}]} 转换为 NoteBatchResponse 的字典"""
+    return {
+        "items": [
+            {
+                "id": item["id"],
+                "status": item["status"],
+                "note": None if item["note"] is None else note_to_dict(item["note"]),
+            }
+            for item in content["items"]
+        ],
+    }
+
+
+@fast_serializer(NoteHtmlResponse)
+def note_html_to_dict(note, fields: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
+    """将带 content_html 的笔记（RenderedNote）转换为 NoteHtmlResponse 的字典（计算字段 tag_ids 在最后）"""
+    if fields is not None:
+        return note_to_dict(note, fields)
+
+    data = note_to_dict(note)
+    tag_ids = data.pop("tag_ids")
+    data["content_html"] = note.content_html
+    data["tag_ids"] = tag_ids
+    return data
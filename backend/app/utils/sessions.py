@@ -0,0 +1,228 @@
+"""
+登录会话工具函数
+刷新令牌的签发、轮换和吊销
+"""
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, Tuple
+import hashlib
+import logging
+import secrets
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import UserSession
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# 已吊销会话ID集合（进程内）
+# 访问令牌在吊销后最多还能存活 ACCESS_TOKEN_EXPIRE_MINUTES，条目保留同样的时间即可
+revoked_sessions = TTLCache(
+    maxsize=settings.REVOKED_SESSION_CACHE_SIZE,
+    ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+)
+
+# 已确认未吊销的会话ID（进程内），条目保留 SESSION_CHECK_TTL 秒，过期后重新查询 user_sessions 表，
+# 其它进程吊销的会话因此最多在 SESSION_CHECK_TTL 秒后在本进程失效
+active_sessions = TTLCache(
+    maxsize=settings.REVOKED_SESSION_CACHE_SIZE,
+    ttl=settings.SESSION_CHECK_TTL
+)
+
+
+def hash_refresh_token(token: str) -> str:
+    """
+    计算刷新令牌的 SHA-256 摘要
+
+    Args:
+        token: 刷新令牌明文
+
+    Returns:
+        str: 十六进制摘要
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _new_refresh_token() -> Tuple[str, str, datetime]:
+    """生成刷新令牌，返回 (明文, 摘要, 过期时间)"""
+    token = secrets.token_urlsafe(32)
+    expires_at = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    return token, hash_refresh_token(token), expires_at
+
+
+def create_session(db: Session, user_id: str) -> Tuple[UserSession, str]:
+    """
+    为用户创建登录会话（不提交事务）
+
+    Args:
+        db: 数据库会话
+        user_id: 用户ID
+
+    Returns:
+        Tuple[UserSession, str]: 会话对象和刷新令牌明文
+    """
+    token, token_hash, expires_at = _new_refresh_token()
+    user_session = UserSession(user_id=user_id, refresh_token_hash=token_hash, expires_at=expires_at)
+    db.add(user_session)
+    db.flush()
+    return user_session, token
+
+
+def rotate_session(db: Session, refresh_token: str) -> Optional[Tuple[UserSession, str]]:
+    """
+    使用刷新令牌换取新的刷新令牌（不提交事务）
+
+    按令牌摘要走唯一索引查找会话，旧令牌轮换后立即失效
+
+    Args:
+        db: 数据库会话
+        refresh_token: 客户端提交的刷新令牌
+
+    Returns:
+        Optional[Tuple[UserSession, str]]: 会话对象和新的刷新令牌，令牌无效、过期或已吊销时返回 None
+    """
+    user_session = (
+        db.query(UserSession)
+        .filter(UserSession.refresh_token_hash == hash_refresh_token(refresh_token))
+        .with_for_update()
+        .first()
+    )
+    if user_session is None:
+        return None
+    if user_session.revoked_at is not None or user_session.expires_at <= datetime.utcnow():
+        return None
+
+    token, token_hash, expires_at = _new_refresh_token()
+    user_session.refresh_token_hash = token_hash
+    user_session.expires_at = expires_at
+    return user_session, token
+
+
+def revoke_sessions(user_sessions: Iterable[UserSession]) -> int:
+    """
+    吊销会话（不提交事务）
+    会话ID同时加入进程内吊销集合，使其已签发的访问令牌立即失效
+
+    Args:
+        user_sessions: 要吊销的会话
+
+    Returns:
+        int: 吊销的会话数量
+    """
+    now = datetime.utcnow()
+    count = 0
+    for user_session in user_sessions:
+        if user_session.revoked_at is None:
+            user_session.revoked_at = now
+        revoked_sessions.set(user_session.id, True)
+        active_sessions.delete(user_session.id)
+        count += 1
+    return count
+
+
+def revoke_user_sessions(db: Session, user_id: str, keep_session_id: Optional[str] = None) -> int:
+    """
+    吊销用户的全部有效会话（不提交事务）
+
+    Args:
+        db: 数据库会话
+        user_id: 用户ID
+        keep_session_id: 需要保留的会话ID（如当前会话）
+
+    Returns:
+        int: 吊销的会话数量
+    """
+    query = db.query(UserSession).filter(
+        UserSession.user_id == user_id,
+        UserSession.revoked_at.is_(None),
+    )
+    if keep_session_id:
+        query = query.filter(UserSession.id != keep_session_id)
+    return revoke_sessions(query.all())
+
+
+def _cached_revocation(session_id: Optional[str]) -> Optional[bool]:
+    """按进程内缓存判断会话是否已吊销，无法判断时返回 None"""
+    # 没有 sid 的令牌无法关联会话、也就无法吊销，一律按已吊销处理（需重新登录）
+    if not session_id:
+        return True
+    if revoked_sessions.get(session_id) is not None:
+        return True
+    if active_sessions.get(session_id) is not None:
+        return False
+    return None
+
+
+def _remember_revocation(session_id: str, row) -> bool:
+    """缓存 user_sessions 的查询结果，会话不存在（如用户已删除）按已吊销处理"""
+    if row is None or row.revoked_at is not None:
+        revoked_sessions.set(session_id, True)
+        return True
+    active_sessions.set(session_id, True)
+    return False
+
+
+def is_session_revoked(db: Session, session_id: Optional[str]) -> bool:
+    """
+    判断访问令牌所属会话是否已吊销
+
+    先查进程内的吊销集合和有效会话缓存，都未命中时按主键查询 user_sessions 表，
+    结果缓存 SESSION_CHECK_TTL 秒，其它进程中登出的会话因此同样会失效
+
+    Args:
+        db: 数据库会话
+        session_id: 访问令牌中的 sid，缺少 sid 的旧令牌按已吊销处理
+
+    Returns:
+        bool: 是否已吊销
+    """
+    revoked = _cached_revocation(session_id)
+    if revoked is not None:
+        return revoked
+    row = db.query(UserSession.revoked_at).filter(UserSession.id == session_id).first()
+    return _remember_revocation(session_id, row)
+
+
+async def is_session_revoked_async(db, session_id: Optional[str]) -> bool:
+    """
+    判断访问令牌所属会话是否已吊销（异步数据库模式）
+
+    Args:
+        db: 异步数据库会话
+        session_id: 访问令牌中的 sid，缺少 sid 的旧令牌按已吊销处理
+
+    Returns:
+        bool: 是否已吊销
+    """
+    revoked = _cached_revocation(session_id)
+    if revoked is not None:
+        return revoked
+    result = await db.execute(select(UserSession.revoked_at).where(UserSession.id == session_id))
+    return _remember_revocation(session_id, result.first())
+
+
+def load_revoked_sessions(db: Session) -> int:
+    """
+    启动时加载最近吊销的会话
+    吊销时间早于访问令牌有效期的会话，其访问令牌必然已过期，无需加载
+
+    Args:
+        db: 数据库会话
+
+    Returns:
+        int: 加载的会话数量
+    """
+    since = datetime.utcnow() - timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    rows = (
+        db.query(UserSession.id, UserSession.revoked_at)
+        .filter(UserSession.revoked_at.isnot(None), UserSession.revoked_at > since)
+        .all()
+    )
+    for row in rows:
+        ttl = (row.revoked_at - since).total_seconds()
+        revoked_sessions.set(row.id, True, ttl=ttl)
+    if rows:
+        logger.info("已加载 %d 个最近吊销的会话", len(rows))
+    return len(rows)
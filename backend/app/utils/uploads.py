@@ -0,0 +1,249 @@
+"""
+流式文件上传
+直接解析 multipart 请求体，逐块计算 SHA-256 并写入临时文件，超过大小限制立即中止，
+不把整个文件读入内存；文件以内容哈希命名，相同内容只保存一份，URL 不变可长期缓存
+"""
+import os
+import re
+import hashlib
+import logging
+import mimetypes
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.staticfiles import StaticFiles
+
+from app.config import settings
+
+try:
+    import python_multipart as multipart
+    from python_multipart.multipart import parse_options_header
+except ModuleNotFoundError:  # 旧版 python-multipart 的包名为 multipart
+    import multipart
+    from multipart.multipart import parse_options_header
+
+logger = logging.getLogger(__name__)
+
+# 请求体中除文件内容外的部分（边界、分段头、其它表单字段）的长度上限
+MULTIPART_OVERHEAD = 16 * 1024
+
+# 内容寻址的文件名：64 位十六进制 SHA-256，缩略图带 _尺寸 后缀
+HASHED_NAME = re.compile(r"^[0-9a-f]{64}(_\d+)?\.[a-z0-9]+$")
+
+# 常见图片类型的扩展名（mimetypes 对部分类型返回的扩展名不统一）
+_EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png", "image/gif": ".gif", "image/webp": ".webp"}
+
+
+class UploadRejected(Exception):
+    """上传的文件不符合要求"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+@dataclass
+class StoredUpload:
+    """已保存的上传文件"""
+    path: Path
+    sha256: str
+    size: int
+    content_type: str
+    # 相同内容的文件已存在，本次上传未写入新文件
+    deduplicated: bool
+
+
+def extension_for(content_type: str) -> str:
+    """
+    返回内容类型对应的文件扩展名
+
+    Args:
+        content_type: 内容类型，如 image/png
+
+    Returns:
+        str: 扩展名（含点），未知类型返回 .bin
+    """
+    return _EXTENSIONS.get(content_type) or mimetypes.guess_extension(content_type) or ".bin"
+
+
+class _HashingFile:
+    """边写入临时文件边计算 SHA-256（在线程池中调用，不阻塞事件循环）"""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        self.path: Optional[Path] = None
+        self._file = None
+
+    def write(self, data: bytes) -> None:
+        if self._file is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, name = tempfile.mkstemp(dir=self.directory, prefix=".upload-")
+            self._file = os.fdopen(fd, "wb")
+            self.path = Path(name)
+        self._file.write(data)
+        self.hasher.update(data)
+        self.size += len(data)
+
+    def commit(self, extension: str) -> tuple:
+        """关闭临时文件并按内容哈希重命名，返回 (最终路径, 是否已存在相同内容的文件)"""
+        if self._file is None:
+            self.write(b"")
+        self._file.close()
+        final = self.directory / f"{self.hasher.hexdigest()}{extension}"
+        if final.exists():
+            self.path.unlink()
+            return final, True
+        os.chmod(self.path, 0o644)
+        os.replace(self.path, final)
+        return final, False
+
+    def discard(self) -> None:
+        """关闭并删除临时文件"""
+        if self._file is not None:
+            self._file.close()
+            self.path.unlink(missing_ok=True)
+
+
+async def receive_upload(
+    request: Request,
+    field_name: str,
+    directory: Path,
+    max_size: int,
+    content_types: Iterable[str]
+) -> StoredUpload:
+    """
+    从 multipart/form-data 请求体中流式接收一个文件
+
+    文件内容逐块写入临时文件，超过 max_size 立即中止；声明的 Content-Length 明显超限时
+    不读取请求体直接拒绝。保存后的文件名为内容的 SHA-256
+
+    Args:
+        request: 请求
+        field_name: 文件字段名
+        directory: 保存目录
+        max_size: 文件大小上限（字节）
+        content_types: 允许的内容类型
+
+    Returns:
+        StoredUpload: 已保存的文件
+
+    Raises:
+        UploadRejected: 请求格式错误、缺少文件、类型不允许（400）或文件过大（413）
+    """
+    too_large = UploadRejected(413, f"文件大小不能超过{max_size // (1024 * 1024)}MB")
+
+    media_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if media_type != b"multipart/form-data" or b"boundary" not in params:
+        raise UploadRejected(400, "请使用 multipart/form-data 上传文件")
+
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_size + MULTIPART_OVERHEAD:
+        raise too_large
+
+    allowed = {t.strip().lower() for t in content_types}
+    state = {"field": b"", "value": b"", "target": False, "done": False}
+    headers: Dict[bytes, bytes] = {}
+    pending: List[bytes] = []
+    errors: List[UploadRejected] = []
+    content_type = ""
+
+    def on_part_begin():
+        headers.clear()
+
+    def on_header_field(data: bytes, start: int, end: int):
+        state["field"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int):
+        state["value"] += data[start:end]
+
+    def on_header_end():
+        headers[state["field"].lower()] = state["value"]
+        state["field"] = state["value"] = b""
+
+    def on_headers_finished():
+        nonlocal content_type
+        _, options = parse_options_header(headers.get(b"content-disposition", b""))
+        state["target"] = (
+            not state["done"]
+            and options.get(b"name", b"").decode("latin-1") == field_name
+            and b"filename" in options
+        )
+        if state["target"]:
+            content_type = headers.get(b"content-type", b"").decode("latin-1").split(";")[0].strip().lower()
+            if content_type not in allowed:
+                errors.append(UploadRejected(400, "不支持的文件类型"))
+
+    def on_part_data(data: bytes, start: int, end: int):
+        if state["target"]:
+            pending.append(data[start:end])
+
+    def on_part_end():
+        if state["target"]:
+            state["target"] = False
+            state["done"] = True
+
+    parser = multipart.MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+    })
+
+    target = _HashingFile(directory)
+    try:
+        async for chunk in request.stream():
+            try:
+                parser.write(chunk)
+            except multipart.exceptions.MultipartParseError:
+                raise UploadRejected(400, "请求体格式错误")
+            if errors:
+                raise errors[0]
+            if pending:
+                data = b"".join(pending)
+                pending.clear()
+                if target.size + len(data) > max_size:
+                    raise too_large
+                await run_in_threadpool(target.write, data)
+            if state["done"]:
+                # 已收到完整文件，其余表单字段不再读取
+                break
+
+        if not state["done"]:
+            raise UploadRejected(400, "缺少上传文件")
+        path, deduplicated = await run_in_threadpool(target.commit, extension_for(content_type))
+    except BaseException:
+        await run_in_threadpool(target.discard)
+        raise
+
+    return StoredUpload(
+        path=path,
+        sha256=target.hasher.hexdigest(),
+        size=target.size,
+        content_type=content_type,
+        deduplicated=deduplicated,
+    )
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    上传文件的静态文件服务
+    以内容哈希命名的文件内容永远不变，返回长期有效的 immutable 缓存头；其它文件按默认方式协商缓存
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if HASHED_NAME.match(os.path.basename(full_path)):
+            response.headers["Cache-Control"] = f"public, max-age={settings.UPLOAD_CACHE_MAX_AGE}, immutable"
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
@@ -9,18 +9,21 @@ import logging
 # 添加项目根目录到 Python 路径
 sys.path.insert(0, str(Path(__file__).parent))
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse
 from app.config import settings
-from app.routers import auth, categories, tags, notes
-from app.database import engine, Base, get_db
-
-# 导入所有模型（必须导入才能让 SQLAlchemy 创建表）
-from app.models import User, Category, Tag, Note, NoteTag
-
-# 配置日志
-logging.basicConfig(level=logging.INFO)
+from app.logger import setup_logging
+from app.middleware import RequestIdMiddleware, RateLimitMiddleware, CompressionMiddleware
+from app.routers import auth, categories, tags, notes, sync, attachments, events, batch
+from app.database import get_engine, get_session_factory, dispose_engines
+from app.dependencies import verify_metrics_token
+from app.utils import PasswordHasherBusy, load_revoked_sessions, response_cache_stats, render_cache_stats, CachedStaticFiles
+from app.utils import change_event_stats
+from app.pool_metrics import pool_status
+
+# 配置日志（非阻塞，级别和格式见 Settings.LOG_*）
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # 创建 FastAPI 应用实例
@@ -32,6 +35,14 @@ app = FastAPI(
     redoc_url="/api/redoc"
 )
 
+# 响应压缩（最内层，直接压缩路由输出的响应体）
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# 限流与准入控制（位于 CORS 内层，429/503 响应同样带有 CORS 头）
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
 # 配置 CORS
 app.add_middleware(
     CORSMiddleware,
@@ -39,163 +50,77 @@ app.add_middleware(
     allow_credentials=settings.CORS_ALLOW_CREDENTIALS,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Request-ID", "Retry-After", "Upload-Offset"],
 )
 
-# 挂载静态文件目录
-uploads_path = Path("uploads")
-uploads_path.mkdir(exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=uploads_path), name="uploads")
-
-# 注册路由
-app.include_router(auth.router, prefix="/api/auth", tags=["认证"])
-app.include_router(categories.router, prefix="/api/categories", tags=["分类"])
-app.include_router(tags.router, prefix="/api/tags", tags=["标签"])
-app.include_router(notes.router, prefix="/api/notes", tags=["笔记"])
-
-
-def check_and_rebuild_database():
-    """
-    检查数据库是否使用旧的 Integer ID schema
-    如果是，自动重建数据库（会丢失所有数据）
-    """
-    from sqlalchemy import text, inspect
-    import uuid
-
-    try:
-        inspector = inspect(engine)
-
-        if 'users' not in inspector.get_table_names():
-            logger.info("数据库不存在，将创建新表")
-            return
-
-        # 检查 users.id 的类型
-        users_columns = inspector.get_columns('users')
-        id_column = next((col for col in users_columns if col['name'] == 'id'), None)
+# 请求关联ID（最外层，保证 CORS 等中间件的日志也带有关联ID）
+app.add_middleware(RequestIdMiddleware)
 
-        if not id_column:
-            return
-
-        # 检查是否为 Integer 类型
-        is_integer_id = 'INT' in str(id_column['type']).upper()
-
-        if not is_integer_id:
-            logger.info("✅ 数据库已使用 UUID String 类型")
-            return
-
-        # ⚠️ 检测到旧的 Integer ID schema，需要重建
-        logger.warning("⚠️  检测到数据库使用旧的 Integer ID schema")
-        logger.warning("⚠️  需要重建数据库以支持 UUID ID（会删除所有数据）")
-
-        # 从环境变量读取是否允许自动重建
-        import os
-        auto_rebuild = os.getenv('AUTO_REBUILD_DATABASE', 'false').lower() == 'true'
-
-        if not auto_rebuild:
-            logger.error("❌ 自动重建已禁用")
-            logger.error("请设置环境变量 AUTO_REBUILD_DATABASE=true 以自动重建")
-            logger.error("或者手动执行以下 SQL:")
-            logger.error("  DROP TABLE IF EXISTS note_tags, notes, tags, categories, users;")
-            raise Exception("数据库 schema 不匹配：需要将 Integer ID 迁移到 UUID String")
-
-        logger.info("🔄 开始自动重建数据库...")
-
-        with engine.connect() as conn:
-            # 删除所有表（按依赖顺序）
-            logger.info("删除旧表...")
-            conn.execute(text("DROP TABLE IF EXISTS note_tags"))
-            conn.execute(text("DROP TABLE IF EXISTS notes"))
-            conn.execute(text("DROP TABLE IF EXISTS tags"))
-            conn.execute(text("DROP TABLE IF EXISTS categories"))
-            conn.execute(text("DROP TABLE IF EXISTS users"))
-            conn.commit()
-
-        logger.info("✅ 旧表已删除，将创建新表")
-
-    except Exception as e:
-        logger.error(f"数据库检查失败: {str(e)}")
-        import os
-        auto_rebuild = os.getenv('AUTO_REBUILD_DATABASE', 'false').lower() == 'true'
-        if not auto_rebuild:
-            raise
-        logger.warning("继续启动...")
-
-
-def migrate_database():
+# 挂载上传文件目录（以内容哈希命名的文件返回长期缓存头）
+uploads_path = Path(settings.UPLOAD_DIR)
+uploads_path.mkdir(exist_ok=True)
+app.mount("/uploads", CachedStaticFiles(directory=uploads_path), name="uploads")
+
+# 注册路由（DB_ASYNC=true 时使用由同步路由生成的异步数据库模式路由）
+for router_module, prefix, router_tags in (
+    (auth, "/api/auth", ["认证"]),
+    (categories, "/api/categories", ["分类"]),
+    (tags, "/api/tags", ["标签"]),
+    (notes, "/api/notes", ["笔记"]),
+    (attachments, "/api/notes", ["附件"]),
+    (sync, "/api/sync", ["同步"]),
+    (events, "/api/events", ["变更通知"]),
+    (batch, "/api/batch", ["批量请求"]),
+):
+    router = router_module.router
+    if settings.DB_ASYNC:
+        from app.routers.async_mode import to_async_router
+        router = to_async_router(router)
+    app.include_router(router, prefix=prefix, tags=router_tags)
+
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
     """
-    自动迁移数据库：添加缺失的字段
+    密码哈希线程池已满时快速返回 503，避免登录风暴拖慢其它接口
     """
-    from sqlalchemy import text, inspect
-
-    try:
-        inspector = inspect(engine)
-
-        # 检查并迁移 categories 表
-        if 'categories' in inspector.get_table_names():
-            columns = [col['name'] for col in inspector.get_columns('categories')]
-
-            with engine.connect() as conn:
-                # 添加 color 字段
-                if 'color' not in columns:
-                    logger.info("迁移: 为 categories 表添加 color 字段...")
-                    conn.execute(text(
-                        "ALTER TABLE categories "
-                        "ADD COLUMN color VARCHAR(20) NULL COMMENT '分类颜色' AFTER description"
-                    ))
-                    conn.commit()
-                    logger.info("✅ categories.color 字段添加成功")
-
-                # 添加 sort_order 字段
-                if 'sort_order' not in columns:
-                    logger.info("迁移: 为 categories 表添加 sort_order 字段...")
-                    conn.execute(text(
-                        "ALTER TABLE categories "
-                        "ADD COLUMN sort_order INT DEFAULT 0 COMMENT '排序顺序' AFTER color"
-                    ))
-                    conn.commit()
-                    logger.info("✅ categories.sort_order 字段添加成功")
-
-        # 检查并迁移 tags 表
-        if 'tags' in inspector.get_table_names():
-            columns = [col['name'] for col in inspector.get_columns('tags')]
-
-            with engine.connect() as conn:
-                # 添加 color 字段
-                if 'color' not in columns:
-                    logger.info("迁移: 为 tags 表添加 color 字段...")
-                    conn.execute(text(
-                        "ALTER TABLE tags "
-                        "ADD COLUMN color VARCHAR(20) NULL COMMENT '标签颜色' AFTER name"
-                    ))
-                    conn.commit()
-                    logger.info("✅ tags.color 字段添加成功")
-
-    except Exception as e:
-        logger.warning(f"数据库迁移警告: {str(e)}")
-        # 不中断启动，继续执行
+    logger.warning("密码哈希线程池已满，拒绝请求: %s", request.url.path)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "服务繁忙，请稍后重试"},
+        headers={"Retry-After": "1"},
+    )
 
 
 @app.on_event("startup")
 async def startup_event():
     """
     应用启动事件
-    创建数据库表
+    数据库的创建和迁移由 python -m app.bootstrap 在部署时执行，启动时只加载运行所需的状态
     """
     try:
-        logger.info(f"正在初始化数据库: {settings.MYSQL_HOST}:{settings.MYSQL_PORT}/{settings.MYSQL_DB}")
-
-        # 检查数据库 schema，自动重建如果不匹配
-        check_and_rebuild_database()
-
-        # 创建所有表（如果表已存在则跳过）
-        Base.metadata.create_all(bind=engine)
-        logger.info("✅ 数据库表创建成功")
-
-        # 自动迁移数据库（添加缺失的字段）
-        migrate_database()
-
-        # 测试数据库连接
-        with engine.connect() as connection:
-            logger.info("✅ 数据库连接成功")
+        if settings.DB_BOOTSTRAP_ON_STARTUP:
+            from app.bootstrap import bootstrap
+            bootstrap()
+
+        # 同步模式下线程数超过连接池容量时，多出的请求会在签出连接时排队
+        if not settings.DB_ASYNC:
+            from anyio.to_thread import current_default_thread_limiter
+            threads = current_default_thread_limiter().total_tokens
+            capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+            if threads > capacity:
+                logger.warning(
+                    "线程池大小 %s 超过连接池容量 %s，高并发时请求会等待数据库连接（见 /health/pool）",
+                    threads, capacity
+                )
+
+        # 加载最近吊销的会话，保证重启后已登出的访问令牌仍然无效
+        db = get_session_factory()()
+        try:
+            load_revoked_sessions(db)
+        finally:
+            db.close()
+        logger.info("✅ 数据库连接成功")
 
     except Exception as e:
         logger.error(f"❌ 数据库初始化失败: {str(e)}")
@@ -204,6 +129,15 @@ async def startup_event():
         # 这样可以让应用启动，等待数据库就绪
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    应用关闭事件
+    释放数据库连接
+    """
+    await dispose_engines()
+
+
 @app.get("/")
 def root():
     """
@@ -225,13 +159,49 @@ def health_check():
     """
     try:
         # 尝试连接数据库
-        with engine.connect() as connection:
+        with get_engine().connect() as connection:
             return {"status": "healthy", "database": "connected"}
     except Exception as e:
         logger.warning(f"数据库连接检查失败: {str(e)}")
         return {"status": "degraded", "database": "disconnected", "error": str(e)}
 
 
+@app.get("/health/pool", dependencies=[Depends(verify_metrics_token)])
+def pool_health():
+    """
+    数据库连接池指标
+    返回连接池大小、签出/溢出连接数、签出等待时间直方图和超时次数，用于调整 DB_POOL_* 配置
+    """
+    return pool_status()
+
+
+@app.get("/health/cache", dependencies=[Depends(verify_metrics_token)])
+def cache_health():
+    """
+    响应缓存指标
+    返回缓存后端、命中率、写入/跳过次数以及内存占用（进程内缓存），用于调整 RESPONSE_CACHE_* 配置
+    """
+    return response_cache_stats()
+
+
+@app.get("/health/render-cache", dependencies=[Depends(verify_metrics_token)])
+def render_cache_health():
+    """
+    Markdown 渲染缓存指标
+    返回内存命中、磁盘命中和实际渲染次数以及内存占用，用于调整 RENDER_CACHE_* 配置
+    """
+    return render_cache_stats()
+
+
+@app.get("/health/events", dependencies=[Depends(verify_metrics_token)])
+def events_health():
+    """
+    变更事件流指标
+    返回当前连接数、订阅用户数、已推送的变更数和队列溢出次数，用于调整 EVENTS_* 配置
+    """
+    return change_event_stats()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
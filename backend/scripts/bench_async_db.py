@@ -0,0 +1,128 @@
+"""
+同步/异步数据库模式并发扩展性基准测试
+分别以 DB_ASYNC=false / true 启动应用（SQLite 临时库，每条 SQL 注入固定延迟模拟网络往返），
+在不同并发度下请求笔记列表接口，对比吞吐和延迟
+
+执行方式：
+python scripts/bench_async_db.py [--concurrency 20,40,100,200] [--latency-ms 50]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+
+def percentile(values, pct: float) -> float:
+    """返回百分位数（毫秒）"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+    return ordered[index] * 1000
+
+
+async def run_worker(args) -> list:
+    """子进程：按环境变量选择的模式启动应用并压测"""
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    import httpx
+    from sqlalchemy import event
+    from sqlalchemy.util import await_only
+
+    import main
+    from app import database
+    from app.config import settings
+
+    latency = args.latency_ms / 1000
+    database.Base.metadata.create_all(bind=database.engine)
+    event.listen(database.engine, "before_cursor_execute", lambda *a: time.sleep(latency))
+    if settings.DB_ASYNC:
+        event.listen(database.async_engine.sync_engine, "before_cursor_execute",
+                     lambda *a: await_only(asyncio.sleep(latency)))
+
+    transport = httpx.ASGITransport(app=main.app)
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        account = {"username": "bench", "email": "bench@example.com", "password": "secret123"}
+        await client.post("/api/auth/register", json=account)
+        response = await client.post("/api/auth/login", json=account)
+        headers = {"Authorization": "Bearer " + response.json()["access_token"]}
+        for i in range(20):
+            await client.post("/api/notes", headers=headers, json={"title": f"笔记{i}", "content": "内容" * 50})
+
+        for concurrency in args.concurrency:
+            total = max(args.requests, concurrency * 2)
+            queue = asyncio.Queue()
+            for _ in range(total):
+                queue.put_nowait(None)
+            latencies = []
+
+            async def worker():
+                while not queue.empty():
+                    queue.get_nowait()
+                    start = time.perf_counter()
+                    r = await client.get("/api/notes", headers=headers)
+                    assert r.status_code == 200, r.text
+                    latencies.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+            results.append({
+                "concurrency": concurrency,
+                "rps": total / elapsed,
+                "p50": percentile(latencies, 50),
+                "p99": percentile(latencies, 99),
+            })
+    return results
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="同步/异步数据库模式并发扩展性基准测试")
+    parser.add_argument("--concurrency", default="20,40,100,200", help="并发度列表，逗号分隔")
+    parser.add_argument("--requests", type=int, default=400, help="每个并发度的最少请求数")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="每条 SQL 注入的延迟（毫秒）")
+    parser.add_argument("--pool-size", type=int, default=200, help="连接池大小")
+    parser.add_argument("--worker", choices=["sync", "async"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.concurrency = [int(c) for c in args.concurrency.split(",")]
+
+    if args.worker:
+        print(json.dumps(asyncio.run(run_worker(args))))
+        return
+
+    print(f"每条 SQL 延迟 {args.latency_ms}ms，连接池 {args.pool_size}，请求 GET /api/notes")
+    print(f"{'模式':<8}{'并发':>8}{'请求/s':>12}{'p50(ms)':>12}{'p99(ms)':>12}")
+    for mode in ("sync", "async"):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(
+                os.environ,
+                DATABASE_URL=f"sqlite:///{tmp}/bench.db",
+                DB_ASYNC="true" if mode == "async" else "false",
+                RATE_LIMIT_ENABLED="false",
+                # 连接池足够大，避免连接池成为瓶颈，只比较线程池与事件循环的差异
+                DB_POOL_SIZE=str(args.pool_size),
+                DB_MAX_OVERFLOW="0",
+                LOG_LEVEL="WARNING",
+                BCRYPT_ROUNDS="4",
+            )
+            output = subprocess.run(
+                [sys.executable, __file__, "--worker", mode,
+                 "--concurrency", ",".join(map(str, args.concurrency)),
+                 "--requests", str(args.requests),
+                 "--latency-ms", str(args.latency_ms),
+                 "--pool-size", str(args.pool_size)],
+                env=env, cwd=tmp, capture_output=True, text=True, check=True
+            ).stdout
+        for row in json.loads(output.strip().splitlines()[-1]):
+            print(f"{mode:<8}{row['concurrency']:>8}{row['rps']:>12.1f}{row['p50']:>12.1f}{row['p99']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
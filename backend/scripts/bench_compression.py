@@ -0,0 +1,125 @@
+"""
+响应压缩基准测试
+用接近真实的笔记数据（中英文混排的 Markdown、代码块、列表）生成笔记列表、搜索结果和单篇笔记的 JSON，
+对比 gzip / brotli（已安装时）各压缩级别的压缩率与 CPU 耗时（不需要数据库）
+
+执行方式：
+python scripts/bench_compression.py [--notes 20] [--content-size 4000] [--iterations 50]
+"""
+import sys
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.middleware import compression
+
+WORDS_ZH = ["知识库", "笔记", "数据库", "索引", "缓存", "性能", "查询", "接口", "部署", "同步",
+            "版本", "标签", "分类", "搜索", "压缩", "优化", "配置", "服务", "用户", "文档"]
+WORDS_EN = ["FastAPI", "SQLAlchemy", "request", "response", "latency", "throughput", "pool",
+            "session", "index", "query", "async", "thread", "cache", "token", "deploy"]
+CODE = [
+    "def get_notes(db, user_id):\n    return db.query(Note).filter(Note.user_id == user_id).all()",
+    "SELECT id, title FROM notes WHERE user_id = %s ORDER BY updated_at DESC LIMIT 20;",
+    "const res = await fetch('/api/notes', { headers: { Authorization: `Bearer ${token}` } });",
+]
+
+
+def make_markdown(rng: random.Random, size: int) -> str:
+    """生成大约 size 个字符的 Markdown 笔记内容"""
+    parts = []
+    length = 0
+    while length < size:
+        kind = rng.random()
+        if kind < 0.1:
+            block = "## " + "".join(rng.choices(WORDS_ZH, k=3))
+        elif kind < 0.2:
+            block = "```python\n" + rng.choice(CODE) + "\n```"
+        elif kind < 0.35:
+            block = "\n".join("- " + "".join(rng.choices(WORDS_ZH, k=2)) + " " + rng.choice(WORDS_EN)
+                              for _ in range(rng.randint(2, 5)))
+        else:
+            words = [rng.choice(WORDS_ZH) if rng.random() < 0.7 else " " + rng.choice(WORDS_EN) + " "
+                     for _ in range(rng.randint(15, 40))]
+            block = "".join(words) + "。"
+        parts.append(block)
+        length += len(block) + 2
+    return "\n\n".join(parts)
+
+
+def make_note(rng: random.Random, index: int, content_size: int) -> dict:
+    """生成与 NoteResponse 字段一致的笔记"""
+    tags = [{"id": f"00000000-0000-0000-0000-{rng.randint(0, 10 ** 12):012d}", "name": rng.choice(WORDS_EN)}
+            for _ in range(rng.randint(0, 3))]
+    return {
+        "title": "".join(rng.choices(WORDS_ZH, k=3)) + f" {index}",
+        "content": make_markdown(rng, rng.randint(content_size // 2, content_size * 3 // 2)),
+        "category_id": None,
+        "is_favorite": rng.random() < 0.2,
+        "id": f"{rng.getrandbits(128):032x}",
+        "user_id": "9f1c2b7e-3a4d-4e5f-8a9b-0c1d2e3f4a5b",
+        "view_count": rng.randint(0, 500),
+        "version": rng.randint(0, 30),
+        "created_at": "2026-01-01T08:00:00",
+        "updated_at": "2026-03-01T12:34:56",
+        "category": None,
+        "tags": tags,
+        "tag_ids": [tag["id"] for tag in tags],
+    }
+
+
+def encode(data) -> bytes:
+    """与 FastAPI 默认 JSONResponse 相同的编码方式"""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def measure(payload: bytes, make, iterations: int) -> tuple:
+    """返回压缩后字节数和单次压缩耗时（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        compressed = make().finish(payload)
+    elapsed = (time.perf_counter() - start) / iterations
+    return len(compressed), elapsed * 1000
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="响应压缩基准测试")
+    parser.add_argument("--notes", type=int, default=20, help="列表中的笔记数")
+    parser.add_argument("--content-size", type=int, default=4000, help="单篇笔记内容的平均字符数")
+    parser.add_argument("--iterations", type=int, default=50, help="每项测量的重复次数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    notes = [make_note(rng, i, args.content_size) for i in range(args.notes)]
+    payloads = {
+        "单篇笔记": encode(notes[0]),
+        f"笔记列表({args.notes})": encode({"items": notes, "total": 200, "page": 1, "page_size": args.notes}),
+        "搜索结果": encode({"results": notes[: max(1, args.notes // 2)], "total": max(1, args.notes // 2)}),
+    }
+
+    algorithms = [(f"gzip-{level}", lambda level=level: compression.GzipCompressor(level)) for level in (1, 6, 9)]
+    if compression.brotli is not None:
+        algorithms += [(f"br-{quality}", lambda quality=quality: compression.BrotliCompressor(quality))
+                       for quality in (1, 4, 11)]
+    else:
+        print("未安装 brotli，只测试 gzip（pip install brotli）")
+
+    print(f"{'响应':<14}{'算法':<10}{'原始(KB)':>10}{'压缩后(KB)':>12}{'压缩率':>8}{'节省(KB)':>10}"
+          f"{'耗时(ms)':>10}{'MB/s':>8}{'KB节省/ms':>11}")
+    for name, payload in payloads.items():
+        for algorithm, make in algorithms:
+            size, ms = measure(payload, make, args.iterations)
+            saved = (len(payload) - size) / 1024
+            print(f"{name:<14}{algorithm:<10}{len(payload) / 1024:>10.1f}{size / 1024:>12.1f}"
+                  f"{size / len(payload):>8.1%}{saved:>10.1f}{ms:>10.3f}"
+                  f"{len(payload) / 1024 / 1024 / (ms / 1000):>8.1f}{saved / ms:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
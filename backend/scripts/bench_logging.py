@@ -0,0 +1,90 @@
+"""
+日志开销基准测试
+对比旧的 print(..., flush=True) 与新的队列日志在开启/关闭 DEBUG 时每个请求的额外耗时
+
+执行方式：
+python scripts/bench_logging.py [--requests 20000]
+"""
+import sys
+import os
+import time
+import argparse
+import logging
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.logger import setup_logging, shutdown_logging, request_id_var, debug_sampled
+
+logger = logging.getLogger("bench")
+
+# 模拟一次认证请求中的日志事件数量（旧版 get_current_user + decode_access_token 约 6 行）
+EVENTS_PER_REQUEST = 6
+
+
+def legacy_request(i: int):
+    """旧实现：同步 print 并 flush"""
+    for n in range(EVENTS_PER_REQUEST):
+        print(f"[DEBUG] request {i} event {n} user_id=3f2c7a10-1b7e-4a55-9f39-0c1f3c2d4e5f", flush=True)
+
+
+def logging_request(i: int):
+    """新实现：队列日志"""
+    request_id_var.set(f"req-{i}")
+    for n in range(EVENTS_PER_REQUEST):
+        logger.debug("request %s event %s user_id=%s", i, n, "3f2c7a10-1b7e-4a55-9f39-0c1f3c2d4e5f")
+
+
+def sampled_request(i: int):
+    """新实现：高频事件使用 debug_sampled 采样"""
+    request_id_var.set(f"req-{i}")
+    for n in range(EVENTS_PER_REQUEST):
+        debug_sampled(logger, "request %s event %s user_id=%s", i, n, "3f2c7a10-1b7e-4a55-9f39-0c1f3c2d4e5f")
+
+
+def measure(fn, requests: int) -> float:
+    """返回每个请求的平均耗时（微秒）"""
+    start = time.perf_counter()
+    for i in range(requests):
+        fn(i)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="日志开销基准测试")
+    parser.add_argument("--requests", type=int, default=20000, help="模拟的请求数")
+    args = parser.parse_args()
+
+    real_stdout = sys.stdout
+    results = []
+
+    # 所有输出写入 /dev/null，只测量调用方开销
+    with open(os.devnull, "w") as devnull:
+        sys.stdout = devnull
+        try:
+            results.append(("print(..., flush=True)", measure(legacy_request, args.requests)))
+
+            for label, fn, level, rate in [
+                ("logging DEBUG 关闭", logging_request, "INFO", 1.0),
+                ("logging DEBUG 开启", logging_request, "DEBUG", 1.0),
+                ("debug_sampled DEBUG 开启，采样 10%", sampled_request, "DEBUG", 0.1),
+            ]:
+                settings.LOG_LEVEL = level
+                settings.LOG_DEBUG_SAMPLE_RATE = rate
+                setup_logging()
+                results.append((label, measure(fn, args.requests)))
+                # 等待后台线程写完，避免影响下一组测试
+                shutdown_logging()
+        finally:
+            sys.stdout = real_stdout
+
+    print(f"每个请求 {EVENTS_PER_REQUEST} 条日志，共 {args.requests} 个请求")
+    for label, micros in results:
+        print(f"  {label:<32} {micros:8.2f} µs/请求")
+
+
+if __name__ == "__main__":
+    main()
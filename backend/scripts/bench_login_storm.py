@@ -0,0 +1,155 @@
+"""
+登录风暴基准测试
+以小连接池启动完整应用（SQLite 临时库），大量并发登录的同时逐个请求普通接口（GET /api/tags），
+统计普通接口的延迟和失败数、登录吞吐、503 数量以及连接池签出连接数的峰值。
+登录在等待 bcrypt 期间若占用数据库连接，普通接口会排队直到签出超时（计入失败数）
+
+执行方式：
+python scripts/bench_login_storm.py [--logins 200] [--others 20] [--rounds 10] [--pool-size 2]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+import tempfile
+import subprocess
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+
+def percentile(values, pct: float) -> float:
+    """返回百分位数（毫秒）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+    return ordered[index] * 1000
+
+
+async def run_worker(args) -> dict:
+    """子进程：按环境变量选择的模式启动应用，并发发起登录和普通请求"""
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    import httpx
+
+    import main
+    from app import database
+    from app.pool_metrics import registry
+
+    database.Base.metadata.create_all(bind=database.engine)
+
+    # 连接池耗尽时处理函数抛出的超时异常按 500 计入失败数，不中断测试
+    transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False)
+    other_latencies = []
+    other_status = []
+    login_status = []
+    peak = 0
+    running = True
+
+    async def sample_pool():
+        # 连接池签出连接数的峰值（同步和异步引擎取各自的最大值）
+        nonlocal peak
+        while running:
+            for metrics in registry.values():
+                pool = metrics.engine.pool if metrics.engine is not None else None
+                if pool is not None and hasattr(pool, "checkedout"):
+                    peak = max(peak, pool.checkedout())
+            await asyncio.sleep(0.001)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        account = {"username": "bench", "email": "bench@example.com", "password": "secret123"}
+        await client.post("/api/auth/register", json=account)
+        response = await client.post("/api/auth/login", json=account)
+        headers = {"Authorization": "Bearer " + response.json()["access_token"]}
+
+        logins_done = asyncio.Event()
+
+        async def do_login():
+            response = await client.post("/api/auth/login", json=account)
+            login_status.append(response.status_code)
+
+        async def do_logins():
+            await asyncio.gather(*(do_login() for _ in range(args.logins)))
+            logins_done.set()
+
+        async def do_others():
+            # 普通请求逐个发出，贯穿整个登录风暴；单独请求时连接池足够，失败只可能来自登录占用连接
+            await asyncio.sleep(0.01)
+            while not logins_done.is_set() or len(other_status) < args.others:
+                start = time.perf_counter()
+                response = await client.get("/api/tags", headers=headers)
+                other_latencies.append(time.perf_counter() - start)
+                other_status.append(response.status_code)
+
+        sampler = asyncio.create_task(sample_pool())
+        start = time.perf_counter()
+        await asyncio.gather(do_logins(), do_others())
+        elapsed = time.perf_counter() - start
+        running = False
+        await sampler
+
+    succeeded = login_status.count(200)
+    return {
+        "elapsed": elapsed,
+        "login_ok": succeeded,
+        "login_503": login_status.count(503),
+        "login_rps": succeeded / elapsed if elapsed else 0.0,
+        "others": len(other_status),
+        "other_failed": sum(1 for code in other_status if code != 200),
+        "other_p50": percentile(other_latencies, 50),
+        "other_p99": percentile(other_latencies, 99),
+        "other_mean": statistics.mean(other_latencies) * 1000 if other_latencies else 0.0,
+        "peak_checked_out": peak,
+    }
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="登录风暴基准测试")
+    parser.add_argument("--logins", type=int, default=200, help="并发登录请求数")
+    parser.add_argument("--others", type=int, default=20, help="普通请求的最少次数（登录风暴期间逐个发出）")
+    parser.add_argument("--rounds", type=int, default=10, help="bcrypt 成本因子（生产默认 12）")
+    parser.add_argument("--pool-size", type=int, default=2, help="连接池大小（不允许溢出）")
+    parser.add_argument("--pool-timeout", type=float, default=1.0, help="签出连接的等待上限（秒）")
+    parser.add_argument("--worker", choices=["sync", "async"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(run_worker(args))))
+        return
+
+    print(f"bcrypt rounds={args.rounds}  并发登录={args.logins}  "
+          f"连接池={args.pool_size}（不溢出，等待 {args.pool_timeout}s）")
+    print(f"{'模式':<8}{'耗时(s)':>10}{'登录成功':>10}{'登录503':>10}{'登录/s':>10}"
+          f"{'普通请求':>10}{'普通失败':>10}{'普通p50(ms)':>14}{'普通p99(ms)':>14}{'签出峰值':>10}")
+    for mode in ("sync", "async"):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(
+                os.environ,
+                DATABASE_URL=f"sqlite:///{tmp}/bench.db",
+                DB_ASYNC="true" if mode == "async" else "false",
+                RATE_LIMIT_ENABLED="false",
+                DB_POOL_SIZE=str(args.pool_size),
+                DB_MAX_OVERFLOW="0",
+                DB_POOL_TIMEOUT=str(args.pool_timeout),
+                LOG_LEVEL="WARNING",
+                BCRYPT_ROUNDS=str(args.rounds),
+            )
+            output = subprocess.run(
+                [sys.executable, __file__, "--worker", mode,
+                 "--logins", str(args.logins),
+                 "--others", str(args.others)],
+                env=env, capture_output=True, text=True, check=True,
+            ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:<8}{result['elapsed']:>10.2f}{result['login_ok']:>10}{result['login_503']:>10}"
+              f"{result['login_rps']:>10.1f}{result['others']:>10}{result['other_failed']:>10}{result['other_p50']:>14.1f}"
+              f"{result['other_p99']:>14.1f}{result['peak_checked_out']:>10}")
+
+
+if __name__ == "__main__":
+    main()
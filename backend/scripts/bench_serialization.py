@@ -0,0 +1,133 @@
+"""
+响应序列化基准测试
+对比笔记列表响应的几种序列化方式的耗时（不需要数据库，使用未持久化的 ORM 对象）：
+- FastAPI 默认：构造 NoteListResponse 校验一次，FastAPI 按 response_model 再校验一次，json.dumps 编码
+- 单次校验：按响应模型校验一次，由 Pydantic 直接输出 JSON（FAST_JSON=false）
+- 快速路径：直接从 ORM 对象构建字典，orjson 编码（FAST_JSON=true）
+- 快速路径（标准库 json）：未安装 orjson 时的回退
+
+执行方式：
+python scripts/bench_serialization.py [--page-sizes 20,100] [--tags 3] [--iterations 200]
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+from datetime import datetime
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from pydantic import TypeAdapter
+
+from app.config import settings
+from app.models import Note, Tag, Category
+from app.schemas.note import NoteListResponse
+from app.utils import serialization
+
+
+def make_notes(count: int, tag_count: int, content_size: int) -> list:
+    """生成未持久化的笔记 ORM 对象（已关联分类和标签）"""
+    rng = random.Random(42)
+    category = Category(id="c" * 36, name="技术笔记", description="后端相关")
+    tags = [Tag(id=f"{i:036d}", name=f"标签{i}") for i in range(tag_count * 3)]
+    notes = []
+    for i in range(count):
+        note = Note(
+            id=f"{rng.getrandbits(128):032x}",
+            user_id="u" * 36,
+            category_id=category.id,
+            title=f"笔记标题 {i}",
+            content="## 小节\n\n" + "知识库笔记内容 with some English text. " * (content_size // 40),
+            is_favorite=i % 5 == 0,
+            view_count=rng.randint(0, 500),
+            version=rng.randint(0, 30),
+            created_at=datetime(2026, 1, 1, 8, 0, 0),
+            updated_at=datetime(2026, 3, 1, 12, 34, 56, 123000),
+        )
+        note.category = category
+        note.tags = rng.sample(tags, tag_count)
+        notes.append(note)
+    return notes
+
+
+RESPONSE_ADAPTER = TypeAdapter(NoteListResponse)
+
+
+def fastapi_default(content: dict) -> bytes:
+    """模拟 FastAPI 默认行为：处理函数构造模型，FastAPI 按 response_model 校验、转换后 json.dumps"""
+    model = NoteListResponse(**content)
+    adapter = RESPONSE_ADAPTER
+    data = adapter.dump_python(adapter.validate_python(model, from_attributes=True), mode="json")
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def single_validation(content: dict) -> bytes:
+    settings.FAST_JSON = False
+    return serialization.serialize(content, NoteListResponse)
+
+
+def fast_path(content: dict) -> bytes:
+    settings.FAST_JSON = True
+    return serialization.serialize(content, NoteListResponse)
+
+
+def fast_path_stdlib(content: dict) -> bytes:
+    settings.FAST_JSON = True
+    orjson, serialization.orjson = serialization.orjson, None
+    try:
+        return serialization.serialize(content, NoteListResponse)
+    finally:
+        serialization.orjson = orjson
+
+
+def measure(fn, content: dict, iterations: int) -> float:
+    """返回单次序列化耗时的中位数（毫秒）"""
+    fn(content)
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(content)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="响应序列化基准测试")
+    parser.add_argument("--page-sizes", default="20,100", help="每页笔记数列表，逗号分隔")
+    parser.add_argument("--tags", type=int, default=3, help="每篇笔记的标签数")
+    parser.add_argument("--content-size", type=int, default=2000, help="每篇笔记内容的字符数")
+    parser.add_argument("--iterations", type=int, default=200, help="每项测量的次数")
+    args = parser.parse_args()
+
+    methods = [("FastAPI 默认", fastapi_default), ("单次校验", single_validation)]
+    if serialization.orjson is not None:
+        methods.append(("快速路径 orjson", fast_path))
+    else:
+        print("未安装 orjson，跳过快速路径 orjson（pip install orjson）")
+    methods.append(("快速路径 json", fast_path_stdlib))
+
+    print(f"{'每页笔记数':<10}{'方式':<18}{'耗时(ms)':>10}{'加速比':>8}")
+    for page_size in (int(size) for size in args.page_sizes.split(",")):
+        content = {
+            "items": make_notes(page_size, args.tags, args.content_size),
+            "total": 1000, "page": 1, "page_size": page_size,
+        }
+        # 各方式输出一致，才有比较意义
+        outputs = {fn(content) for _, fn in methods[1:]}
+        assert len(outputs) == 1, "序列化结果不一致"
+        assert json.loads(fastapi_default(content)) == json.loads(outputs.pop())
+
+        baseline = None
+        for name, fn in methods:
+            ms = measure(fn, content, args.iterations)
+            baseline = baseline or ms
+            print(f"{page_size:<10}{name:<18}{ms:>10.3f}{baseline / ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
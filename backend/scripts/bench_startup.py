@@ -0,0 +1,144 @@
+"""
+导入与启动耗时基准测试
+在子进程中多次测量 import main 的耗时和应用启动（startup 事件 + 第一个请求）的耗时，
+同时检查导入阶段没有创建数据库引擎、没有加载数据库驱动、没有发起网络连接；
+超过阈值或检查失败时以非零状态退出，可用于 CI 防止回归
+
+执行方式：
+python scripts/bench_startup.py [--runs 5] [--max-import-ms 3000] [--max-startup-ms 1000]
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import statistics
+import tempfile
+import subprocess
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+# 导入阶段不应加载的数据库驱动
+DB_DRIVERS = ("pymysql", "aiomysql", "aiosqlite")
+
+
+def guard_network(attempts: list):
+    """禁止网络连接：记录连接目标并抛出异常"""
+    def connect(self, address):
+        attempts.append(repr(address))
+        raise OSError("bench_startup: 不允许发起网络连接")
+
+    socket.socket.connect = connect
+    socket.socket.connect_ex = connect
+
+
+def run_import_worker() -> dict:
+    """子进程：测量 import main 的耗时"""
+    sys.path.insert(0, str(BACKEND_DIR))
+    attempts = []
+    guard_network(attempts)
+
+    start = time.perf_counter()
+    import main  # noqa: F401
+    elapsed = time.perf_counter() - start
+
+    from app import database
+    return {
+        "import_ms": elapsed * 1000,
+        "engines": sorted(database._instances),
+        "drivers": [name for name in DB_DRIVERS if name in sys.modules],
+        "connects": attempts,
+    }
+
+
+def run_startup_worker() -> dict:
+    """子进程：测量应用启动和第一个请求的耗时（SQLite 临时库，表已由 bootstrap 创建）"""
+    sys.path.insert(0, str(BACKEND_DIR))
+    from fastapi.testclient import TestClient
+
+    start = time.perf_counter()
+    import main
+    imported = time.perf_counter()
+    client = TestClient(main.app)
+    client.__enter__()
+    started = time.perf_counter()
+    response = client.get("/health")
+    finished = time.perf_counter()
+    client.__exit__(None, None, None)
+
+    assert response.json()["status"] == "healthy", response.text
+    return {
+        "import_ms": (imported - start) * 1000,
+        "startup_ms": (started - imported) * 1000,
+        "first_request_ms": (finished - started) * 1000,
+    }
+
+
+def run_worker(mode: str, env: dict, cwd: str) -> dict:
+    """启动子进程执行一次测量"""
+    output = subprocess.run(
+        [sys.executable, __file__, "--worker", mode],
+        env=env, cwd=cwd, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="导入与启动耗时基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="每项测量的次数（取中位数）")
+    parser.add_argument("--max-import-ms", type=float, default=3000.0, help="import main 耗时上限（毫秒）")
+    parser.add_argument("--max-startup-ms", type=float, default=1000.0, help="启动耗时上限（毫秒，不含导入）")
+    parser.add_argument("--worker", choices=["import", "startup"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker == "import":
+        print(json.dumps(run_import_worker()))
+        return
+    if args.worker == "startup":
+        print(json.dumps(run_startup_worker()))
+        return
+
+    failures = []
+    base_env = dict(os.environ, LOG_LEVEL="WARNING", RATE_LIMIT_ENABLED="false")
+    with tempfile.TemporaryDirectory() as tmp:
+        # 导入：使用默认的 MySQL 配置（指向本机不存在的服务），导入阶段不应连接数据库
+        import_env = {k: v for k, v in base_env.items() if k != "DATABASE_URL"}
+        import_env.update(MYSQLHOST="127.0.0.1", MYSQLPORT="1")
+        imports = [run_worker("import", import_env, tmp) for _ in range(args.runs)]
+        import_ms = statistics.median(r["import_ms"] for r in imports)
+        print(f"import main: 中位数 {import_ms:.1f}ms（{args.runs} 次）")
+
+        last = imports[-1]
+        print(f"  导入后已创建的引擎: {last['engines'] or '无'}")
+        print(f"  导入后已加载的数据库驱动: {last['drivers'] or '无'}")
+        print(f"  导入阶段的网络连接: {last['connects'] or '无'}")
+        if last["engines"] or last["drivers"] or last["connects"]:
+            failures.append("导入阶段创建了数据库引擎或发起了连接")
+        if import_ms > args.max_import_ms:
+            failures.append(f"import main 耗时 {import_ms:.1f}ms 超过上限 {args.max_import_ms}ms")
+
+        # 启动：先执行一次 bootstrap 建表，再分别测量启动时是否执行数据库初始化
+        startup_env = dict(base_env, DATABASE_URL=f"sqlite:///{tmp}/bench.db")
+        subprocess.run([sys.executable, "-m", "app.bootstrap"], env=startup_env,
+                       cwd=BACKEND_DIR, capture_output=True, check=True)
+        print(f"{'启动方式':<28}{'导入(ms)':>12}{'启动(ms)':>12}{'首个请求(ms)':>14}")
+        for label, flag in (("默认", "false"), ("DB_BOOTSTRAP_ON_STARTUP", "true")):
+            env = dict(startup_env, DB_BOOTSTRAP_ON_STARTUP=flag)
+            runs = [run_worker("startup", env, tmp) for _ in range(args.runs)]
+            medians = {key: statistics.median(r[key] for r in runs)
+                       for key in ("import_ms", "startup_ms", "first_request_ms")}
+            print(f"{label:<28}{medians['import_ms']:>12.1f}{medians['startup_ms']:>12.1f}"
+                  f"{medians['first_request_ms']:>14.1f}")
+            if flag == "false" and medians["startup_ms"] > args.max_startup_ms:
+                failures.append(f"启动耗时 {medians['startup_ms']:.1f}ms 超过上限 {args.max_startup_ms}ms")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+笔记内容压缩迁移脚本
+将已有的大笔记内容按批压缩到 content_compressed 列（或反向解压回 content 列）
+
+执行方式：
+python scripts/compress_notes.py [--batch-size 200] [--dry-run] [--decompress]
+"""
+import sys
+import argparse
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import func
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Note
+from app.models.compression import compress_text, decompress_text
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def compress_batches(batch_size: int, dry_run: bool):
+    """
+    按主键顺序分批压缩超过阈值的笔记内容
+
+    每批单独提交，可以随时中断后重新执行
+    """
+    db = SessionLocal()
+    last_id = ""
+    scanned = compressed = bytes_before = bytes_after = 0
+
+    try:
+        while True:
+            rows = db.query(Note.id, Note.content_text).filter(
+                Note.id > last_id,
+                Note.content_compressed.is_(None),
+                func.length(Note.content_text) >= settings.NOTE_COMPRESSION_THRESHOLD
+            ).order_by(Note.id).limit(batch_size).all()
+
+            if not rows:
+                break
+
+            for row in rows:
+                scanned += 1
+                blob = compress_text(row.content_text)
+                if blob is None:
+                    continue
+
+                compressed += 1
+                bytes_before += len(row.content_text.encode("utf-8"))
+                bytes_after += len(blob)
+
+                if not dry_run:
+                    # 显式写回 updated_at，避免迁移改变笔记的更新时间
+                    db.query(Note).filter(Note.id == row.id).update(
+                        {
+                            Note.content_text: None,
+                            Note.content_compressed: blob,
+                            Note.updated_at: Note.updated_at,
+                        },
+                        synchronize_session=False
+                    )
+
+            last_id = rows[-1].id
+            if not dry_run:
+                db.commit()
+            logger.info(f"已处理 {scanned} 条，压缩 {compressed} 条")
+
+    finally:
+        db.close()
+
+    ratio = bytes_before / bytes_after if bytes_after else 0
+    logger.info(f"✅ 完成：压缩 {compressed} 条，{bytes_before} 字节 -> {bytes_after} 字节（{ratio:.2f}x）")
+
+
+def decompress_batches(batch_size: int, dry_run: bool):
+    """
+    按主键顺序分批将压缩内容解压回 content 列（回滚用）
+    """
+    db = SessionLocal()
+    last_id = ""
+    restored = 0
+
+    try:
+        while True:
+            rows = db.query(Note.id, Note.content_compressed).filter(
+                Note.id > last_id,
+                Note.content_compressed.isnot(None)
+            ).order_by(Note.id).limit(batch_size).all()
+
+            if not rows:
+                break
+
+            for row in rows:
+                restored += 1
+                if not dry_run:
+                    db.query(Note).filter(Note.id == row.id).update(
+                        {
+                            Note.content_text: decompress_text(row.content_compressed),
+                            Note.content_compressed: None,
+                            Note.updated_at: Note.updated_at,
+                        },
+                        synchronize_session=False
+                    )
+
+            last_id = rows[-1].id
+            if not dry_run:
+                db.commit()
+            logger.info(f"已解压 {restored} 条")
+
+    finally:
+        db.close()
+
+    logger.info(f"✅ 完成：解压 {restored} 条")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="压缩或解压已有笔记内容")
+    parser.add_argument("--batch-size", type=int, default=200, help="每批处理的笔记数")
+    parser.add_argument("--dry-run", action="store_true", help="只统计，不写入数据库")
+    parser.add_argument("--decompress", action="store_true", help="将压缩内容解压回 content 列")
+    args = parser.parse_args()
+
+    if args.decompress:
+        decompress_batches(args.batch_size, args.dry_run)
+    else:
+        logger.info(
+            f"压缩阈值: {settings.NOTE_COMPRESSION_THRESHOLD} 字节，"
+            f"算法: {settings.NOTE_COMPRESSION_ALGORITHM}"
+        )
+        compress_batches(args.batch_size, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from sqlalchemy import inspect, text
-from app.database import engine, Base, SessionLocal
+from app.bootstrap import bootstrap
+from app.database import get_engine, get_session_factory
 from app.models import User, Category, Tag, Note, NoteTag
 
 
@@ -21,8 +22,8 @@ def init_database():
     print("开始初始化数据库...")
     print("=" * 60)
 
-    # 创建所有表
-    Base.metadata.create_all(bind=engine)
+    # 创建数据库和所有表，迁移缺失的字段
+    bootstrap()
     print("✓ 数据库表创建成功")
 
     # 验证表结构
@@ -30,7 +31,7 @@ def init_database():
     print("数据库表结构验证")
     print("=" * 60)
 
-    inspector = inspect(engine)
+    inspector = inspect(get_engine())
     tables = inspector.get_table_names()
 
     print(f"\n共有 {len(tables)} 个表:")
@@ -48,7 +49,7 @@ def init_database():
     print("测试数据库连接")
     print("=" * 60)
 
-    db = SessionLocal()
+    db = get_session_factory()()
     try:
         # 测试查询
         user_count = db.query(User).count()